@@ -0,0 +1,107 @@
+"""
+Single-row and batched latency of each model-serving backend.
+
+    cd backend
+    python -m benchmarks.bench_backends                  # the .cbm models in models_files/
+    python -m benchmarks.bench_backends --synthetic      # stand-in models where a .cbm or CSV is missing
+
+Rows are sampled from each model's training CSV. With --synthetic, a small
+model is fitted on generated rows for any model whose files are absent, so
+the comparison can run on a checkout without the data.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from catboost import CatBoostRegressor
+
+from config import MODEL_PATHS, DATA_PATHS, MODEL_FEATURES
+from models.backends import BACKEND_KINDS, create_backend, check_parity, frame_rows, training_frame
+from models.loader import load_catboost_model
+
+CATEGORICALS = {"TaskName", "DriveType", "Make", "Model", "FuelType", "Transmission"}
+
+
+def synthetic_frame(feature_names, rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for f in feature_names:
+        if f in CATEGORICALS:
+            columns[f] = rng.choice([f"{f}{i}" for i in range(40)], rows)
+        elif f == "Year":
+            columns[f] = rng.integers(1995, 2025, rows).astype(float)
+        else:
+            columns[f] = rng.uniform(0, 200000 if f == "Distance" else 10, rows).round(1)
+    return pd.DataFrame(columns)
+
+
+def synthetic_model(name, directory: Path, rows: int = 5000):
+    """Fits a stand-in for name and writes its .cbm and training CSV into directory."""
+    feature_names = MODEL_FEATURES[name]
+    df = synthetic_frame(feature_names, rows)
+    price = 100 + df.select_dtypes("number").sum(axis=1) % 400
+    cat_features = [f for f in feature_names if f in CATEGORICALS]
+    model = CatBoostRegressor(iterations=500, depth=6, verbose=0, cat_features=cat_features, allow_writing_files=False)
+    model.fit(df, price)
+
+    model_path, data_path = directory / f"{name.lower()}_model.cbm", directory / f"{name.lower()}_data.csv"
+    model.save_model(str(model_path))
+    df.assign(AdjustedPrice=price).to_csv(data_path, index=False)
+    return model, model_path, data_path
+
+
+def timed(fn, repeat: int) -> float:
+    """Median wall time of fn in microseconds."""
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples)) * 1e6
+
+
+def bench_model(name, model, model_path, data_path, batch: int, repeat: int):
+    feature_names = MODEL_FEATURES[name]
+    cat_features = list(model.get_cat_feature_indices())
+    rows = frame_rows(training_frame(data_path, feature_names, cat_features).sample(batch, replace=True, random_state=0))
+
+    backends = {kind: create_backend(kind, model, model_path, data_path, feature_names) for kind in BACKEND_KINDS}
+    # The evaluator on its own, without the compiled backend's hand-off of large batches
+    backends["evaluator"] = backends["compiled"].evaluator
+    parity = check_parity(backends["native"], backends["evaluator"], rows)
+    print(f"{name}: parity ok={parity['ok']} max_abs_diff={parity['max_abs_diff']:.2e} over {parity['rows']} rows")
+
+    for kind, backend in backends.items():
+        single = timed(lambda: backend.predict(rows[:1]), repeat)
+        batched = timed(lambda: backend.predict(rows), max(3, repeat // 50))
+        print(f"  {kind:<9} single {single:9.1f} us   batch[{batch}] {batched / 1000:8.2f} ms  ({batched / batch:6.2f} us/row)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="*", default=list(MODEL_PATHS), help="model names (default: all)")
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=500, help="single-row repetitions")
+    parser.add_argument("--synthetic", action="store_true", help="fit stand-in models for missing files")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        for name in args.models:
+            model_path, data_path = MODEL_PATHS[name], DATA_PATHS[name]
+            if Path(model_path).exists() and Path(data_path).exists():
+                model = load_catboost_model(model_path)
+            elif args.synthetic:
+                model, model_path, data_path = synthetic_model(name, Path(scratch))
+                print(f"{name}: no model/data files, using a synthetic stand-in")
+            else:
+                print(f"{name}: skipped, {model_path} or {data_path} missing (try --synthetic)")
+                continue
+            bench_model(name, model, model_path, data_path, args.batch, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Concurrent HTTP load against the app in-process (httpx over ASGI, no
+sockets), so the numbers include routing, validation, the stage executors
+and serialisation but not the network.
+"""
+import asyncio
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.micro import sample_vehicles
+
+# Relative frequency of each endpoint in the generated traffic
+MIX = {"predict": 0.5, "historical_summary": 0.2, "registration": 0.2, "quote": 0.1}
+
+
+def build_requests(app, n: int, seed: int = 0) -> list:
+    """n (endpoint, method, path, body) tuples drawn from MIX over real vehicles and plates."""
+    state = app.state
+    rng = np.random.default_rng(seed)
+    names = [name for name, df in state.historical_sets.items() if not df.empty and name in state.models]
+    vehicles = {name: sample_vehicles(state.historical_sets[name], 64, seed) for name in names}
+    plates = list(state.rego_index.keys[rng.integers(0, len(state.rego_index), 256)]) if len(state.rego_index) else []
+    mix = {k: v for k, v in MIX.items() if k != "registration" or plates}
+    kinds = rng.choice(list(mix), n, p=np.array(list(mix.values())) / sum(mix.values()))
+
+    requests = []
+    for kind in kinds:
+        name = names[rng.integers(len(names))]
+        features = vehicles[name][rng.integers(64)].model_dump()
+        if kind == "predict":
+            requests.append((kind, "POST", "/predict", {"model_name": name, "features": features}))
+        elif kind == "historical_summary":
+            body = {"model_name": name, "features": features, "prediction": 250.0,
+                    "months": features["Months"], "distance": features["Distance"]}
+            requests.append((kind, "POST", "/historical/summary", body))
+        elif kind == "registration":
+            plate = plates[rng.integers(len(plates))]
+            requests.append((kind, "GET", f"/registration/lookup?registration={plate}", None))
+        else:
+            requests.append((kind, "POST", "/quote", {"model_name": name, "features": features, "plots": []}))
+    return requests
+
+
+def summarise(latencies: dict, statuses: dict, elapsed: float) -> dict:
+    endpoints = {}
+    for kind, samples in latencies.items():
+        ms = np.asarray(samples) * 1000
+        endpoints[kind] = {
+            "requests": len(ms),
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p95_ms": float(np.percentile(ms, 95)),
+            "p99_ms": float(np.percentile(ms, 99)),
+            "statuses": statuses[kind],
+        }
+    total = sum(len(samples) for samples in latencies.values())
+    return {"requests": total, "seconds": elapsed, "throughput_rps": total / elapsed, "endpoints": endpoints}
+
+
+async def run_load(app, requests: list, concurrency: int = 32) -> dict:
+    """Sends requests from concurrency workers; expects app's lifespan to be running."""
+    latencies = {kind: [] for kind, *_ in requests}
+    statuses = {kind: {} for kind in latencies}
+    queue = iter(requests)
+
+    async def worker(client):
+        for kind, method, path, body in queue:
+            start = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies[kind].append(time.perf_counter() - start)
+            code = str(response.status_code)
+            statuses[kind][code] = statuses[kind].get(code, 0) + 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # One untimed pass over each endpoint so first-call setup isn't in the tail
+        for kind in latencies:
+            _, method, path, body = next(r for r in requests if r[0] == kind)
+            await client.request(method, path, json=body)
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return summarise(latencies, statuses, elapsed)
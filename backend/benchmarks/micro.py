@@ -0,0 +1,106 @@
+"""Per-function timings against a loaded app (see suite.py)."""
+import time
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+
+from schemas.requests import CarFeatures, PredictRequest
+from services.prediction import run_prediction
+from services.registration import lookup_registration
+from utils.historical_summary import filter_df_by_features
+from utils.plotting import get_all_price_plots
+
+
+def timed(fn, repeat: int, warmup: int = 1) -> dict:
+    """Calls fn(i) repeat times; latency stats in milliseconds."""
+    for i in range(warmup):
+        fn(i)
+    samples = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(i)
+        samples[i] = time.perf_counter() - start
+    samples *= 1000
+    return {
+        "runs": repeat,
+        "mean_ms": float(samples.mean()),
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p95_ms": float(np.percentile(samples, 95)),
+        "min_ms": float(samples.min()),
+    }
+
+
+def sample_vehicles(df: pd.DataFrame, n: int, seed: int = 0) -> list:
+    """n CarFeatures drawn from df's rows, so filters and lookups hit real combinations."""
+    rows = df.sample(n, replace=len(df) < n, random_state=seed)
+    rows = rows.astype(object).where(rows.notna(), None)
+    fields = [f for f in CarFeatures.model_fields if f != "AdjustedPrice"]
+    vehicles = []
+    for record in rows.to_dict("records"):
+        values = {f: record.get(f) for f in fields}
+        if values.get("Year") is not None:
+            values["Year"] = int(values["Year"])
+        vehicles.append(CarFeatures(**values))
+    return vehicles
+
+
+def _only(features: CarFeatures, keys) -> CarFeatures:
+    return CarFeatures(**{k: (v if k in keys else None) for k, v in features.model_dump().items()})
+
+
+def _lookup_miss(app, registration):
+    try:
+        lookup_registration(app, registration)
+    except HTTPException:
+        pass
+
+
+def run_micro(app, repeat: int = 200, seed: int = 0) -> dict:
+    state = app.state
+    results = {}
+    plot_repeat = max(3, repeat // 20)
+
+    for name, df in state.historical_sets.items():
+        if df.empty or name not in state.models:
+            continue
+        index = state.historical_index.get(name)
+        vehicles = sample_vehicles(df, 64, seed)
+        make_model = [_only(v, {"TaskName", "Make", "Model"}) for v in vehicles]
+
+        def pick(items):
+            return lambda i: items[i % len(items)]
+
+        for label, items in (("make_model", make_model), ("all_features", vehicles)):
+            choose = pick(items)
+            results[f"filter_df_by_features/{name}/{label}/indexed"] = timed(
+                lambda i: filter_df_by_features(df, choose(i), required_keys=["Make", "Model"], index=index), repeat)
+            results[f"filter_df_by_features/{name}/{label}/scan"] = timed(
+                lambda i: filter_df_by_features(df, choose(i), required_keys=["Make", "Model"]), repeat)
+
+        requests = [PredictRequest(model_name=name, features=v) for v in vehicles]
+        # Model cost without the prediction cache, then the same requests answered from it
+        cache, state.prediction_cache = getattr(state, "prediction_cache", None), None
+        try:
+            results[f"run_prediction/{name}"] = timed(lambda i: run_prediction(app, requests[i % len(requests)]), repeat)
+            results[f"run_prediction/{name}/explain_values"] = timed(
+                lambda i: run_prediction(app, requests[i % len(requests)], explain="values"), max(10, repeat // 5))
+        finally:
+            state.prediction_cache = cache
+        if cache is not None:
+            for request in requests:
+                run_prediction(app, request)
+            results[f"run_prediction/{name}/cached"] = timed(lambda i: run_prediction(app, requests[i % len(requests)]), repeat)
+
+        filtered = filter_df_by_features(df, make_model[0], required_keys=["Make", "Model"], index=index)
+        months = vehicles[0].Months
+        distance = vehicles[0].Distance
+        results[f"get_all_price_plots/{name}/{len(filtered)}_rows"] = timed(
+            lambda i: get_all_price_plots(filtered, 250.0, months, distance), plot_repeat)
+
+    index = state.rego_index
+    if len(index):
+        keys = list(index.keys[np.random.default_rng(seed).integers(0, len(index), 256)])
+        results["lookup_registration/hit"] = timed(lambda i: lookup_registration(app, keys[i % len(keys)]), repeat * 5)
+        results["lookup_registration/miss"] = timed(lambda i: _lookup_miss(app, f"ZZ{i:05d}"), repeat * 5)
+    return results
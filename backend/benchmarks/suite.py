@@ -0,0 +1,148 @@
+"""
+End-to-end benchmark suite on synthetic data: per-function timings and a
+concurrent HTTP load run, written as JSON for comparison between commits.
+
+    cd backend
+    python -m benchmarks.suite --rows 1M --out bench-1M.json
+    python -m benchmarks.suite --rows 1M --out new.json --baseline bench-1M.json --fail-on-regression
+
+Data and models are generated into --workspace (default
+.bench/<rows>/) on first use and reused while rows / seed match. The app
+is loaded from there by pointing DATA_DIR / MODELS_DIR at it, so the real
+data in data/ and models_files/ is never touched.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+SIZES = {"10k": 10_000, "1M": 1_000_000, "10M": 10_000_000}
+
+# Relative slowdown above which a metric is reported as a regression
+DEFAULT_THRESHOLD = 0.15
+
+
+def parse_rows(value: str) -> int:
+    return SIZES[value] if value in SIZES else int(value)
+
+
+def git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def comparable_metrics(results: dict) -> dict:
+    """Flattens a results file to {metric: value}, all oriented so that higher is slower."""
+    metrics = {f"micro/{name}/p50_ms": stats["p50_ms"] for name, stats in results.get("micro", {}).items()}
+    load = results.get("load")
+    if load:
+        for kind, stats in load["endpoints"].items():
+            metrics[f"load/{kind}/p95_ms"] = stats["p95_ms"]
+        metrics["load/seconds_per_1k_requests"] = 1000 / load["throughput_rps"]
+    return metrics
+
+
+def compare(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> list:
+    """Metrics present in both runs that got more than threshold slower, worst first."""
+    before, after = comparable_metrics(baseline), comparable_metrics(current)
+    regressions = []
+    for name in before.keys() & after.keys():
+        if before[name] > 0 and after[name] > before[name] * (1 + threshold):
+            regressions.append({
+                "metric": name, "baseline": before[name], "current": after[name],
+                "change": after[name] / before[name] - 1,
+            })
+    return sorted(regressions, key=lambda r: r["change"], reverse=True)
+
+
+async def _run(args, results):
+    # Imported only after DATA_DIR / MODELS_DIR are set, since config reads them at import
+    from server import create_app
+    from benchmarks.micro import run_micro
+    from benchmarks.load import build_requests, run_load
+
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        if not args.skip_micro:
+            results["micro"] = run_micro(app, repeat=args.repeat, seed=args.seed)
+        if not args.skip_load:
+            requests = build_requests(app, args.requests, seed=args.seed)
+            results["load"] = await run_load(app, requests, concurrency=args.concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="10k", help="rows per dataset: 10k, 1M, 10M or a number")
+    parser.add_argument("--out", type=Path, help="write results JSON here")
+    parser.add_argument("--workspace", type=Path, help="where synthetic data and models live (default .bench/<rows>)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--iterations", type=int, default=200, help="boosting iterations of the synthetic models")
+    parser.add_argument("--repeat", type=int, default=200, help="calls per micro-benchmark")
+    parser.add_argument("--requests", type=int, default=2000, help="HTTP requests in the load run")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--skip-load", action="store_true")
+    parser.add_argument("--baseline", type=Path, help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 if anything regressed")
+    args = parser.parse_args()
+
+    rows = parse_rows(args.rows)
+    workspace = (args.workspace or Path(".bench") / args.rows).resolve()
+    os.environ["DATA_DIR"] = str(workspace / "data")
+    os.environ["MODELS_DIR"] = str(workspace / "models")
+
+    from benchmarks.synthetic import prepare
+
+    start = time.perf_counter()
+    dataset = prepare(workspace, rows, seed=args.seed, iterations=args.iterations)
+    print(f"Synthetic data ready in {time.perf_counter() - start:.1f}s ({workspace})")
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "dataset": dataset,
+            "repeat": args.repeat,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+    }
+    asyncio.run(_run(args, results))
+
+    for name, stats in results.get("micro", {}).items():
+        print(f"{name:<60} p50 {stats['p50_ms']:9.3f} ms   p95 {stats['p95_ms']:9.3f} ms")
+    if "load" in results:
+        load = results["load"]
+        print(f"load: {load['requests']} requests, {load['throughput_rps']:.0f} req/s")
+        for kind, stats in load["endpoints"].items():
+            print(f"  {kind:<20} p50 {stats['p50_ms']:8.2f} ms   p95 {stats['p95_ms']:8.2f} ms   "
+                  f"p99 {stats['p99_ms']:8.2f} ms   {stats['statuses']}")
+
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2))
+
+    if args.baseline:
+        regressions = compare(json.loads(args.baseline.read_text()), results, args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['metric']}: {r['baseline']:.3f} -> {r['current']:.3f} (+{r['change']:.0%})")
+        if not regressions:
+            print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Synthetic stand-ins for the preprocessed CSVs, the rego table and the four
+models, for benchmarking on a checkout without the real data.
+
+Rows are drawn from a fixed catalogue of vehicle variants with skewed
+(Zipf-like) popularity, so partitions, facets and filters see the kind of
+repetition the real booking data has. Written to DATA_PATHS / MODEL_PATHS,
+i.e. wherever DATA_DIR / MODELS_DIR point.
+"""
+import json
+import string
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from catboost import CatBoostRegressor
+
+from config import MODEL_PATHS, DATA_PATHS, MODEL_FEATURES
+
+MANIFEST = "synthetic.json"
+GENERATOR_VERSION = 1
+
+CATEGORICALS = ["TaskName", "Make", "Model", "FuelType", "Transmission", "DriveType"]
+HISTORICAL_COLUMNS = [
+    "BTicketID", "TaskName", "Make", "Model", "Year", "FuelType", "EngineSize",
+    "Transmission", "DriveType", "AdjustedPrice", "Distance", "Months",
+]
+
+MAKES = [
+    "TOYOTA", "MAZDA", "HYUNDAI", "FORD", "HOLDEN", "KIA", "MITSUBISHI", "NISSAN", "VOLKSWAGEN",
+    "SUBARU", "HONDA", "ISUZU", "BMW", "MERCEDES-BENZ", "AUDI", "SUZUKI", "JEEP", "LAND ROVER",
+    "VOLVO", "LEXUS", "RENAULT", "PEUGEOT", "SKODA", "MG", "GWM", "TESLA", "FIAT", "MINI",
+]
+FUEL_TYPES = ["Petrol", "Diesel", "Hybrid", "Electric", "LPG"]
+TRANSMISSIONS = ["Automatic", "Manual", "CVT", "DCT"]
+DRIVE_TYPES = ["FWD", "RWD", "AWD", "4WD"]
+
+SERVICE_TASKS = {
+    "Logbook": ["Logbook"],
+    "Capped": ["Capped Price Service"],
+    "Prescribed": ["Prescribed Service", "Basic Service", "Comprehensive Service"],
+}
+REPAIR_TASKS = [f"Repair task {i:03d}" for i in range(200)]
+SERVICE_DISTANCES = np.arange(10000, 310000, 10000, dtype=float)
+SERVICE_MONTHS = np.array([6, 12, 18, 24, 36, 48, 60, 72], dtype=float)
+
+# Rows per to_csv call when writing large sets
+CHUNK_ROWS = 500_000
+
+
+def zipf_weights(n: int, s: float = 1.1) -> np.ndarray:
+    weights = 1.0 / np.arange(1, n + 1) ** s
+    return weights / weights.sum()
+
+
+def vehicle_catalogue(variants: int = 6000, seed: int = 0) -> pd.DataFrame:
+    """Distinct (Make, Model, Year, FuelType, EngineSize, Transmission, DriveType) variants."""
+    rng = np.random.default_rng(seed)
+    make = rng.choice(len(MAKES), variants, p=zipf_weights(len(MAKES), 0.9))
+    model_no = rng.choice(30, variants, p=zipf_weights(30))
+    return pd.DataFrame({
+        "Make": np.asarray(MAKES, dtype=object)[make],
+        "Model": [f"{MAKES[m]} MODEL{n:02d}" for m, n in zip(make, model_no)],
+        "Year": rng.integers(1998, 2026, variants),
+        "FuelType": rng.choice(FUEL_TYPES, variants, p=[0.62, 0.25, 0.08, 0.03, 0.02]),
+        "EngineSize": rng.choice(np.round(np.arange(1.0, 6.1, 0.1), 1), variants),
+        "Transmission": rng.choice(TRANSMISSIONS, variants, p=[0.7, 0.15, 0.1, 0.05]),
+        "DriveType": rng.choice(DRIVE_TYPES, variants, p=[0.55, 0.15, 0.2, 0.1]),
+    })
+
+
+def historical_chunk(name: str, catalogue: pd.DataFrame, rows: int, rng, first_id: int = 0) -> pd.DataFrame:
+    """rows bookings for the dataset name, shaped like preprocessed_<name>_data.csv."""
+    vehicles = catalogue.iloc[rng.choice(len(catalogue), rows, p=zipf_weights(len(catalogue), 0.8))].reset_index(drop=True)
+    df = pd.DataFrame({"BTicketID": np.arange(first_id, first_id + rows)})
+    tasks = REPAIR_TASKS if name == "Repair" else SERVICE_TASKS[name]
+    df["TaskName"] = rng.choice(tasks, rows, p=zipf_weights(len(tasks)))
+    for col in catalogue.columns:
+        df[col] = vehicles[col].to_numpy()
+
+    df["Distance"] = np.nan if name == "Repair" else rng.choice(SERVICE_DISTANCES, rows)
+    df["Months"] = rng.choice(SERVICE_MONTHS, rows) if name == "Logbook" else np.nan
+
+    # Price grows with engine size, age and service interval, with per-make and per-task levels
+    make_level = pd.Series(rng.uniform(0.8, 1.6, len(MAKES)), index=MAKES)
+    task_level = 1 + (df["TaskName"].str.len() % 7) / 10
+    age = (2025 - df["Year"]).clip(lower=0)
+    price = (
+        120 * make_level.reindex(df["Make"]).to_numpy() * task_level
+        + 35 * df["EngineSize"] + 6 * age
+        + np.nan_to_num(df["Distance"].to_numpy()) / 2500
+    )
+    df["AdjustedPrice"] = np.round(price * rng.lognormal(0, 0.15, rows), 2)
+
+    # A sprinkle of unknowns, as in the real exports
+    for col in ["FuelType", "Transmission", "DriveType"]:
+        df.loc[rng.random(rows) < 0.02, col] = None
+    return df[HISTORICAL_COLUMNS]
+
+
+def rego_chunk(catalogue: pd.DataFrame, rows: int, rng, first_id: int = 0) -> pd.DataFrame:
+    """rows registrations; plates are unique within a generated table."""
+    vehicles = catalogue.iloc[rng.integers(0, len(catalogue), rows)].reset_index(drop=True)
+    ids = np.arange(first_id, first_id + rows)
+    alphabet = np.array(list(string.ascii_uppercase + string.digits))
+    # Base-36 of the row id, padded to 7 characters
+    digits = np.stack([(ids // 36 ** k) % 36 for k in range(6, -1, -1)], axis=1)
+    plates = ["".join(chars) for chars in alphabet[digits]]
+    df = vehicles.copy()
+    df.insert(0, "Registration", plates)
+    return df
+
+
+def write_csv(path: Path, chunks):
+    tmp = path.with_name(path.name + ".tmp")
+    for i, chunk in enumerate(chunks):
+        chunk.to_csv(tmp, mode="w" if i == 0 else "a", header=i == 0, index=False)
+    tmp.replace(path)
+
+
+def _chunks(make_chunk, rows: int):
+    start = 0
+    while start < rows:
+        n = min(CHUNK_ROWS, rows - start)
+        yield make_chunk(n, start)
+        start += n
+
+
+def generate_data(rows: int, seed: int = 0):
+    """Writes the four historical CSVs and the rego table, rows rows each."""
+    catalogue = vehicle_catalogue(seed=seed)
+    for i, name in enumerate(["Capped", "Logbook", "Prescribed", "Repair"]):
+        rng = np.random.default_rng(seed + 1 + i)
+        path = Path(DATA_PATHS[name])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_csv(path, _chunks(lambda n, start, name=name, rng=rng: historical_chunk(name, catalogue, n, rng, start), rows))
+    rng = np.random.default_rng(seed + 10)
+    write_csv(Path(DATA_PATHS["Rego"]), _chunks(lambda n, start: rego_chunk(catalogue, n, rng, start), rows))
+
+
+def training_set(name: str, max_rows: int):
+    """Up to max_rows rows of name's CSV as the training notebooks prepare them."""
+    df = pd.read_csv(DATA_PATHS[name], nrows=max_rows)
+    features = MODEL_FEATURES[name]
+    X = df[features].copy()
+    for col in features:
+        if col in CATEGORICALS:
+            X[col] = X[col].astype(object).where(X[col].notna(), "missing").astype(str)
+    return X, df["AdjustedPrice"]
+
+
+def train_models(max_rows: int = 200_000, iterations: int = 200, depth: int = 6, seed: int = 0):
+    """Small CatBoost models with the real feature layout, saved to MODEL_PATHS."""
+    for name, path in MODEL_PATHS.items():
+        X, y = training_set(name, max_rows)
+        cat_features = [c for c in X.columns if c in CATEGORICALS]
+        model = CatBoostRegressor(
+            iterations=iterations, depth=depth, random_seed=seed, verbose=0,
+            cat_features=cat_features, allow_writing_files=False,
+        )
+        model.fit(X, y)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        model.save_model(str(path))
+
+
+def prepare(workspace: Path, rows: int, seed: int = 0, iterations: int = 200) -> dict:
+    """
+    Generates data and models unless workspace already holds a matching set
+    (same rows / seed / generator), so repeated runs at 10M rows are cheap.
+    """
+    manifest_path = Path(workspace) / MANIFEST
+    wanted = {"version": GENERATOR_VERSION, "rows": rows, "seed": seed, "iterations": iterations}
+    if manifest_path.exists() and json.loads(manifest_path.read_text()) == wanted:
+        return wanted
+    generate_data(rows, seed)
+    train_models(iterations=iterations, seed=seed)
+    manifest_path.write_text(json.dumps(wanted))
+    return wanted
@@ -3,19 +3,23 @@ import os
 
 BASE_DIR = Path(__file__).parent
 
+# Where the .cbm files and CSVs live; overridable to serve another set (e.g. benchmarks/)
+MODELS_DIR = Path(os.getenv("MODELS_DIR", BASE_DIR / "models_files"))
+DATA_DIR = Path(os.getenv("DATA_DIR", BASE_DIR / "data"))
+
 MODEL_PATHS = {
-    "Capped": BASE_DIR / "models_files" / "capped_model.cbm",
-    "Logbook": BASE_DIR / "models_files" / "logbook_model.cbm",
-    "Prescribed": BASE_DIR / "models_files" / "prescribed_model.cbm",
-    "Repair": BASE_DIR / "models_files" / "repair_model.cbm",
+    "Capped": MODELS_DIR / "capped_model.cbm",
+    "Logbook": MODELS_DIR / "logbook_model.cbm",
+    "Prescribed": MODELS_DIR / "prescribed_model.cbm",
+    "Repair": MODELS_DIR / "repair_model.cbm",
 }
 
 DATA_PATHS = {
-    "Capped": BASE_DIR / "data" / "preprocessed_capped_data.csv",
-    "Logbook": BASE_DIR / "data" / "preprocessed_log_data.csv",
-    "Prescribed": BASE_DIR / "data" / "preprocessed_prescribed_data.csv",
-    "Repair": BASE_DIR / "data" / "preprocessed_repair_data.csv",
-    "Rego": BASE_DIR / "data" / "rego_data.csv",
+    "Capped": DATA_DIR / "preprocessed_capped_data.csv",
+    "Logbook": DATA_DIR / "preprocessed_log_data.csv",
+    "Prescribed": DATA_DIR / "preprocessed_prescribed_data.csv",
+    "Repair": DATA_DIR / "preprocessed_repair_data.csv",
+    "Rego": DATA_DIR / "rego_data.csv",
 }
 
 # Feature order for each model
@@ -34,3 +38,90 @@ CORS_ORIGINS = [
 ]
 
 ALLOW_ALL_CORS_DEV = os.getenv("ALLOW_ALL_CORS_DEV", "true").lower() == "true"
+
+# Upper bound on rows accepted by POST /predict/batch
+PREDICT_BATCH_MAX_ROWS = int(os.getenv("PREDICT_BATCH_MAX_ROWS", "5000"))
+
+# Memoized single-row predictions and SHAP vectors, keyed on (model, model version,
+# preprocessed features). LRU within both an entry count and a memory budget (MB);
+# emptied whenever models are reloaded
+PREDICTION_CACHE = os.getenv("PREDICTION_CACHE", "true").lower() == "true"
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "100000"))
+PREDICTION_CACHE_MB = float(os.getenv("PREDICTION_CACHE_MB", "32"))
+SHAP_CACHE_MB = float(os.getenv("SHAP_CACHE_MB", "64"))
+
+# Historical summary / plot caches (entries, seconds)
+HISTORICAL_CACHE_SIZE = int(os.getenv("HISTORICAL_CACHE_SIZE", "1024"))
+HISTORICAL_PLOT_CACHE_SIZE = int(os.getenv("HISTORICAL_PLOT_CACHE_SIZE", "256"))
+HISTORICAL_CACHE_TTL = float(os.getenv("HISTORICAL_CACHE_TTL", "3600"))
+
+# Per-dataset cache of /historical/prefilter dropdown options (entries)
+FACET_CACHE_SIZE = int(os.getenv("FACET_CACHE_SIZE", "4096"))
+
+# Plot rendering process pool (0 workers renders inline in the request)
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "2"))
+RENDER_QUEUE_DEPTH = int(os.getenv("RENDER_QUEUE_DEPTH", "32"))
+RENDER_TIMEOUT = float(os.getenv("RENDER_TIMEOUT", "30"))
+
+# Upper bound on registrations accepted by POST /registration/lookup/batch
+REGISTRATION_BATCH_MAX = int(os.getenv("REGISTRATION_BATCH_MAX", "10000"))
+
+# Historical CSVs are loaded through a compact .npy column cache written next to
+# each file; set COLUMNAR_CACHE_HASH to also compare a sha256 of the CSV (slower start)
+COLUMNAR_CACHE = os.getenv("COLUMNAR_CACHE", "true").lower() == "true"
+COLUMNAR_CACHE_HASH = os.getenv("COLUMNAR_CACHE_HASH", "false").lower() == "true"
+
+# Set by launcher.py: workers attach to state it prepared instead of loading their own copy
+SHARED_STATE = os.getenv("SHARED_STATE", "false").lower() == "true"
+
+# Dedicated thread pools for the CPU-heavy request stages; once QUEUE_DEPTH jobs
+# are queued or running a stage answers 503 instead of queueing more
+PREDICT_WORKERS = int(os.getenv("PREDICT_WORKERS", "4"))
+PREDICT_QUEUE_DEPTH = int(os.getenv("PREDICT_QUEUE_DEPTH", "64"))
+FILTER_WORKERS = int(os.getenv("FILTER_WORKERS", "4"))
+FILTER_QUEUE_DEPTH = int(os.getenv("FILTER_QUEUE_DEPTH", "64"))
+
+# Opt-in micro-batching of concurrent single-row /predict calls (without SHAP): rows for the
+# same model arriving within the window, up to MAX rows, share one model.predict call
+PREDICT_MICROBATCH = os.getenv("PREDICT_MICROBATCH", "false").lower() == "true"
+PREDICT_MICROBATCH_WINDOW_MS = float(os.getenv("PREDICT_MICROBATCH_WINDOW_MS", "2"))
+PREDICT_MICROBATCH_MAX = int(os.getenv("PREDICT_MICROBATCH_MAX", "64"))
+
+# How each model is served: "native" (CatBoost) or "compiled" (vectorised evaluator
+# generated from CatBoost's Python export, see models/evaluator.py).
+# MODEL_BACKEND_<NAME> overrides the default for one model, e.g. MODEL_BACKEND_REPAIR=native
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "native")
+MODEL_BACKENDS = {name: os.getenv(f"MODEL_BACKEND_{name.upper()}", MODEL_BACKEND) for name in MODEL_PATHS}
+
+# Hot reload: POST /admin/reload, plus polling MODEL_PATHS / DATA_PATHS every
+# RELOAD_POLL_SECONDS when > 0. Admin calls must send ADMIN_TOKEN as X-Admin-Token;
+# while it is unset every /admin route answers 403
+RELOAD_POLL_SECONDS = float(os.getenv("RELOAD_POLL_SECONDS", "0"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Logging: LOG_LEVEL for the app's loggers; LOG_FORMAT "text" or "json" (one object per line)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+
+# Per-stage request timings are always collected for /metrics; SERVER_TIMING also
+# returns them to the client in a Server-Timing header
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() == "true"
+
+# Per-request profiling (X-Profile: 1 header or ?profile=1): "off" installs nothing,
+# "admin" honours the flag only with a valid X-Admin-Token, "debug" from any client.
+# Profiles (cProfile / pstats) go to PROFILE_DIR; the newest PROFILE_KEEP are kept
+PROFILING = os.getenv("PROFILING", "off").lower()
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", BASE_DIR / "profiles"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+
+# Before reporting ready, price one synthetic vehicle per model so the first requests
+# don't pay for CatBoost's setup. WARMUP_RENDER: one throwaway plot per render worker,
+# "background" (after ready), "wait" (before ready) or "off"
+WARMUP = os.getenv("WARMUP", "true").lower() == "true"
+WARMUP_RENDER = os.getenv("WARMUP_RENDER", "background").lower()
+
+# Historical charts over more than PLOT_AGGREGATE_ROWS rows are drawn from pre-binned
+# aggregates (density grid + percentile bands, PLOT_DENSITY_BINS buckets per axis),
+# computed once per filter result and cached with its summary
+PLOT_AGGREGATE_ROWS = int(os.getenv("PLOT_AGGREGATE_ROWS", "5000"))
+PLOT_DENSITY_BINS = int(os.getenv("PLOT_DENSITY_BINS", "50"))
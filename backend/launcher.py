@@ -0,0 +1,41 @@
+"""
+Production launcher for multi-worker deployments.
+
+Prepares the columnar historical caches and the registration index once,
+then starts uvicorn workers that memory-map that state read-only instead of
+each loading its own copy:
+
+    python launcher.py --workers 8 --host 0.0.0.0 --port 8000
+"""
+import argparse
+import logging
+import os
+import time
+
+import uvicorn
+
+from models.loader import prepare_shared_state
+from utils.log import configure_logging
+
+logger = logging.getLogger("launcher")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with shared, memory-mapped state")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    configure_logging()
+    start = time.perf_counter()
+    prepare_shared_state()
+    logger.info("Shared state prepared", extra={"seconds": round(time.perf_counter() - start, 2)})
+
+    # Inherited by every worker process
+    os.environ["SHARED_STATE"] = "true"
+    uvicorn.run("server:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from catboost import Pool
+
+from models.evaluator import CompiledEvaluator, export_path_for, export_python, load_export_module
+
+BACKEND_KINDS = ("native", "compiled")
+
+# Rows from the training data checked against CatBoost whenever an export is (re)generated
+PARITY_SAMPLE_ROWS = 512
+
+# Batches larger than this are predicted by CatBoost even on the compiled backend
+COMPILED_MAX_ROWS = 32
+
+
+class NativeBackend:
+    """
+    CatBoost itself. The categorical positions are read once, so a request
+    only builds the Pool for its own rows instead of CatBoost re-deriving
+    the model's schema on every predict call.
+    """
+
+    kind = "native"
+
+    def __init__(self, model):
+        self.model = model
+        self.cat_features = list(model.get_cat_feature_indices())
+
+    def predict(self, rows) -> np.ndarray:
+        return self.model.predict(Pool(rows, cat_features=self.cat_features))
+
+    def get_feature_importance(self, *args, **kwargs):
+        return self.model.get_feature_importance(*args, **kwargs)
+
+
+class CompiledBackend(NativeBackend):
+    """
+    Predictions from CompiledEvaluator: no Pool and no catboost call per
+    request. Large batches still go to CatBoost, whose C++ loop is faster
+    once per-call overhead stops mattering (see benchmarks/bench_backends.py);
+    SHAP values also come from the CatBoost model it was compiled from.
+    """
+
+    kind = "compiled"
+
+    def __init__(self, model, evaluator: CompiledEvaluator, max_rows: int = COMPILED_MAX_ROWS):
+        super().__init__(model)
+        self.evaluator = evaluator
+        self.max_rows = max_rows
+
+    def predict(self, rows) -> np.ndarray:
+        if len(rows) > self.max_rows:
+            return super().predict(rows)
+        return self.evaluator.predict(rows)
+
+
+def training_frame(data_path, feature_names, cat_features) -> pd.DataFrame:
+    """Training rows in model feature order, categoricals cleaned the way preprocess() cleans a request."""
+    df = pd.read_csv(data_path, usecols=lambda c: c in feature_names)
+    missing = [f for f in feature_names if f not in df.columns]
+    if missing:
+        raise ValueError(f"{data_path} lacks model features: {missing}")
+    df = df[feature_names]
+    for position in cat_features:
+        col = feature_names[position]
+        df[col] = df[col].astype(object).where(df[col].notna(), "missing").astype(str)
+    return df
+
+
+def frame_rows(df: pd.DataFrame) -> list:
+    """DataFrame -> list of rows as preprocess() produces them (missing numbers as None)."""
+    return df.astype(object).where(df.notna(), None).values.tolist()
+
+
+def compile_model(model, model_path, data_path, feature_names) -> CompiledBackend:
+    """
+    Compiled backend for model, reusing the Python export next to model_path
+    while it is newer than the .cbm. Exporting needs the training categories,
+    read from data_path; a fresh export must match CatBoost on a sample of
+    those rows before it is used.
+    """
+    cat_features = list(model.get_cat_feature_indices())
+    path = export_path_for(model_path)
+    stale = not path.exists() or path.stat().st_mtime < Path(model_path).stat().st_mtime
+
+    df = None
+    if stale:
+        df = training_frame(data_path, feature_names, cat_features)
+        export_python(model, Pool(df, cat_features=cat_features), path)
+
+    backend = CompiledBackend(model, CompiledEvaluator(load_export_module(path), cat_features, len(feature_names)))
+
+    if df is not None:
+        report = check_parity(NativeBackend(model), backend.evaluator, frame_rows(df.head(PARITY_SAMPLE_ROWS)))
+        if not report["ok"]:
+            os.remove(path)
+            raise RuntimeError(f"Compiled {Path(model_path).name} disagrees with CatBoost: {report}")
+    return backend
+
+
+def create_backend(kind: str, model, model_path=None, data_path=None, feature_names=None):
+    if kind == "native":
+        return NativeBackend(model)
+    if kind == "compiled":
+        return compile_model(model, model_path, data_path, feature_names)
+    raise ValueError(f"Unknown model backend {kind!r}; expected one of {BACKEND_KINDS}")
+
+
+def check_parity(reference, candidate, rows, rtol: float = 1e-6, atol: float = 1e-6) -> dict:
+    """
+    Compares the predictions of two backends (or evaluators) on rows; ok when
+    every row is within tolerance. Pass a compiled backend's evaluator to
+    keep large row sets from being routed to CatBoost.
+    """
+    expected = np.asarray(reference.predict(rows), dtype=np.float64)
+    actual = np.asarray(candidate.predict(rows), dtype=np.float64)
+    diff = np.abs(expected - actual)
+    rel = diff / np.maximum(np.abs(expected), np.finfo(np.float64).tiny)
+    return {
+        "rows": len(rows),
+        "max_abs_diff": float(diff.max()) if len(diff) else 0.0,
+        "max_rel_diff": float(rel.max()) if len(rel) else 0.0,
+        "ok": bool(np.allclose(actual, expected, rtol=rtol, atol=atol)),
+    }
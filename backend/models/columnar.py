@@ -0,0 +1,147 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Bump when the on-disk layout or dtype rules change so stale caches are rebuilt
+CACHE_VERSION = 1
+
+HISTORICAL_CATEGORICALS = ["TaskName", "Make", "Model", "FuelType", "Transmission", "DriveType"]
+
+
+def cache_dir_for(csv_path) -> Path:
+    """Cache lives next to the CSV: data/foo.csv -> data/.foo.columnar/"""
+    csv_path = Path(csv_path)
+    return csv_path.parent / f".{csv_path.stem}.columnar"
+
+
+def csv_fingerprint(csv_path, with_hash: bool = False) -> dict:
+    stat = os.stat(csv_path)
+    fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if with_hash:
+        digest = hashlib.sha256()
+        with open(csv_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        fingerprint["sha256"] = digest.hexdigest()
+    return fingerprint
+
+
+def compact_frame(df: pd.DataFrame, categoricals=()) -> pd.DataFrame:
+    """
+    Applies the compact schema: listed (and any other text) columns become
+    category, integers shrink to the smallest integer type, and floats drop
+    to float32 only where that round-trips exactly, so filtering and price
+    statistics see the same values as before.
+    """
+    out = {}
+    for col in df.columns:
+        series = df[col]
+        if col in categoricals or not pd.api.types.is_numeric_dtype(series.dtype):
+            out[col] = series.astype("category")
+        elif pd.api.types.is_bool_dtype(series.dtype):
+            out[col] = series
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            out[col] = pd.to_numeric(series, downcast="integer")
+        elif pd.api.types.is_float_dtype(series.dtype):
+            values = series.to_numpy(dtype=np.float64)
+            small = values.astype(np.float32)
+            lossless = np.array_equal(small.astype(np.float64), values, equal_nan=True)
+            out[col] = pd.Series(small if lossless else values, index=series.index, name=col)
+        else:
+            out[col] = series
+    return pd.DataFrame(out, index=df.index)
+
+
+def write_cache(df: pd.DataFrame, cache_dir, fingerprint: dict):
+    """
+    Writes one .npy per column (codes + categories for categoricals) and a
+    manifest. Written to a temp dir and renamed so readers never see a
+    half-built cache.
+    """
+    cache_dir = Path(cache_dir)
+    tmp_dir = cache_dir.with_name(cache_dir.name + f".tmp{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    columns = []
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categories = series.cat.categories
+            np.save(tmp_dir / f"{i}.codes.npy", series.cat.codes.to_numpy())
+            if pd.api.types.is_numeric_dtype(categories.dtype):
+                categories = categories.to_numpy()
+            else:
+                categories = categories.to_numpy(dtype=str)
+            np.save(tmp_dir / f"{i}.categories.npy", categories)
+            columns.append({"name": col, "kind": "category"})
+        else:
+            np.save(tmp_dir / f"{i}.npy", series.to_numpy())
+            columns.append({"name": col, "kind": "array"})
+
+    manifest = {"version": CACHE_VERSION, "fingerprint": fingerprint, "rows": len(df), "columns": columns}
+    (tmp_dir / "manifest.json").write_text(json.dumps(manifest))
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp_dir, cache_dir)
+
+
+def read_manifest(cache_dir):
+    try:
+        return json.loads((Path(cache_dir) / "manifest.json").read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def read_cache(cache_dir, mmap: bool = True) -> pd.DataFrame:
+    """Rebuilds the frame from the cache; numeric columns and category codes stay memory-mapped."""
+    cache_dir = Path(cache_dir)
+    manifest = read_manifest(cache_dir)
+    mode = "r" if mmap else None
+
+    data = {}
+    for i, column in enumerate(manifest["columns"]):
+        if column["kind"] == "category":
+            codes = np.load(cache_dir / f"{i}.codes.npy", mmap_mode=mode)
+            categories = np.load(cache_dir / f"{i}.categories.npy", allow_pickle=False)
+            data[column["name"]] = pd.Series(
+                pd.Categorical.from_codes(codes, categories=pd.Index(categories), validate=False),
+                copy=False,
+            )
+        else:
+            data[column["name"]] = np.load(cache_dir / f"{i}.npy", mmap_mode=mode)
+    return pd.DataFrame(data, copy=False)
+
+
+def load_columnar(csv_path, categoricals=(), with_hash: bool = False, mmap: bool = True) -> pd.DataFrame:
+    """
+    Loads csv_path through the columnar cache: reuse it when the CSV
+    fingerprint (size + mtime, optionally sha256) matches, otherwise parse
+    the CSV with the compact schema and rewrite the cache. If the cache
+    can't be written the compact frame is still returned.
+    """
+    cache_dir = cache_dir_for(csv_path)
+    fingerprint = csv_fingerprint(csv_path, with_hash)
+
+    manifest = read_manifest(cache_dir)
+    if manifest and manifest.get("version") == CACHE_VERSION and manifest.get("fingerprint") == fingerprint:
+        return read_cache(cache_dir, mmap=mmap)
+
+    present = pd.read_csv(csv_path, nrows=0).columns
+    dtypes = {col: "category" for col in categoricals if col in present}
+    df = compact_frame(pd.read_csv(csv_path, dtype=dtypes), categoricals)
+
+    try:
+        write_cache(df, cache_dir, fingerprint)
+    except OSError as e:
+        logger.warning("Could not write columnar cache", extra={"csv_path": str(csv_path), "error": str(e)})
+        return df
+    return read_cache(cache_dir, mmap=mmap)
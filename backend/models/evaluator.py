@@ -0,0 +1,322 @@
+import importlib.util
+import os
+from pathlib import Path
+
+import numpy as np
+
+# Multiplier CatBoost uses to combine hashes of a CTR projection (see the exported calc_hash)
+_MAGIC_MULT = np.uint64(0x4906BA494954CB65)
+_UNKNOWN_CAT_HASH = 0x7FFFFFFF
+
+_TARGET_MEAN_CTRS = ("BinarizedTargetMeanValue", "FloatTargetMeanValue")
+_COUNTER_CTRS = ("Counter", "FeatureFreq")
+
+
+def export_path_for(model_path) -> Path:
+    """Generated evaluator lives next to the model: models_files/foo.cbm -> models_files/.foo.export.py"""
+    model_path = Path(model_path)
+    return model_path.parent / f".{model_path.stem}.export.py"
+
+
+def export_python(model, pool, path):
+    """
+    Writes CatBoost's standalone Python export of model. pool must cover the
+    categorical values seen in training; CatBoost needs it to emit the
+    value -> hash table. Written to a temp file and renamed into place.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + f".tmp{os.getpid()}")
+    model.save_model(str(tmp_path), format="python", pool=pool)
+    os.replace(tmp_path, path)
+
+
+def load_export_module(path):
+    spec = importlib.util.spec_from_file_location(f"catboost_export_{Path(path).stem.strip('.')}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class CompiledEvaluator:
+    """
+    Vectorised evaluator for an oblivious-tree CatBoost model, compiled from
+    the model tables in its Python export. Rows are binarised, CTRs looked
+    up and all trees applied with a few array operations per batch, so it
+    needs neither catboost nor a Pool at predict time.
+
+    Rows are lists in model feature order, as produced by preprocess();
+    cat_features are the positions of the categorical columns in that order.
+    """
+
+    def __init__(self, module, cat_features, feature_count):
+        m = module.catboost_model
+        self.dimension = m.dimension
+
+        # --- feature layout: the export numbers float and cat features separately ---
+        cat_positions = sorted(cat_features)
+        float_positions = [i for i in range(feature_count) if i not in set(cat_positions)]
+        self.feature_count = feature_count
+        self.cat_positions = cat_positions[:m.cat_feature_count]
+        self.float_borders = [
+            (float_positions[m.float_features_index[slot]], np.asarray(borders, dtype=np.float32))
+            for slot, borders in enumerate(m.float_feature_borders) if len(borders) > 0
+        ]
+        self.cat_hashes = {str(k): v for k, v in module.cat_features_hashes.items()}
+        self.one_hot = [
+            (list(m.cat_features_index).index(feature), np.asarray(values, dtype=np.int64))
+            for feature, values in zip(m.one_hot_cat_feature_index, m.one_hot_hash_values) if len(values) > 0
+        ]
+        self.binary_feature_count = m.binary_feature_count
+
+        # --- CTRs: all projections and lookups are evaluated as (rows x ctrs) arrays ---
+        self.ctr_count = 0
+        model_ctrs = getattr(m, "model_ctrs", None)
+        if model_ctrs is not None and model_ctrs.used_model_ctrs_count > 0:
+            self._compile_ctrs(model_ctrs, m.ctr_feature_borders)
+
+        # --- trees, padded to the deepest tree so all of them evaluate at once ---
+        depths = np.asarray(m.tree_depth, dtype=np.intp)
+        max_depth = int(depths.max()) if len(depths) else 0
+        tree_count = len(depths)
+        # Padding splits read an always-zero extra column against border 1, so they add 0 to the leaf index
+        split_feature = np.full((tree_count, max_depth), m.binary_feature_count, dtype=np.intp)
+        split_border = np.ones((tree_count, max_depth), dtype=np.uint8)
+        split_xor = np.zeros((tree_count, max_depth), dtype=np.uint8)
+        offset = 0
+        for t, depth in enumerate(depths):
+            split_feature[t, :depth] = m.tree_split_feature_index[offset:offset + depth]
+            split_border[t, :depth] = m.tree_split_border[offset:offset + depth]
+            split_xor[t, :depth] = m.tree_split_xor_mask[offset:offset + depth]
+            offset += depth
+        self.split_feature = split_feature
+        self.split_border = split_border
+        self.split_xor = split_xor
+        self.leaf_offsets = np.concatenate([[0], np.cumsum(1 << depths)[:-1]]).astype(np.intp)
+        self.leaf_values = np.asarray(m.leaf_values, dtype=np.float64).reshape(-1, self.dimension)
+        self.scale = float(m.scale)
+        self.biases = np.asarray(m.biases, dtype=np.float64)
+
+    def _binarize(self, rows):
+        n = len(rows)
+        columns = list(zip(*rows)) if n else [()] * self.feature_count
+        # CatBoost binarised features fit in a byte; the last column is the padding zero
+        binary = np.zeros((n, self.binary_feature_count + 1), dtype=np.uint8)
+
+        slot = 0
+        for position, borders in self.float_borders:
+            values = np.asarray(columns[position], dtype=np.float64).astype(np.float32)
+            # number of borders strictly below the value; NaN counts as below every border
+            binary[:, slot] = np.searchsorted(borders, values, side="left")
+            binary[np.isnan(values), slot] = 0
+            slot += 1
+
+        cat_hash = np.empty((n, len(self.cat_positions)), dtype=np.int64)
+        for j, position in enumerate(self.cat_positions):
+            cat_hash[:, j] = [self.cat_hashes.get(str(v), _UNKNOWN_CAT_HASH) for v in columns[position]]
+
+        for cat_slot, values in self.one_hot:
+            hashes = cat_hash[:, cat_slot]
+            for border_idx, value in enumerate(values):
+                binary[hashes == value, slot] = border_idx + 1
+            slot += 1
+
+        if self.ctr_count:
+            ctr_values = self._ctrs(binary, cat_hash)
+            binary[:, slot:slot + self.ctr_count] = (ctr_values[:, :, None] > self.ctr_borders).sum(axis=2, dtype=np.uint8)
+        return binary
+
+    def _compile_ctrs(self, model_ctrs, ctr_feature_borders):
+        # Hash inputs ("terms") shared between projections: a categorical hash or one binarised bit
+        term_ids, projections = {}, []
+        for compressed in model_ctrs.compressed_model_ctrs:
+            projection = compressed.projection
+            specs = [("cat", c) for c in projection.transposed_cat_feature_indexes]
+            specs += [("bin", b.bin_index, bool(b.check_value_equal), b.value) for b in projection.binarized_indexes]
+            projections.append([term_ids.setdefault(spec, len(term_ids)) for spec in specs])
+        terms = list(term_ids)
+
+        self.cat_terms = np.asarray([i for i, t in enumerate(terms) if t[0] == "cat"], dtype=np.intp)
+        self.cat_term_slots = np.asarray([t[1] for t in terms if t[0] == "cat"], dtype=np.intp)
+        bins = [(i, t) for i, t in enumerate(terms) if t[0] == "bin"]
+        self.bin_terms = np.asarray([i for i, _ in bins], dtype=np.intp)
+        self.bin_index = np.asarray([t[1] for _, t in bins], dtype=np.intp)
+        self.bin_equal = np.asarray([t[2] for _, t in bins], dtype=bool)
+        self.bin_value = np.asarray([t[3] for _, t in bins], dtype=np.int32)
+        self.term_count = len(terms)
+
+        width = max(len(p) for p in projections)
+        self.projection_terms = np.zeros((len(projections), width), dtype=np.intp)
+        self.projection_length = np.asarray([len(p) for p in projections], dtype=np.intp)
+        for i, p in enumerate(projections):
+            self.projection_terms[i, :len(p)] = p
+
+        # One hash table over every CTR table: key = hash mixed with the table's salt,
+        # confirmed against the stored (table, hash) so a mixed collision can't mis-resolve
+        table_numbers = {key: i for i, key in enumerate(model_ctrs.ctr_data.learn_ctrs)}
+        salts = np.arange(1, len(table_numbers) + 1, dtype=np.uint64)
+        hashes, tables, buckets = [], [], []
+        for key, table in model_ctrs.ctr_data.learn_ctrs.items():
+            items = list(table.index_hash_viewer.items())
+            hashes.extend(h for h, _ in items)
+            buckets.extend(b for _, b in items)
+            tables.extend([table_numbers[key]] * len(items))
+        self.lookup_hashes = np.asarray(hashes, dtype=np.uint64)
+        self.lookup_tables = np.asarray(tables, dtype=np.intp)
+        self.lookup_buckets = np.asarray(buckets, dtype=np.intp)
+        with np.errstate(over="ignore"):
+            self.lookup = _HashTable(_calc_hash(self.lookup_hashes, salts[self.lookup_tables]))
+        self.table_salts = salts
+
+        # Per CTR: (count, total) per bucket, shared between CTRs that only differ in priors
+        ctr_projection, ctr_table, ctr_offset = [], [], []
+        prior_num, prior_denom, shift, scale = [], [], [], []
+        counts, totals, offsets = [], [], {}
+        size = 0
+        for p, compressed in enumerate(model_ctrs.compressed_model_ctrs):
+            for ctr in compressed.model_ctrs:
+                table = model_ctrs.ctr_data.learn_ctrs[ctr.base_hash]
+                stats_key = (ctr.base_hash, ctr.base_ctr_type, ctr.target_border_idx)
+                if stats_key not in offsets:
+                    count, total = _bucket_stats(table, ctr)
+                    offsets[stats_key] = size
+                    counts.append(count)
+                    totals.append(total)
+                    size += len(count)
+                ctr_projection.append(p)
+                ctr_table.append(table_numbers[ctr.base_hash])
+                ctr_offset.append(offsets[stats_key])
+                prior_num.append(ctr.prior_num)
+                prior_denom.append(ctr.prior_denom)
+                shift.append(ctr.shift)
+                scale.append(ctr.scale)
+
+        self.ctr_count = len(ctr_projection)
+        self.ctr_projection = np.asarray(ctr_projection, dtype=np.intp)
+        self.ctr_table = np.asarray(ctr_table, dtype=np.intp)
+        self.ctr_offset = np.asarray(ctr_offset, dtype=np.intp)
+        self.ctr_prior_num = np.asarray(prior_num, dtype=np.float64)
+        self.ctr_prior_denom = np.asarray(prior_denom, dtype=np.float64)
+        self.ctr_shift = np.asarray(shift, dtype=np.float64)
+        self.ctr_scale = np.asarray(scale, dtype=np.float64)
+        self.bucket_counts = np.concatenate(counts) if counts else np.zeros(1)
+        self.bucket_totals = np.concatenate(totals) if totals else np.zeros(1)
+
+        border_width = max((len(b) for b in ctr_feature_borders), default=0)
+        self.ctr_borders = np.full((self.ctr_count, border_width), np.inf)
+        for i, borders in enumerate(ctr_feature_borders):
+            self.ctr_borders[i, :len(borders)] = borders
+
+    def _ctrs(self, binary, cat_hash):
+        n = len(binary)
+        terms = np.empty((n, self.term_count), dtype=np.uint64)
+        terms[:, self.cat_terms] = cat_hash[:, self.cat_term_slots].astype(np.uint64)
+        columns = binary[:, self.bin_index]
+        bits = np.where(self.bin_equal, columns == self.bin_value, columns >= self.bin_value)
+        terms[:, self.bin_terms] = bits.astype(np.uint64)
+
+        with np.errstate(over="ignore"):
+            hashes = np.zeros((n, len(self.projection_length)), dtype=np.uint64)
+            for step in range(self.projection_terms.shape[1]):
+                active = self.projection_length > step
+                hashes[:, active] = _calc_hash(hashes[:, active], terms[:, self.projection_terms[active, step]])
+
+            ctr_hashes = hashes[:, self.ctr_projection]
+            keys = _calc_hash(ctr_hashes, self.table_salts[self.ctr_table])
+
+        entry = self.lookup.find(keys)
+        pos = np.maximum(entry, 0)
+        found = (
+            (entry >= 0)
+            & (self.lookup_hashes[pos] == ctr_hashes)
+            & (self.lookup_tables[pos] == self.ctr_table)
+        )
+        index = self.ctr_offset + np.where(found, self.lookup_buckets[pos], 0)
+        count = np.where(found, self.bucket_counts[index], 0.0)
+        total = np.where(found, self.bucket_totals[index], 0.0)
+        return ((count + self.ctr_prior_num) / (total + self.ctr_prior_denom) + self.ctr_shift) * self.ctr_scale
+
+    def predict(self, rows) -> np.ndarray:
+        # Feature-major so each split level gathers whole contiguous rows
+        binary = np.ascontiguousarray(self._binarize(rows).T)
+        leaf = np.zeros((len(self.split_feature), binary.shape[1]), dtype=np.intp)
+        for depth in range(self.split_feature.shape[1]):
+            bit = (binary[self.split_feature[:, depth]] ^ self.split_xor[:, depth, None]) >= self.split_border[:, depth, None]
+            leaf |= bit.astype(np.intp) << depth
+        leaf += self.leaf_offsets[:, None]
+        raw = self.leaf_values[leaf].sum(axis=0)
+        result = self.scale * raw + self.biases
+        return result[:, 0] if self.dimension == 1 else result
+
+
+class _HashTable:
+    """
+    Open-addressing (linear probing) table from uint64 keys to their index
+    in the build array, probed for a whole array of keys at once. Unlike a
+    binary search over sorted keys, a lookup touches one or two slots.
+    """
+
+    def __init__(self, keys: np.ndarray):
+        bits = max(4, int(len(keys) * 4 - 1).bit_length())  # load factor <= 1/4
+        self.shift = np.uint64(64 - bits)
+        self.mask = (1 << bits) - 1
+        self.slot_keys = np.zeros(1 << bits, dtype=np.uint64)
+        self.slot_entry = np.full(1 << bits, -1, dtype=np.intp)
+
+        pending = np.arange(len(keys), dtype=np.intp)
+        slot = self._slots(keys)
+        while pending.size:
+            free = self.slot_entry[slot] < 0
+            # Several keys may want the same free slot: the first one takes it
+            _, first = np.unique(slot, return_index=True)
+            claims = np.zeros(len(slot), dtype=bool)
+            claims[first] = True
+            claims &= free
+            self.slot_keys[slot[claims]] = keys[pending[claims]]
+            self.slot_entry[slot[claims]] = pending[claims]
+            pending, slot = pending[~claims], (slot[~claims] + 1) & self.mask
+
+    def _slots(self, keys):
+        # keys are multiplicative hashes already: their high bits are well mixed
+        return (keys >> self.shift).astype(np.intp)
+
+    def find(self, keys: np.ndarray) -> np.ndarray:
+        """Index of each key in the build array, -1 when absent."""
+        flat = keys.ravel()
+        result = np.full(len(flat), -1, dtype=np.intp)
+        pending = np.arange(len(flat), dtype=np.intp)
+        slot = self._slots(flat)
+        while pending.size:
+            entry = self.slot_entry[slot]
+            hit = (entry >= 0) & (self.slot_keys[slot] == flat[pending])
+            result[pending[hit]] = entry[hit]
+            probe_on = (entry >= 0) & ~hit
+            pending, slot = pending[probe_on], (slot[probe_on] + 1) & self.mask
+        return result.reshape(keys.shape)
+
+
+def _calc_hash(a, b):
+    return _MAGIC_MULT * (a + _MAGIC_MULT * b)
+
+
+def _bucket_stats(table, ctr):
+    """(count, total) per bucket of a learned CTR table, as the exported calc_ctrs reads them."""
+    kind = ctr.base_ctr_type
+    k = table.target_classes_count
+    history = np.asarray(table.ctr_total, dtype=np.float64)
+
+    if kind in _TARGET_MEAN_CTRS:
+        count = np.asarray([h.sum for h in table.ctr_mean_history], dtype=np.float64)
+        total = np.asarray([h.count for h in table.ctr_mean_history], dtype=np.float64)
+    elif kind in _COUNTER_CTRS:
+        count = history
+        total = np.full(len(history), float(table.counter_denominator))
+    elif kind == "Buckets":
+        history = history.reshape(-1, k)
+        count, total = history[:, ctr.target_border_idx], history.sum(axis=1)
+    elif k > 2:
+        history = history.reshape(-1, k)
+        count, total = history[:, ctr.target_border_idx + 1:].sum(axis=1), history.sum(axis=1)
+    else:
+        history = history.reshape(-1, 2)
+        count, total = history[:, 1], history[:, 0] + history[:, 1]
+    return count, total
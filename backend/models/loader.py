@@ -1,6 +1,17 @@
 from catboost import CatBoostRegressor, Pool
+import os
 import pandas as pd
-from config import MODEL_PATHS, DATA_PATHS
+from pathlib import Path
+from config import MODEL_PATHS, DATA_PATHS, MODEL_FEATURES, MODEL_BACKENDS, COLUMNAR_CACHE, COLUMNAR_CACHE_HASH
+from models.backends import create_backend
+from models.columnar import (
+    load_columnar, read_cache, read_manifest, cache_dir_for, csv_fingerprint,
+    CACHE_VERSION, HISTORICAL_CATEGORICALS,
+)
+from utils.registration_index import (
+    RegistrationIndex, SharedRegistrationIndex, build_registration_index,
+    save_registration_index, read_index_manifest,
+)
 from typing import Dict
 
 def load_catboost_model(path: str) -> CatBoostRegressor:
@@ -18,14 +29,96 @@ def load_all_models() -> Dict[str, CatBoostRegressor]:
             raise RuntimeError(f"Failed to load {name} model from {p}: {e}")
     return models
 
+def load_model_backends(models=None):
+    """Serving backend per model as chosen by MODEL_BACKENDS in config.py."""
+    models = models if models is not None else load_all_models()
+    backends = {}
+    for name, model in models.items():
+        try:
+            backends[name] = create_backend(
+                MODEL_BACKENDS.get(name, "native"), model,
+                MODEL_PATHS[name], DATA_PATHS[name], MODEL_FEATURES[name],
+            )
+        except Exception as e:
+            raise RuntimeError(f"Failed to prepare {name} model backend: {e}")
+    return backends
+
 def load_csv(path):
     try:
         return pd.read_csv(path)
     except FileNotFoundError:
         return pd.DataFrame(columns=["AdjustedPrice"])
 
+def load_compact_csv(path):
+    """
+    Loads a historical CSV with category / downcast dtypes via the columnar
+    .npy cache next to it (memory-mapped on later starts).
+    """
+    try:
+        return load_columnar(path, HISTORICAL_CATEGORICALS, with_hash=COLUMNAR_CACHE_HASH)
+    except FileNotFoundError:
+        return pd.DataFrame(columns=["AdjustedPrice"])
+
 def load_historical_sets():
-    return {name: load_csv(path) for name, path in DATA_PATHS.items() if name != "Rego"}
+    loader = load_compact_csv if COLUMNAR_CACHE else load_csv
+    return {name: loader(path) for name, path in DATA_PATHS.items() if name != "Rego"}
 
 def load_rego_data():
     return load_csv(DATA_PATHS["Rego"])
+
+
+# --- Shared state for multi-worker deployments (see launcher.py) ---
+
+def rego_index_dir(path=None) -> Path:
+    path = Path(path or DATA_PATHS["Rego"])
+    return path.parent / f".{path.stem}.index"
+
+def prepare_shared_state():
+    """
+    Run once by the launcher before workers start: refreshes the columnar
+    cache of every historical CSV and writes the registration index as
+    memory-mappable arrays, so workers only have to attach.
+    """
+    for name, path in DATA_PATHS.items():
+        if name == "Rego" or not os.path.exists(path):
+            continue
+        load_columnar(path, HISTORICAL_CATEGORICALS, with_hash=COLUMNAR_CACHE_HASH)
+
+    rego_path = DATA_PATHS["Rego"]
+    if not os.path.exists(rego_path):
+        return
+    fingerprint = csv_fingerprint(rego_path, COLUMNAR_CACHE_HASH)
+    manifest = read_index_manifest(rego_index_dir(rego_path))
+    if not manifest or manifest.get("fingerprint") != fingerprint:
+        save_registration_index(build_registration_index(load_rego_data()), rego_index_dir(rego_path), fingerprint)
+
+def attach_historical_sets():
+    """Read-only, memory-mapped historical frames from caches written by prepare_shared_state."""
+    sets = {}
+    for name, path in DATA_PATHS.items():
+        if name == "Rego":
+            continue
+        if not os.path.exists(path):
+            sets[name] = pd.DataFrame(columns=["AdjustedPrice"])
+            continue
+        cache_dir = cache_dir_for(path)
+        manifest = read_manifest(cache_dir)
+        if not manifest or manifest.get("version") != CACHE_VERSION:
+            raise RuntimeError(f"No shared cache for {name} at {cache_dir}; start through launcher.py")
+        # A cache from before the CSV changed would serve data X-Data-Version does not name
+        if manifest.get("fingerprint") != csv_fingerprint(path, COLUMNAR_CACHE_HASH):
+            raise RuntimeError(f"Shared cache for {name} at {cache_dir} is out of date with {path}; start through launcher.py")
+        sets[name] = read_cache(cache_dir, mmap=True)
+    return sets
+
+def attach_rego_index() -> RegistrationIndex:
+    rego_path = DATA_PATHS["Rego"]
+    directory = rego_index_dir(rego_path)
+    if not os.path.exists(rego_path):
+        return RegistrationIndex(pd.DataFrame())
+    manifest = read_index_manifest(directory)
+    if manifest is None:
+        raise RuntimeError(f"No shared registration index at {directory}; start through launcher.py")
+    if manifest.get("fingerprint") != csv_fingerprint(rego_path, COLUMNAR_CACHE_HASH):
+        raise RuntimeError(f"Shared registration index at {directory} is out of date with {rego_path}; start through launcher.py")
+    return SharedRegistrationIndex(directory)
@@ -0,0 +1,69 @@
+import hmac
+from typing import List
+
+from fastapi import APIRouter, Request, Query, Header, HTTPException, status, Depends
+from fastapi.responses import FileResponse
+from schemas.responses import VersionsResponse, ErrorResponse, ProfileInfo
+from services.reload import reload_artifacts_async
+from utils.profiling import list_profiles, profile_path
+from config import ADMIN_TOKEN, PROFILE_DIR
+
+
+def require_admin(x_admin_token: str = Header("", description="Must match ADMIN_TOKEN")):
+    # Without a configured token the admin API is closed to everyone, not open
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin API disabled: ADMIN_TOKEN is not set")
+    if not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+
+@router.post(
+    "/reload",
+    response_model=VersionsResponse,
+    responses={
+        403: {"model": ErrorResponse},
+        409: {"model": ErrorResponse},
+        422: {"model": ErrorResponse},
+    },
+    summary="Load, validate and swap in new model files and/or historical data",
+)
+async def reload(
+    request: Request,
+    models: bool = Query(True, description="Reload the .cbm models"),
+    data: bool = Query(True, description="Reload the historical / registration CSVs"),
+):
+    return await reload_artifacts_async(request.app, models, data)
+
+
+@router.get(
+    "/versions",
+    response_model=VersionsResponse,
+    summary="Versions of the models and data being served",
+)
+async def versions(request: Request):
+    return request.app.state.versions
+
+
+@router.get(
+    "/profiles",
+    response_model=List[ProfileInfo],
+    summary="Recent request profiles (PROFILING), newest first",
+)
+async def profiles(limit: int = Query(50, ge=1, le=500)):
+    return list_profiles(PROFILE_DIR, limit)
+
+
+@router.get(
+    "/profiles/{name}",
+    response_class=FileResponse,
+    responses={404: {"model": ErrorResponse}},
+    summary="Download a request profile (pstats)",
+)
+async def profile_download(name: str):
+    path = profile_path(PROFILE_DIR, name)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=path.name)
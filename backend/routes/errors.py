@@ -12,6 +12,7 @@ def register_exception_handlers(app):
             return JSONResponse(
                 status_code=exc.status_code,
                 content=error_response(exc),  # already returns dict
+                headers=getattr(exc, "headers", None),
             )
         # Standard HTTPException
         return JSONResponse(
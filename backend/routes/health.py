@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+
+@router.get("/live", summary="Process is up")
+async def live():
+    return {"status": "ok"}
+
+
+@router.get("/ready", summary="Models and data are loaded / attached")
+async def ready(request: Request):
+    state = request.app.state
+    if not getattr(state, "ready", False):
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    return {
+        "status": "ready",
+        "shared_state": getattr(state, "shared_state", False),
+        "startup": getattr(state, "startup", None),
+    }
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Request
 from schemas.requests import HistoricalRequest
-from schemas.responses import HistoricalResponse, ErrorResponse
-from services.historical import run_historical_summary
+from typing import Dict
+from schemas.responses import HistoricalResponse, ErrorResponse, CacheStats
+from services.historical import run_historical_summary_async, historical_cache_stats
+from utils.timing import TimedRoute
 
-router = APIRouter(prefix="/historical", tags=["Historical"])
+router = APIRouter(prefix="/historical", tags=["Historical"], route_class=TimedRoute)
 
 
 @router.post(
@@ -13,8 +15,18 @@ router = APIRouter(prefix="/historical", tags=["Historical"])
         400: {"model": ErrorResponse},
         404: {"model": ErrorResponse},
         500: {"model": ErrorResponse},
+        503: {"model": ErrorResponse},
     },
     summary="Get historical data summary",
 )
-def historical_summary(req: HistoricalRequest, request: Request):
-    return run_historical_summary(request.app, req)
+async def historical_summary(req: HistoricalRequest, request: Request):
+    return await run_historical_summary_async(request.app, req)
+
+
+@router.get(
+    "/cache/stats",
+    response_model=Dict[str, CacheStats],
+    summary="Historical summary / plot cache counters",
+)
+async def historical_cache(request: Request):
+    return historical_cache_stats(request.app)
@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, summary="Request and per-stage latency histograms (Prometheus)")
+async def metrics(request: Request):
+    return PlainTextResponse(request.app.state.metrics.render(), media_type=CONTENT_TYPE)
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Request
-from schemas.requests import PredictRequest
-from schemas.responses import PredictResponse, ErrorResponse
-from services.prediction import run_prediction
+from typing import Dict, Literal
+from fastapi import APIRouter, Request, Query
+from schemas.requests import PredictRequest, BatchPredictRequest
+from schemas.responses import PredictResponse, BatchPredictResponse, ErrorResponse, BatcherStats, CacheStats
+from services.prediction import run_prediction_async, run_batch_prediction_async, batching_stats, prediction_cache_stats
+from utils.timing import TimedRoute
 
-router = APIRouter(prefix="/predict", tags=["Prediction"])
+router = APIRouter(prefix="/predict", tags=["Prediction"], route_class=TimedRoute)
 
 
 @router.post(
@@ -13,8 +15,46 @@ router = APIRouter(prefix="/predict", tags=["Prediction"])
         400: {"model": ErrorResponse},
         422: {"model": ErrorResponse},
         500: {"model": ErrorResponse},
+        503: {"model": ErrorResponse},
     },
     summary="Predict a service price",
 )
-def predict(req: PredictRequest, request: Request):
-    return run_prediction(request.app, req)
+async def predict(
+    req: PredictRequest,
+    request: Request,
+    explain: Literal["none", "values", "png"] = Query("none", description="SHAP output: none, raw values as JSON, or a PNG waterfall"),
+):
+    return await run_prediction_async(request.app, req, explain)
+
+
+@router.post(
+    "/batch",
+    response_model=BatchPredictResponse,
+    responses={
+        400: {"model": ErrorResponse},
+        422: {"model": ErrorResponse},
+        500: {"model": ErrorResponse},
+        503: {"model": ErrorResponse},
+    },
+    summary="Predict service prices for many vehicles",
+)
+async def predict_batch(req: BatchPredictRequest, request: Request):
+    return await run_batch_prediction_async(request.app, req)
+
+
+@router.get(
+    "/batching/stats",
+    response_model=Dict[str, BatcherStats],
+    summary="Micro-batching batch size / queue wait histograms per model",
+)
+async def predict_batching_stats(request: Request):
+    return batching_stats(request.app)
+
+
+@router.get(
+    "/cache/stats",
+    response_model=Dict[str, CacheStats],
+    summary="Prediction / SHAP memoization cache counters",
+)
+async def predict_cache_stats(request: Request):
+    return prediction_cache_stats(request.app)
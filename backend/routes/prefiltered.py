@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Request
 from schemas.requests import PrefilteredRequest
 from schemas.responses import PrefilteredResponse, ErrorResponse
-from services.prefiltered import run_prefiltered
+from services.prefiltered import run_prefiltered_async
+from utils.timing import TimedRoute
 
-router = APIRouter(prefix="/historical/prefilter", tags=["Historical"])
+router = APIRouter(prefix="/historical/prefilter", tags=["Historical"], route_class=TimedRoute)
 
 
 @router.post(
@@ -13,8 +14,9 @@ router = APIRouter(prefix="/historical/prefilter", tags=["Historical"])
         400: {"model": ErrorResponse},
         422: {"model": ErrorResponse},
         500: {"model": ErrorResponse},
+        503: {"model": ErrorResponse},
     },
     summary="Prefilter",
 )
-def Prefilter(req: PrefilteredRequest, request: Request):
-    return run_prefiltered(request.app, req)
+async def Prefilter(req: PrefilteredRequest, request: Request):
+    return await run_prefiltered_async(request.app, req)
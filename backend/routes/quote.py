@@ -0,0 +1,27 @@
+from typing import Literal
+from fastapi import APIRouter, Request, Query
+from schemas.requests import QuoteRequest
+from schemas.responses import QuoteResponse, ErrorResponse
+from services.quote import run_quote
+from utils.timing import TimedRoute
+
+router = APIRouter(prefix="/quote", tags=["Quote"], route_class=TimedRoute)
+
+
+@router.post(
+    "",
+    response_model=QuoteResponse,
+    responses={
+        400: {"model": ErrorResponse},
+        422: {"model": ErrorResponse},
+        500: {"model": ErrorResponse},
+        503: {"model": ErrorResponse},
+    },
+    summary="Predict a service price and compare it with historical prices",
+)
+async def quote(
+    req: QuoteRequest,
+    request: Request,
+    explain: Literal["none", "values", "png"] = Query("none", description="SHAP output: none, raw values as JSON, or a PNG waterfall"),
+):
+    return await run_quote(request.app, req, explain)
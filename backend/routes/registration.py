@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Request, Query
-from schemas.responses import RegistrationResponse, ErrorResponse
-from services.registration import lookup_registration
+from schemas.requests import RegistrationBatchRequest
+from schemas.responses import RegistrationResponse, RegistrationBatchResponse, ErrorResponse
+from services.registration import lookup_registration, lookup_registrations_async
+from utils.timing import TimedRoute
 
-router = APIRouter(prefix="/registration", tags=["Registration"])
+router = APIRouter(prefix="/registration", tags=["Registration"], route_class=TimedRoute)
 
 
 @router.get(
@@ -15,8 +17,23 @@ router = APIRouter(prefix="/registration", tags=["Registration"])
     },
     summary="Lookup registration data",
 )
-def registration_lookup(
+async def registration_lookup(
     request: Request,
     registration: str = Query(..., description="Vehicle registration number"),
 ):
     return lookup_registration(request.app, registration.upper())
+
+
+@router.post(
+    "/lookup/batch",
+    response_model=RegistrationBatchResponse,
+    responses={
+        400: {"model": ErrorResponse},
+        422: {"model": ErrorResponse},
+        500: {"model": ErrorResponse},
+        503: {"model": ErrorResponse},
+    },
+    summary="Lookup many registrations",
+)
+async def registration_lookup_batch(req: RegistrationBatchRequest, request: Request):
+    return await lookup_registrations_async(request.app, req.registrations)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Literal, Optional
 
 class CarFeatures(BaseModel):
     TaskName: Optional[str] = Field(..., description="Name of the task/service (e.g., Wheel alignment, Brake service)")
@@ -17,10 +17,17 @@ class CarFeatures(BaseModel):
 class RegistrationRequest(BaseModel):
     Registration: str = Field(..., description="Vehicle registration number")
 
+class RegistrationBatchRequest(BaseModel):
+    registrations: List[str] = Field(..., description="Vehicle registration numbers to look up")
+
 class PredictRequest(BaseModel):
     model_name: str = Field(..., description="Which model to use: one of Capped, Logbook, Prescribed, Repair")
     features: CarFeatures = Field(..., description="Vehicle / Task feature object")
 
+class BatchPredictRequest(BaseModel):
+    items: List[PredictRequest] = Field(..., description="Rows to score; each row names its own model, so models can be mixed")
+    include_shap: bool = Field(False, description="Also return a SHAP waterfall plot for every row (slow)")
+
 class PrefilteredRequest(BaseModel):
     model_name: str = Field(..., description="Which model to use: one of Capped, Logbook, Prescribed, Repair")
     features: CarFeatures = Field(..., description="Vehicle / Task feature object")
@@ -31,3 +38,11 @@ class HistoricalRequest(BaseModel):
     prediction: float = Field(..., description="Predicted price from /predict endpoint")
     months: Optional[float] = Field(None, description="Months of service (if applicable)")
     distance: Optional[float] = Field(None, description="Vehicle odometer reading (km)")
+
+HistoricalPlotName = Literal["boxplot_png", "histogram_png", "month_vs_price_png", "distance_vs_price_png"]
+
+class QuoteRequest(BaseModel):
+    model_name: str = Field(..., description="Which model to use: one of Capped, Logbook, Prescribed, Repair")
+    features: CarFeatures = Field(..., description="Vehicle / Task feature object")
+    filters: Optional[CarFeatures] = Field(None, description="Features to filter historical data by (defaults to features)")
+    plots: Optional[List[HistoricalPlotName]] = Field(None, description="Historical plots to render (defaults to all; [] for none)")
@@ -11,6 +11,14 @@ class RegistrationResponse(BaseModel):
     Transmission: Optional[str] = Field(None, description="Transmission type (e.g., Auto, Manual)")
     DriveType: Optional[str] = Field(None, description="Drive type (e.g., FWD, RWD, AWD)")
 
+class RegistrationBatchItem(BaseModel):
+    registration: str = Field(..., description="Registration as sent in the request")
+    found: bool
+    record: Optional[RegistrationResponse] = None
+
+class RegistrationBatchResponse(BaseModel):
+    results: List[RegistrationBatchItem]
+
 class PrefilteredResponse(BaseModel):
     Make: list[str] = Field(..., description="Unique Vehicle manufacturer Categories (e.g., Toyota)")
     Model: list[str] = Field(..., description="Unique Vehicle model Categories(e.g., Corolla)")
@@ -47,11 +55,17 @@ class SummaryResult(BaseModel):
     iqr_high: Optional[float]
     count: Optional[float]
 
+class ShapExplanation(BaseModel):
+    expected_value: float = Field(..., description="Model base value the contributions are added to")
+    features: List[str] = Field(..., description="Feature names, in model order")
+    values: List[float] = Field(..., description="SHAP contribution of each feature, aligned with features")
+
 class PredictResponse(BaseModel):
     model: str
     prediction: float
     features: dict
     plots: PredictPlotOutputs
+    explanation: Optional[ShapExplanation] = None
     message: Optional[str] = None
 
 class HistoricalResponse(BaseModel):
@@ -63,4 +77,64 @@ class HistoricalResponse(BaseModel):
 class ErrorResponse(BaseModel):
     code: str
     message: str
-    details: Optional[List[Dict]] = None  # now accepts a list of dicts
\ No newline at end of file
+    details: Optional[List[Dict]] = None  # now accepts a list of dicts
+
+class BatchPredictItem(BaseModel):
+    index: int = Field(..., description="Position of the row in the request")
+    model: str
+    prediction: Optional[float] = None
+    plots: Optional[PredictPlotOutputs] = None
+    error: Optional[ErrorResponse] = None
+
+class BatchPredictResponse(BaseModel):
+    results: List[BatchPredictItem]
+    count: int
+    failed: int
+
+class CacheStats(BaseModel):
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    evictions: int
+    hit_rate: float
+    bytes: int = Field(0, description="Approximate memory held (byte-bounded caches only)")
+    maxbytes: Optional[int] = None
+
+class HistogramSnapshot(BaseModel):
+    buckets: Dict[str, int]
+    sum: float
+    count: int
+
+class BatcherStats(BaseModel):
+    window_ms: float
+    max_batch: int
+    queued: int
+    batch_size: HistogramSnapshot
+    queue_wait_ms: HistogramSnapshot
+
+class VersionsResponse(BaseModel):
+    model: str = Field(..., description="Combined version of all models, as sent in X-Model-Version")
+    data: str = Field(..., description="Combined version of all data files, as sent in X-Data-Version")
+    models: Dict[str, str]
+    datasets: Dict[str, str]
+
+class ProfileFunction(BaseModel):
+    function: str = Field(..., description="file:line(function)")
+    calls: int
+    self_ms: float
+    cumulative_ms: float
+
+class ProfileInfo(BaseModel):
+    name: str = Field(..., description="Download from /admin/profiles/{name} as a pstats file")
+    created: str
+    method: str
+    path: str
+    query: str
+    status: Optional[int] = None
+    duration_ms: float
+    top: List[ProfileFunction] = Field(default_factory=list, description="Functions with the most self time")
+
+class QuoteResponse(BaseModel):
+    prediction: PredictResponse
+    historical: HistoricalResponse
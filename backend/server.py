@@ -1,32 +1,104 @@
+import time
+
+# Start of the process's own imports, for the time-to-ready report
+IMPORT_START = time.perf_counter()
+
+import asyncio
+import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
 # Routers
-from routes import prediction, historical, registration, docs, prefiltered
+from routes import prediction, historical, registration, docs, prefiltered, health, quote, admin, metrics
 from routes.errors import register_exception_handlers
 from routes.docs import custom_openapi
 
 # Model loader
-from models.loader import load_all_models, load_historical_sets, load_rego_data
-
-from config import CORS_ORIGINS, ALLOW_ALL_CORS_DEV
+from models.loader import load_model_backends, load_historical_sets, load_rego_data, attach_historical_sets, attach_rego_index
+from utils.registration_index import build_registration_index
+from services.reload import (
+    build_historical_state, install_state, set_versions, model_versions, data_versions, watch_artifacts,
+)
+from services.warmup import warm_up
+from services.prediction import create_prediction_cache
+from utils.rendering import PlotRenderer
+from utils.concurrency import create_executors
+from utils.batching import create_batchers
+from utils.middleware import VersionHeaderMiddleware, TimingMiddleware
+from utils.metrics import create_metrics
+from utils.log import configure_logging
+from utils.profiling import ProfilingMiddleware, PROFILE_MODES
+
+from config import (
+    CORS_ORIGINS, ALLOW_ALL_CORS_DEV, RENDER_WORKERS, RENDER_QUEUE_DEPTH, SHARED_STATE,
+    PREDICT_WORKERS, PREDICT_QUEUE_DEPTH, FILTER_WORKERS, FILTER_QUEUE_DEPTH, RELOAD_POLL_SECONDS,
+    PREDICT_MICROBATCH, PREDICT_MICROBATCH_WINDOW_MS, PREDICT_MICROBATCH_MAX, SERVER_TIMING,
+    PROFILING, PROFILE_DIR, PROFILE_KEEP, ADMIN_TOKEN, WARMUP, WARMUP_RENDER,
+)
 from fastapi.middleware.cors import CORSMiddleware
 
+logger = logging.getLogger("server")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    app.state.models = load_all_models()
-    app.state.historical_sets = load_historical_sets()
-    app.state.rego_data = load_rego_data()
-    print("Models and datasets loaded successfully!")
+    started = time.perf_counter()
+    app.state.ready = False
+    app.state.shared_state = SHARED_STATE
+    app.state.models = load_model_backends()
+    if SHARED_STATE:
+        # Started by launcher.py: attach to the memory-mapped state it prepared
+        historical_sets = attach_historical_sets()
+        app.state.rego_index = attach_rego_index()
+    else:
+        historical_sets = load_historical_sets()
+        # Only the compact index is kept; the raw rego frame is released after indexing
+        app.state.rego_index = build_registration_index(load_rego_data())
+    install_state(app, build_historical_state(historical_sets))
+    set_versions(app, model_versions(), data_versions())
+    app.state.prediction_cache = create_prediction_cache()
+    app.state.reload_lock = asyncio.Lock()
+    app.state.renderer = PlotRenderer(RENDER_WORKERS, RENDER_QUEUE_DEPTH) if RENDER_WORKERS > 0 else None
+    app.state.executors = create_executors({
+        "predict": (PREDICT_WORKERS, PREDICT_QUEUE_DEPTH),
+        "filter": (FILTER_WORKERS, FILTER_QUEUE_DEPTH),
+    })
+    app.state.batchers = (
+        create_batchers(app, PREDICT_MICROBATCH_WINDOW_MS, PREDICT_MICROBATCH_MAX) if PREDICT_MICROBATCH else {}
+    )
+    loaded = time.perf_counter()
+    warmup = await warm_up(app, WARMUP_RENDER) if WARMUP else None
+    watcher = asyncio.create_task(watch_artifacts(app, RELOAD_POLL_SECONDS)) if RELOAD_POLL_SECONDS > 0 else None
+    ready = time.perf_counter()
+    app.state.startup = {
+        "import_s": started - IMPORT_START,
+        "load_s": loaded - started,
+        "warmup_s": ready - loaded if warmup is not None else None,
+        "time_to_ready_s": ready - IMPORT_START,
+        "warmup": warmup,
+    }
+    app.state.ready = True
+    logger.info("Ready", extra={
+        "model_version": app.state.versions["model"], "data_version": app.state.versions["data"],
+        **{k: round(v, 3) for k, v in app.state.startup.items() if isinstance(v, float)},
+    })
     yield  
 
-
-    print("Shutting down app")
+    if watcher is not None:
+        watcher.cancel()
+    render_warmup = getattr(app.state, "render_warmup", None)
+    if render_warmup is not None:
+        render_warmup.cancel()
+    if app.state.renderer is not None:
+        app.state.renderer.shutdown()
+    for executor in app.state.executors.values():
+        executor.shutdown()
+    logger.info("Shutting down")
 
 
 def create_app() -> FastAPI:
+    configure_logging()
     app = FastAPI(
         title="AutoGuru — Service Price Prediction API",
         description="Predict prices for capped, logbook, prescribed, and repair services.",
@@ -48,10 +120,29 @@ def create_app() -> FastAPI:
     app.include_router(registration.router)
     app.include_router(docs.router)
     app.include_router(prefiltered.router)
+    app.include_router(health.router)
+    app.include_router(quote.router)
+    app.include_router(admin.router)
+    app.include_router(metrics.router)
 
     # Register global exception handlers
     register_exception_handlers(app)
 
+    # X-Model-Version / X-Data-Version on every response
+    app.add_middleware(VersionHeaderMiddleware)
+
+    # Per-route / per-stage histograms for /metrics, optionally a Server-Timing header
+    app.state.metrics = create_metrics()
+    app.add_middleware(TimingMiddleware, server_timing=SERVER_TIMING)
+
+    # Opt-in request profiling; not installed at all when off
+    if PROFILING not in PROFILE_MODES:
+        raise ValueError(f"PROFILING must be one of {', '.join(PROFILE_MODES)}, got {PROFILING!r}")
+    if PROFILING != "off":
+        if PROFILING == "admin" and not ADMIN_TOKEN:
+            logger.warning("PROFILING=admin without ADMIN_TOKEN: no client can request a profile")
+        app.add_middleware(ProfilingMiddleware, mode=PROFILING, directory=PROFILE_DIR, keep=PROFILE_KEEP, admin_token=ADMIN_TOKEN)
+
     if ALLOW_ALL_CORS_DEV:
         app.add_middleware(
             CORSMiddleware,
@@ -1,71 +1,203 @@
 from fastapi import HTTPException, status
 from utils.plotting import get_all_price_plots
-from utils.historical_summary import filter_df_by_features, build_price_summary, compare_price
-import numpy as np
-import scipy.stats as stats
+from utils.historical_summary import filter_df_by_features, build_price_summary, compare_price, sort_prices
+from utils.cache import TTLCache, canonical_key
+from utils.rendering import submit_render, render_result, render_result_async
+from utils.concurrency import run_stage
+from utils.timing import stage, timed_render, record_rendered
+from utils.plot_aggregates import PlotAggregates
+from config import (
+    HISTORICAL_CACHE_SIZE, HISTORICAL_PLOT_CACHE_SIZE, HISTORICAL_CACHE_TTL, RENDER_TIMEOUT,
+    PLOT_AGGREGATE_ROWS, PLOT_DENSITY_BINS,
+)
 
-def run_historical_summary(app, req):
+EMPTY_PLOTS = {
+    "boxplot_png": None,
+    "histogram_png": None,
+    "month_vs_price_png": None,
+    "distance_vs_price_png": None
+}
+
+PLOT_COLUMNS = ["Months", "Distance", "AdjustedPrice"]
+
+
+def create_historical_cache():
     """
-    Finds historical data matching the features,
-    computes statistics, comparison metrics, and generates multiple plots.
+    Summary entries are keyed by the filter signature. Rendered plots are keyed
+    by the signature plus the overlay values (prediction, months, distance);
+    predictions are deterministic per feature vector, so repeat quotes for the
+    same vehicle hit the plot cache too.
+    """
+    return {
+        "summary": TTLCache(maxsize=HISTORICAL_CACHE_SIZE, ttl=HISTORICAL_CACHE_TTL),
+        "plots": TTLCache(maxsize=HISTORICAL_PLOT_CACHE_SIZE, ttl=HISTORICAL_CACHE_TTL),
+    }
+
+
+def filter_signature(model_name, features):
+    """Canonical key for (model_name, non-null filter values)."""
+    values = {k: v for k, v in features.model_dump().items() if v is not None}
+    return canonical_key(model_name, values)
+
+
+def historical_cache_stats(app):
+    cache = getattr(app.state, "historical_cache", None) or {}
+    stats = {name: c.stats() for name, c in cache.items()}
+    for name, facets in getattr(app.state, "facet_index", {}).items():
+        stats[f"prefilter:{name}"] = facets.cache.stats()
+    return stats
+
+
+def _summarise(app, model_name, features, df):
+    """
+    Filters df and computes the summary; returns None when nothing matches.
+    Prices are kept sorted: taken from the index partition when the filter
+    is just Make / Model, otherwise sorted once here for the cached entry.
+    Above PLOT_AGGREGATE_ROWS rows the plot data is cached as PlotAggregates
+    rather than the rows themselves.
+    """
+    index = getattr(app.state, "historical_index", {}).get(model_name)
+    with stage("filter"):
+        filtered = filter_df_by_features(df, features, required_keys=["Make", "Model"], index=index)
+    if filtered.empty:
+        return None
+
+    with stage("summary"):
+        prices = index.sorted_prices(features.model_dump()) if index is not None and index.df is df else None
+        if prices is None:
+            prices = sort_prices(filtered)
+        summary = build_price_summary(filtered, sorted_prices=prices)
+
+    plot_data = filtered[[c for c in PLOT_COLUMNS if c in filtered.columns]]
+    if len(plot_data) > PLOT_AGGREGATE_ROWS:
+        with stage("aggregate"):
+            plot_data = PlotAggregates(plot_data, sorted_prices=prices, bins=PLOT_DENSITY_BINS)
+
+    return {
+        "summary": summary,
+        "prices": prices,
+        "plot_data": plot_data,
+    }
+
+
+def empty_historical_response(message):
+    return {
+        "summary": None,
+        "comparison": None,
+        "plots": dict(EMPTY_PLOTS),
+        "message": message
+    }
+
+
+def lookup_summary(app, model_name, features):
+    """
+    Filter + summary for (model_name, features), through the summary cache.
+    Returns (entry, signature, message): entry is None, with message saying
+    why, when there is nothing to compare a prediction against.
     """
 
-    if req.model_name not in app.state.historical_sets:
+    if model_name not in app.state.historical_sets:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Unknown model: {req.model_name}"
+            detail=f"Unknown model: {model_name}"
         )
-    
-    df = app.state.historical_sets.get(req.model_name)
-    filtered = filter_df_by_features(df, req.features, required_keys=["Make", "Model"])
 
+    df = app.state.historical_sets.get(model_name)
     if df.empty:
-        return {
-            "summary": None,
-            "comparison": None,
-            "plots": {
-                "boxplot_png": None,
-                "histogram_png": None,
-                "month_vs_price_png": None,
-                "distance_vs_price_png": None
-            },
-            "message": "No matching historical data available"
-        }
-    
-    if filtered.empty:
-        return {
-            "summary": None,
-            "comparison": None,
-            "plots": {
-                "boxplot_png": None,
-                "histogram_png": None,
-                "month_vs_price_png": None,
-                "distance_vs_price_png": None
-            },
-            "message": "No matching historical records"
-        }
-
-    summary = build_price_summary(filtered)
+        return None, None, "No matching historical data available"
+
+    cache = getattr(app.state, "historical_cache", None)
+    signature = filter_signature(model_name, features) if cache is not None else None
+
+    entry = cache["summary"].get(signature, False) if cache is not None else False
+    if entry is False:
+        entry = _summarise(app, model_name, features, df)
+        if cache is not None:
+            cache["summary"].set(signature, entry)
+
+    if entry is None:
+        return None, signature, "No matching historical records"
+    return entry, signature, None
+
+
+def compare_with_history(app, entry, signature, predicted_price, months=None, distance=None, plot_names=None):
+    """
+    Comparison metrics for predicted_price against a lookup_summary entry, with
+    the plots (all of them, or only plot_names) started on the renderer.
+    Returns (response, plot_future, plot_key); plot_future is None when the
+    plots came from the cache or none were asked for.
+    """
+    cache = getattr(app.state, "historical_cache", None)
+    selected = sorted(EMPTY_PLOTS) if plot_names is None else sorted(set(plot_names))
+
+    # --- plots: start rendering first so the comparison runs alongside ---
+    plot_key = canonical_key(signature, predicted_price, months, distance, selected) if cache is not None else None
+    plots = cache["plots"].get(plot_key) if cache is not None and selected else None
+    plot_future = None
+    if plots is None and selected:
+        # timed_render brings the per-plot timings back from the render worker
+        plot_future = submit_render(
+            getattr(app.state, "renderer", None),
+            timed_render, get_all_price_plots, entry["plot_data"], predicted_price, months, distance, plots=selected
+        )
+
+    summary = entry["summary"]
 
     # --- comparison metrics ---
-    predicted_price = req.prediction
-    comparison = compare_price(predicted_price, summary, filtered["AdjustedPrice"])
-
-    # --- plots ---
-    
-    try:
-        plots = get_all_price_plots(filtered, predicted_price, req.months, req.distance)
-    except Exception:
-        plots = {
-            "boxplot_png": None,
-            "histogram_png": None,
-            "month_vs_price_png": None,
-            "distance_vs_price_png": None
-        }
+    with stage("compare"):
+        comparison = compare_price(predicted_price, summary, entry["prices"], presorted=True)
 
     return {
         "summary": summary,
         "comparison": comparison,
-        "plots": plots,
+        "plots": plots if plots is not None else dict(EMPTY_PLOTS),
         "message": "Historical summary computed successfully"
-    }
+    }, plot_future, plot_key
+
+
+def _historical_summary(app, req):
+    """
+    Everything up to the plots: returns (response, plot_future, plot_key).
+    plot_future is None when the plots came from the cache or aren't needed.
+    """
+    entry, signature, message = lookup_summary(app, req.model_name, req.features)
+    if entry is None:
+        return empty_historical_response(message), None, None
+    return compare_with_history(app, entry, signature, req.prediction, req.months, req.distance)
+
+
+def attach_plots(app, response, rendered, plot_key):
+    """rendered: the plot job's timed_render result, None if it failed or timed out."""
+    cache = getattr(app.state, "historical_cache", None)
+    plots = record_rendered(rendered)
+    if plots is None:
+        plots = dict(EMPTY_PLOTS)
+    else:
+        plots = {**EMPTY_PLOTS, **plots}
+        if cache is not None:
+            cache["plots"].set(plot_key, plots)
+    response["plots"] = plots
+    return response
+
+
+def run_historical_summary(app, req):
+    """
+    Finds historical data matching the features,
+    computes statistics, comparison metrics, and generates multiple plots.
+    """
+    response, plot_future, plot_key = _historical_summary(app, req)
+    if plot_future is None:
+        return response
+    return attach_plots(app, response, render_result(plot_future, timeout=RENDER_TIMEOUT), plot_key)
+
+
+async def run_historical_summary_async(app, req):
+    """
+    run_historical_summary for async handlers: filtering and statistics run on
+    the filter stage, and the plots are awaited without holding its thread.
+    """
+    response, plot_future, plot_key = await run_stage(app, "filter", _historical_summary, app, req)
+    if plot_future is None:
+        return response
+    plots = await render_result_async(plot_future, timeout=RENDER_TIMEOUT)
+    return attach_plots(app, response, plots, plot_key)
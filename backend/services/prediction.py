@@ -1,14 +1,138 @@
+import math
+
+import numpy as np
 from fastapi import HTTPException, status
 from models.preprocess import preprocess
-from utils.plotting import generate_shap_plot
-from config import MODEL_FEATURES
+from utils.cache import TTLCache
+from utils.plotting import generate_shap_plot, compute_shap_values, render_shap_waterfall
+from utils.rendering import submit_render, render_result, render_result_async, failed_render
+from utils.concurrency import run_stage
+from utils.errors import ServiceUnavailableException
+from utils.timing import stage
+from config import (
+    MODEL_FEATURES, PREDICT_BATCH_MAX_ROWS, RENDER_TIMEOUT,
+    PREDICTION_CACHE, PREDICTION_CACHE_SIZE, PREDICTION_CACHE_MB, SHAP_CACHE_MB,
+)
+
 
+# --- Memoization ---
 
-def run_prediction(app, req):
+def create_prediction_cache():
     """
-    Runs a prediction for a given model and features.
-    Uses models loaded in app.state.
+    Predictions and SHAP vectors are cached separately under the same key
+    (prediction_keys), so a plain /predict doesn't pay for SHAP and repeat
+    quotes for a vehicle skip the model either way. Both are LRU within an
+    entry count and a memory budget. None when PREDICTION_CACHE is off.
+    """
+    if not PREDICTION_CACHE:
+        return None
+    return {
+        "prediction": TTLCache(maxsize=PREDICTION_CACHE_SIZE, maxbytes=int(PREDICTION_CACHE_MB * 2**20)),
+        "shap": TTLCache(maxsize=PREDICTION_CACHE_SIZE, maxbytes=int(SHAP_CACHE_MB * 2**20)),
+    }
+
+
+def _cache(app, kind):
+    return (getattr(app.state, "prediction_cache", None) or {}).get(kind)
+
+
+def prediction_keys(app, model_name, rows):
+    """
+    (model, model version, preprocessed feature tuple) per row; all None
+    without a cache. The version is read before the caller looks the model
+    up: a reload swaps the models first and the versions second, so an old
+    model's result is never stored under the new version. A new model's
+    result may land under the old version, which is never looked up again.
     """
+    if _cache(app, "prediction") is None:
+        return [None] * len(rows)
+    versions = getattr(app.state, "versions", None) or {}
+    version = versions.get("models", {}).get(model_name)
+    return [
+        (model_name, version, tuple(None if isinstance(v, float) and math.isnan(v) else v for v in row))
+        for row in rows
+    ]
+
+
+def _memoized(cache, keys, compute):
+    """
+    Values for keys in order: cached ones from cache, the rest from a single
+    compute(missing_indices) call, whose results are then cached.
+    """
+    values = [cache.get(k) if cache is not None and k is not None else None for k in keys]
+    missing = [j for j, value in enumerate(values) if value is None]
+    if missing:
+        for j, value in zip(missing, compute(missing)):
+            values[j] = value
+            if cache is not None and keys[j] is not None:
+                cache.set(keys[j], value)
+    return values
+
+
+def _subset(rows, missing):
+    return rows if len(missing) == len(rows) else [rows[j] for j in missing]
+
+
+def predict_rows(app, model, keys, rows):
+    """Model predictions for rows as floats; rows with a cached prediction don't reach the model."""
+    def compute(missing):
+        with stage("predict"):
+            return [float(p) for p in model.predict(_subset(rows, missing))]
+    return _memoized(_cache(app, "prediction"), keys, compute)
+
+
+def shap_vectors(app, model, keys, rows, feature_names):
+    """(contributions, expected value) per row, computed in one CatBoost call for the uncached rows."""
+    def compute(missing):
+        with stage("shap"):
+            matrix, expected_value = compute_shap_values(model, _subset(rows, missing), feature_names)
+        return [(np.array(matrix[i], dtype=np.float64), float(expected_value)) for i in range(len(missing))]
+    return _memoized(_cache(app, "shap"), keys, compute)
+
+
+def clear_prediction_cache(app):
+    """Empties the caches; called when models are reloaded."""
+    for cache in (getattr(app.state, "prediction_cache", None) or {}).values():
+        cache.clear()
+
+
+def prediction_cache_stats(app):
+    return {name: c.stats() for name, c in (getattr(app.state, "prediction_cache", None) or {}).items()}
+
+
+# --- Single row ---
+
+def start_shap_render(app, model, processed, feature_names, key=None):
+    """
+    Starts the SHAP waterfall for processed[0]. The SHAP values are computed
+    here (they need the model, and may be cached) and only the drawing goes
+    to a render worker when one is configured. Without a renderer or a
+    cache the whole plot is made inline.
+    """
+    renderer = getattr(app.state, "renderer", None)
+    if renderer is None and key is None:
+        with stage("shap"):
+            return submit_render(None, generate_shap_plot, model, processed, feature_names)
+
+    try:
+        values, expected_value = shap_vectors(app, model, [key], processed, feature_names)[0]
+    except Exception as e:
+        return failed_render(e)
+    return submit_render(renderer, render_shap_waterfall, values, expected_value, processed[0], feature_names)
+
+
+def explain_values(app, model, processed, feature_names, key=None):
+    """Raw SHAP contributions for processed[0] as a JSON-friendly dict."""
+    values, expected_value = shap_vectors(app, model, [key], processed, feature_names)[0]
+    return {
+        "expected_value": expected_value,
+        "features": list(feature_names),
+        "values": [float(v) for v in values],
+    }
+
+
+def start_prediction(app, req, explain):
+    """Prediction and SHAP values; returns (response, shap_future) with the PNG still pending."""
 
     if req.model_name not in app.state.models:
         raise HTTPException(
@@ -16,30 +140,188 @@ def run_prediction(app, req):
             detail=f"Unknown model: {req.model_name}"
         )
 
+    with stage("preprocess"):
+        processed = preprocess(req.features, req.model_name)
+    key = prediction_keys(app, req.model_name, processed)[0]
     model = app.state.models[req.model_name]
-    processed = preprocess(req.features, req.model_name)
+
+    # Kick off the SHAP plot first so it renders while the model predicts
+    shap_future = None
+    if explain == "png":
+        try:
+            shap_future = start_shap_render(app, model, processed, MODEL_FEATURES[req.model_name], key)
+        except Exception as e:
+            shap_future = failed_render(e)
 
     try:
-        prediction = float(model.predict(processed)[0])
+        prediction = predict_rows(app, model, [key], processed)[0]
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Model prediction failed: {str(e)}"
         )
 
-    # Generate SHAP plot
+    explanation = None
+    if explain == "values":
+        try:
+            explanation = explain_values(app, model, processed, MODEL_FEATURES[req.model_name], key)
+        except Exception:
+            explanation = None
+
+    return {
+        "model": req.model_name,
+        "features": req.features.model_dump(),
+        "prediction": prediction,
+        "plots": {"shap_png": None},
+        "explanation": explanation,
+    }, shap_future
+
+
+def run_prediction(app, req, explain="none"):
+    """
+    Runs a prediction for a given model and features.
+    Uses models loaded in app.state.
+    explain selects the SHAP output: "none" (skip SHAP), "values" (raw
+    contributions as JSON) or "png" (server-rendered waterfall plot).
+    """
+    response, shap_future = start_prediction(app, req, explain)
+    if shap_future is not None:
+        with stage("render.shap_png"):
+            response["plots"]["shap_png"] = render_result(shap_future, timeout=RENDER_TIMEOUT)  # don’t fail the endpoint if SHAP fails
+    return response
+
+
+async def run_prediction_async(app, req, explain="none"):
+    """
+    run_prediction for async handlers: the model runs on the predict stage
+    and the SHAP PNG is awaited without holding its thread. Without SHAP,
+    the row goes through the model's micro-batcher when batching is enabled.
+    """
+    batcher = (getattr(app.state, "batchers", None) or {}).get(req.model_name)
+    if batcher is not None and explain == "none":
+        return await run_batched_prediction(app, batcher, req)
+
+    response, shap_future = await run_stage(app, "predict", start_prediction, app, req, explain)
+    if shap_future is not None:
+        with stage("render.shap_png"):
+            response["plots"]["shap_png"] = await render_result_async(shap_future, timeout=RENDER_TIMEOUT)
+    return response
+
+
+async def run_batched_prediction(app, batcher, req):
+    """Single-row prediction scored together with concurrent requests for the same model."""
+    with stage("preprocess"):
+        processed = preprocess(req.features, req.model_name)
+    key = prediction_keys(app, req.model_name, processed)[0]
+    cache = _cache(app, "prediction")
+    prediction = cache.get(key) if key is not None else None
     try:
-        shap_b64 = generate_shap_plot(
-            model,
-            processed,
-            MODEL_FEATURES[req.model_name]
-        )
+        if prediction is None:
+            with stage("predict"):
+                prediction = await batcher.predict(processed[0])
+            if key is not None:
+                cache.set(key, prediction)
+    except ServiceUnavailableException:
+        raise
     except Exception as e:
-        shap_b64 = None  # don’t fail the endpoint if SHAP fails
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Model prediction failed: {str(e)}"
+        )
 
     return {
         "model": req.model_name,
         "features": req.features.model_dump(),
         "prediction": prediction,
-        "plots": {"shap_png": shap_b64},
+        "plots": {"shap_png": None},
+        "explanation": None,
+    }
+
+
+def batching_stats(app):
+    return {name: b.stats() for name, b in (getattr(app.state, "batchers", None) or {}).items()}
+
+
+def _batch_error(index, model_name, code, message):
+    return {
+        "index": index,
+        "model": model_name,
+        "prediction": None,
+        "plots": None,
+        "error": {"code": code, "message": message, "details": None},
+    }
+
+
+def run_batch_prediction(app, req):
+    """
+    Scores many rows in one call. Rows are grouped by model so every model
+    runs a single predict over a column-ordered matrix; results come back in
+    request order with a per-row error instead of failing the whole batch.
+    """
+
+    if len(req.items) > PREDICT_BATCH_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch too large: {len(req.items)} rows (max {PREDICT_BATCH_MAX_ROWS})"
+        )
+
+    results = [None] * len(req.items)
+    groups = {}
+
+    for i, item in enumerate(req.items):
+        if item.model_name not in app.state.models:
+            results[i] = _batch_error(i, item.model_name, "BAD_REQUEST", f"Unknown model: {item.model_name}")
+            continue
+        try:
+            with stage("preprocess"):
+                row = preprocess(item.features, item.model_name)[0]
+        except ValueError as e:
+            results[i] = _batch_error(i, item.model_name, "BAD_REQUEST", str(e))
+            continue
+        groups.setdefault(item.model_name, []).append((i, row))
+
+    for model_name, members in groups.items():
+        rows = [row for _, row in members]
+        keys = prediction_keys(app, model_name, rows)
+        model = app.state.models[model_name]
+
+        try:
+            predictions = predict_rows(app, model, keys, rows)
+        except Exception as e:
+            for i, _ in members:
+                results[i] = _batch_error(i, model_name, "INTERNAL_ERROR", f"Model prediction failed: {str(e)}")
+            continue
+
+        shap_pngs = [None] * len(rows)
+        if req.include_shap:
+            renderer = getattr(app.state, "renderer", None)
+            feature_names = MODEL_FEATURES[model_name]
+            try:
+                vectors = shap_vectors(app, model, keys, rows, feature_names)
+                with stage("render.shap_png"):
+                    futures = [
+                        submit_render(renderer, render_shap_waterfall, values, expected_value, row, feature_names)
+                        for (values, expected_value), row in zip(vectors, rows)
+                    ]
+                    shap_pngs = [render_result(f, timeout=RENDER_TIMEOUT) for f in futures]
+            except Exception:
+                pass  # SHAP is best effort, same as the single-row endpoint
+
+        for j, (i, _) in enumerate(members):
+            results[i] = {
+                "index": i,
+                "model": model_name,
+                "prediction": predictions[j],
+                "plots": {"shap_png": shap_pngs[j]},
+                "error": None,
+            }
+
+    return {
+        "results": results,
+        "count": len(results),
+        "failed": sum(1 for r in results if r["error"] is not None),
     }
+
+
+async def run_batch_prediction_async(app, req):
+    return await run_stage(app, "predict", run_batch_prediction, app, req)
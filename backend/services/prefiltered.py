@@ -1,34 +1,27 @@
 from fastapi import HTTPException, status
 from utils.historical_summary import filter_df_by_features
-import numpy as np
+from utils.facet_index import FACET_COLUMNS, distinct_sorted
+from utils.concurrency import run_stage
 
 def run_prefiltered(app, req):
   df = app.state.historical_sets.get(req.model_name)
 
   if df.empty:
-        return {
-            "Make": [],
-            "Model": [],
-            "Year": [],
-            "EngineSize": [],
-            "Distance":[],
-            "Months": []
-        }
-  
-  filtered = filter_df_by_features(df, req.features)
+        return {col: [] for col in FACET_COLUMNS}
+
+  # Answered from the precomputed combinations whenever the filters allow it
+  facets = getattr(app.state, "facet_index", {}).get(req.model_name)
+  data_dict = req.features.model_dump()
+  if facets is not None and facets.supports(data_dict):
+      return facets.options(data_dict)
+
+  index = getattr(app.state, "historical_index", {}).get(req.model_name)
+  filtered = filter_df_by_features(df, req.features, index=index)
   if filtered.empty:
-        return {
-            "Make": [],
-            "Model": [],
-            "Year": [],
-            "EngineSize": [],
-            "Distance":[],
-            "Months": []
-        }
-  
-  unique_vals = {}
-  for column in filtered.columns:
-      vals = filtered[column].dropna().unique().tolist()
-      unique_vals[column] = [v.item() if isinstance(v, (np.generic,)) else v for v in vals]
-    
-  return {col: unique_vals.get(col, []) for col in ["Make", "Model", "Year", "EngineSize", "Distance", "Months"]}
+        return {col: [] for col in FACET_COLUMNS}
+
+  return {col: distinct_sorted(filtered[col]) if col in filtered.columns else [] for col in FACET_COLUMNS}
+
+
+async def run_prefiltered_async(app, req):
+  return await run_stage(app, "filter", run_prefiltered, app, req)
@@ -0,0 +1,47 @@
+import asyncio
+from fastapi import HTTPException, status
+from services.prediction import start_prediction
+from services.historical import lookup_summary, compare_with_history, empty_historical_response, attach_plots
+from utils.concurrency import run_stage
+from utils.rendering import render_result_async
+from utils.timing import stage
+from config import RENDER_TIMEOUT
+
+
+async def run_quote(app, req, explain="none"):
+    """
+    Prediction and historical comparison in one call. The model and the
+    historical filter/summary run concurrently on their own stages; the
+    prediction is then compared against the summary and only the requested
+    plots are rendered.
+    """
+
+    if req.model_name not in app.state.models:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown model: {req.model_name}"
+        )
+
+    filters = req.filters or req.features
+    (prediction, shap_future), (entry, signature, message) = await asyncio.gather(
+        run_stage(app, "predict", start_prediction, app, req, explain),
+        run_stage(app, "filter", lookup_summary, app, req.model_name, filters),
+    )
+
+    plot_future = None
+    if entry is None:
+        historical = empty_historical_response(message)
+    else:
+        historical, plot_future, plot_key = await run_stage(
+            app, "filter", compare_with_history,
+            app, entry, signature, prediction["prediction"], req.features.Months, req.features.Distance, req.plots
+        )
+
+    # Both renders are already running; wait for whichever were started
+    if shap_future is not None:
+        with stage("render.shap_png"):
+            prediction["plots"]["shap_png"] = await render_result_async(shap_future, timeout=RENDER_TIMEOUT)
+    if plot_future is not None:
+        attach_plots(app, historical, await render_result_async(plot_future, timeout=RENDER_TIMEOUT), plot_key)
+
+    return {"prediction": prediction, "historical": historical}
@@ -1,24 +1,60 @@
 from fastapi import HTTPException, status
+from utils.registration_index import RegistrationIndex
+from utils.concurrency import run_stage
+from config import REGISTRATION_BATCH_MAX
 
-def lookup_registration(app, registration: str):
-    """
-    Looks up a car registration in the loaded dataset.
-    """
 
-    df = app.state.rego_data
-    if df.empty:
+def _rego_index(app):
+    """Index built at startup, or a throwaway one over rego_data if none was built."""
+    index = getattr(app.state, "rego_index", None)
+    if index is None:
+        index = RegistrationIndex(app.state.rego_data)
+    if len(index) == 0:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Registration data not loaded"
         )
-    print(df.shape)
-    
-    filtered = df[df["Registration"] == registration]
+    return index
+
+
+def lookup_registration(app, registration: str):
+    """
+    Looks up a car registration in the loaded dataset.
+    """
+
+    record = _rego_index(app).get(registration)
 
-    if filtered.empty:
+    if record is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Registration not found"
         )
 
-    return filtered.to_dict(orient="records")[0]
+    return record
+
+
+def lookup_registrations(app, registrations):
+    """
+    Looks up many registrations at once. Unknown registrations come back
+    with found=False instead of failing the whole request.
+    """
+
+    if len(registrations) > REGISTRATION_BATCH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch too large: {len(registrations)} registrations (max {REGISTRATION_BATCH_MAX})"
+        )
+
+    records = _rego_index(app).get_many(registrations)
+    return {
+        "results": [
+            {"registration": reg, "found": record is not None, "record": record}
+            for reg, record in zip(registrations, records)
+        ]
+    }
+
+
+async def lookup_registrations_async(app, registrations):
+    # Single lookups are a hash probe and stay on the event loop; a large batch
+    # builds thousands of records, so it goes to the filter stage
+    return await run_stage(app, "filter", lookup_registrations, app, registrations)
@@ -0,0 +1,227 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+
+from fastapi import HTTPException, status
+
+from config import MODEL_PATHS, DATA_PATHS, MODEL_FEATURES, FACET_CACHE_SIZE
+from models.loader import load_all_models, load_model_backends, load_historical_sets, load_rego_data
+from models.preprocess import preprocess
+from schemas.requests import CarFeatures
+from services.historical import create_historical_cache
+from services.prediction import clear_prediction_cache
+from utils.facet_index import build_facet_indexes
+from utils.historical_index import build_historical_indexes
+from utils.registration_index import build_registration_index
+
+logger = logging.getLogger(__name__)
+
+# A plausible vehicle every model must be able to price before it is swapped in
+SMOKE_FEATURES = CarFeatures(
+    TaskName="Brake service", Make="TOYOTA", Model="COROLLA", Year=2015, FuelType="Petrol",
+    Transmission="Automatic", EngineSize=1.8, DriveType="FWD", Distance=50000, Months=12,
+)
+
+# Columns every historical frame needs for filtering and price statistics
+REQUIRED_HISTORICAL_COLUMNS = ["Make", "Model", "AdjustedPrice"]
+
+
+# --- Versions ---
+
+def _digest(payload) -> str:
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
+def file_version(path) -> str:
+    """Short content hash of a model file; "missing" when it doesn't exist."""
+    if not os.path.exists(path):
+        return "missing"
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def data_version(path) -> str:
+    """Size + mtime stamp of a data CSV (hashing them on every reload would be slow)."""
+    if not os.path.exists(path):
+        return "missing"
+    stat = os.stat(path)
+    return _digest([stat.st_size, stat.st_mtime_ns])
+
+
+def model_versions() -> dict:
+    return {name: file_version(path) for name, path in MODEL_PATHS.items()}
+
+
+def data_versions() -> dict:
+    return {name: data_version(path) for name, path in DATA_PATHS.items()}
+
+
+def set_versions(app, models=None, data=None):
+    """Per-artifact versions plus one short combined version per kind, used in response headers."""
+    current = getattr(app.state, "versions", None) or {"models": {}, "datasets": {}}
+    models = models if models is not None else current["models"]
+    data = data if data is not None else current["datasets"]
+    app.state.versions = {
+        "model": _digest(models),
+        "data": _digest(data),
+        "models": models,
+        "datasets": data,
+    }
+
+
+# --- Loading and validation ---
+
+def validate_model(name, backend):
+    """Raises ValueError unless backend has the features config expects and prices SMOKE_FEATURES."""
+    expected = MODEL_FEATURES[name]
+    names = list(getattr(backend.model, "feature_names_", None) or [])
+    # Models fitted on plain lists carry CatBoost's default "0", "1", ... names
+    if names and not all(n.isdigit() for n in names) and names != expected:
+        raise ValueError(f"{name}: model features {names} do not match MODEL_FEATURES {expected}")
+    if names and len(names) != len(expected):
+        raise ValueError(f"{name}: model has {len(names)} features, MODEL_FEATURES lists {len(expected)}")
+
+    prediction = float(backend.predict(preprocess(SMOKE_FEATURES, name))[0])
+    if not math.isfinite(prediction):
+        raise ValueError(f"{name}: smoke prediction returned {prediction}")
+
+
+def load_validated_models() -> dict:
+    backends = load_model_backends(load_all_models())
+    for name, backend in backends.items():
+        validate_model(name, backend)
+    return backends
+
+
+def validate_historical_sets(sets):
+    for name, df in sets.items():
+        if df.empty:
+            continue  # a missing CSV serves "no historical data", as on startup
+        missing = [c for c in REQUIRED_HISTORICAL_COLUMNS if c not in df.columns]
+        if missing:
+            raise ValueError(f"{name}: historical data lacks columns {missing}")
+
+
+def build_historical_state(sets) -> dict:
+    """Everything derived from the historical frames, built off to the side before a swap."""
+    indexes = build_historical_indexes(sets)
+    return {
+        "historical_sets": sets,
+        "historical_index": indexes,
+        "facet_index": build_facet_indexes(sets, FACET_CACHE_SIZE, indexes),
+        # Entries describe the old frames, so the new data starts with empty caches
+        "historical_cache": create_historical_cache(),
+    }
+
+
+def install_state(app, state):
+    # Plain attribute assignments with no await in between: a request sees the old or the new set
+    for key, value in state.items():
+        setattr(app.state, key, value)
+
+
+# --- Reload ---
+
+def reload_artifacts(app, models: bool = True, data: bool = True) -> dict:
+    """
+    Loads and validates new models and/or historical data, then swaps them in.
+    Requests already holding the old objects finish on them. Nothing is
+    swapped if anything fails to load or validate. Returns app.state.versions.
+    """
+    if data and getattr(app.state, "shared_state", False):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Historical data is shared between workers; restart through launcher.py to refresh it"
+        )
+
+    try:
+        new_models, new_model_versions = None, None
+        if models:
+            new_model_versions = model_versions()
+            new_models = load_validated_models()
+
+        new_state, new_data_versions = None, None
+        if data:
+            new_data_versions = data_versions()
+            sets = load_historical_sets()
+            validate_historical_sets(sets)
+            new_state = build_historical_state(sets)
+            new_state["rego_index"] = build_registration_index(load_rego_data())
+    except (RuntimeError, ValueError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"Reload rejected, still serving the previous version: {e}"
+        )
+
+    if new_models is not None:
+        app.state.models = new_models
+    if new_state is not None:
+        install_state(app, new_state)
+    set_versions(app, new_model_versions, new_data_versions)
+    if new_models is not None:
+        clear_prediction_cache(app)
+    return app.state.versions
+
+
+async def reload_artifacts_async(app, models: bool = True, data: bool = True) -> dict:
+    """reload_artifacts off the event loop, one reload at a time."""
+    lock = app.state.reload_lock
+    if lock.locked():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A reload is already running")
+    async with lock:
+        return await asyncio.to_thread(reload_artifacts, app, models, data)
+
+
+# --- Watcher ---
+
+def artifact_stamps() -> dict:
+    stamps = {}
+    for kind, paths in (("models", MODEL_PATHS), ("data", DATA_PATHS)):
+        for name, path in paths.items():
+            try:
+                stat = os.stat(path)
+                stamps[(kind, name)] = (stat.st_size, stat.st_mtime_ns)
+            except FileNotFoundError:
+                stamps[(kind, name)] = None
+    return stamps
+
+
+def changed_kinds(before: dict, after: dict) -> set:
+    return {kind for (kind, name), stamp in after.items() if before.get((kind, name)) != stamp}
+
+
+async def watch_artifacts(app, interval: float):
+    """
+    Polls MODEL_PATHS / DATA_PATHS and reloads what changed. A change is
+    only acted on once the files have stopped changing for one interval,
+    so a CSV that is still being copied isn't loaded half-written.
+    """
+    seen = artifact_stamps()
+    while True:
+        await asyncio.sleep(interval)
+        current = artifact_stamps()
+        kinds = changed_kinds(seen, current)
+        if not kinds:
+            continue
+        await asyncio.sleep(interval)
+        settled = artifact_stamps()
+        if settled != current:
+            continue  # still being written; compare again next round
+        if getattr(app.state, "shared_state", False):
+            kinds.discard("data")
+        if kinds and app.state.reload_lock.locked():
+            continue  # an admin reload is running; look again afterwards
+        try:
+            if kinds:
+                versions = await reload_artifacts_async(app, models="models" in kinds, data="data" in kinds)
+                logger.info("Reloaded artifacts", extra={"kinds": sorted(kinds), "model_version": versions["model"], "data_version": versions["data"]})
+        except HTTPException as e:
+            # Rejected artifacts are not retried until they change again
+            logger.warning("Reload skipped", extra={"kinds": sorted(kinds), "reason": e.detail})
+        seen = settled
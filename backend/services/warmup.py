@@ -0,0 +1,69 @@
+import asyncio
+import logging
+import time
+
+from services.reload import validate_model
+from utils.plotting import warm_up_rendering
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up_models(app) -> dict:
+    """
+    Prices SMOKE_FEATURES once with every model (the same check a reload
+    runs), so CatBoost's first-evaluation setup is done before traffic.
+    Returns ms per model; a model that fails is logged and left serving,
+    as it would have been without the warm-up.
+    """
+    timings = {}
+    for name, backend in app.state.models.items():
+        start = time.perf_counter()
+        try:
+            validate_model(name, backend)
+        except Exception as e:
+            logger.warning("Model warm-up failed", extra={"model": name, "error": str(e)})
+            continue
+        timings[name] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+async def warm_up_renderer(app):
+    """
+    One warm-up render per render worker, so each process has imported
+    matplotlib and shap and built its font cache. Without a renderer the
+    plots are drawn inline but the SHAP waterfall is skipped, which keeps
+    shap out of the serving process until a request needs it. Returns ms,
+    or None if rendering failed.
+    """
+    renderer = getattr(app.state, "renderer", None)
+    try:
+        if renderer is None:
+            return await asyncio.to_thread(warm_up_rendering, False)
+        # Submitted together, so the pool starts one process per job
+        return max(await asyncio.gather(*(renderer.run(warm_up_rendering) for _ in range(renderer.workers))))
+    except Exception as e:
+        logger.warning("Render warm-up failed", extra={"error": str(e)})
+        return None
+
+
+async def _render_in_background(app, result):
+    result["render_ms"] = await warm_up_renderer(app)
+    logger.info("Render warm-up done", extra={"render_ms": result["render_ms"]})
+
+
+async def warm_up(app, render: str = "background") -> dict:
+    """
+    Warms the models, then the render workers: render="wait" includes them
+    in the time to ready, "background" starts them and returns (render_ms
+    fills in later, the task is app.state.render_warmup), "off" skips them.
+    Spawning render workers and importing shap there takes seconds, which
+    rolling restarts and autoscaling would otherwise wait for.
+    """
+    start = time.perf_counter()
+    result = {"models_ms": await asyncio.to_thread(warm_up_models, app), "render_ms": None}
+    if render == "wait":
+        result["render_ms"] = await warm_up_renderer(app)
+    elif render == "background":
+        app.state.render_warmup = asyncio.create_task(_render_in_background(app, result))
+    result["total_ms"] = (time.perf_counter() - start) * 1000
+    return result
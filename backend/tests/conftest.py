@@ -1,4 +1,6 @@
 import pytest
+import numpy as np
+import pandas as pd
 from httpx import AsyncClient
 from server import create_app
 
@@ -10,3 +12,27 @@ def app():
 async def client(app):
     async with AsyncClient(app=app, base_url="http://test") as ac:
         yield ac
+
+
+@pytest.fixture
+def historical_params():
+    """Shape of historical_df; override in a test module to change it"""
+    return {"rows": 2000, "seed": 0, "fuel_types": ["Petrol", "Diesel"]}
+
+
+@pytest.fixture
+def historical_df(historical_params):
+    """Random frame shaped like a preprocessed historical CSV, including NaNs"""
+    rng = np.random.default_rng(historical_params["seed"])
+    n = historical_params["rows"]
+    return pd.DataFrame({
+        "TaskName": rng.choice(["Logbook Service", "Brake Pads"], n),
+        "Make": rng.choice(["TOYOTA", "MAZDA", "FORD"], n),
+        "Model": rng.choice(["COROLLA", "CX-5", "RANGER"], n),
+        "Year": rng.integers(2010, 2016, n),
+        "FuelType": rng.choice(historical_params["fuel_types"], n),
+        "EngineSize": rng.choice([1.8, 2.0, 2.5, np.nan], n),
+        "Distance": rng.choice([10000.0, 20000.0, 50000.0], n),
+        "Months": rng.choice([6.0, 12.0, np.nan], n),
+        "AdjustedPrice": rng.uniform(100, 500, n).round(2),
+    })
@@ -0,0 +1,8 @@
+from schemas.requests import CarFeatures
+
+
+def features(**kwargs):
+    """CarFeatures with TaskName / Make / Model defaulting to None"""
+    base = {"TaskName": None, "Make": None, "Model": None}
+    base.update(kwargs)
+    return CarFeatures(**base)
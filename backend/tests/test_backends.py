@@ -0,0 +1,115 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from catboost import CatBoostRegressor
+
+from config import MODEL_FEATURES
+from models.backends import NativeBackend, CompiledBackend, create_backend, check_parity, frame_rows
+from models.evaluator import export_path_for
+
+FEATURES = MODEL_FEATURES["Logbook"]
+CATEGORICALS = ["Make", "Model", "FuelType", "Transmission", "DriveType"]
+
+
+@pytest.fixture(scope="module")
+def trained(tmp_path_factory):
+    """Small Logbook-shaped model with its training CSV and .cbm on disk."""
+    rng = np.random.default_rng(0)
+    n = 400
+    df = pd.DataFrame({
+        "Make": rng.choice(["TOYOTA", "MAZDA", "FORD", "KIA", "HOLDEN"], n),
+        "Model": rng.choice([f"M{i}" for i in range(12)], n),
+        "Year": rng.integers(2000, 2022, n).astype(float),
+        "FuelType": rng.choice(["Petrol", "Diesel", "Hybrid"], n),
+        "EngineSize": rng.uniform(1.0, 5.0, n).round(1),
+        "Transmission": rng.choice(["Automatic", "Manual"], n),
+        "DriveType": rng.choice(["FWD", "RWD", "AWD", "missing"], n),
+        "Distance": rng.uniform(1000, 200000, n).round(0),
+        "Months": rng.choice([6, 12, 24], n).astype(float),
+    })
+    df.loc[::17, "EngineSize"] = np.nan
+    price = 150 + 20 * df["EngineSize"].fillna(2) + df["Distance"] / 2000 + df["Make"].map(len) * 7
+    model = CatBoostRegressor(iterations=60, depth=4, verbose=0, cat_features=CATEGORICALS, allow_writing_files=False)
+    model.fit(df, price + rng.normal(0, 5, n))
+
+    directory = tmp_path_factory.mktemp("backend")
+    model_path, data_path = directory / "logbook_model.cbm", directory / "preprocessed_log_data.csv"
+    model.save_model(str(model_path))
+    df.assign(AdjustedPrice=price).to_csv(data_path, index=False)
+    return model, model_path, data_path, df
+
+
+def _request_rows(df):
+    rows = frame_rows(df.head(50))
+    # Unseen categories, the "missing" placeholder and None numerics as preprocess() can produce them
+    rows.append(["NEWMAKE", "NEWMODEL", 2015.0, "Electric", None, "CVT", "missing", 50000.0, 12.0])
+    rows.append(["TOYOTA", "M3", None, "Petrol", 2.0, "Manual", "FWD", None, None])
+    return rows
+
+
+# Test the compiled backend against CatBoost: ensures predictions match within tolerance
+def test_compiled_backend_parity(trained):
+    """Trained rows and unseen / missing inputs predict the same as native CatBoost."""
+    model, model_path, data_path, df = trained
+    compiled = create_backend("compiled", model, model_path, data_path, FEATURES)
+    native = create_backend("native", model)
+
+    assert isinstance(compiled, CompiledBackend) and isinstance(native, NativeBackend)
+    report = check_parity(native, compiled.evaluator, _request_rows(df))
+    assert report["ok"], report
+    assert report["max_abs_diff"] < 1e-6
+    assert np.allclose(native.predict(_request_rows(df)), model.predict(_request_rows(df)))
+
+
+# Test large batches on the compiled backend: ensures they are handed to CatBoost
+def test_compiled_backend_routes_large_batches(trained, monkeypatch):
+    """Above max_rows the evaluator is skipped; small inputs never reach CatBoost."""
+    model, model_path, data_path, df = trained
+    compiled = create_backend("compiled", model, model_path, data_path, FEATURES)
+    rows = _request_rows(df)
+    calls = []
+    monkeypatch.setattr(compiled.evaluator, "predict", lambda r: calls.append(len(r)) or np.zeros(len(r)))
+
+    compiled.predict(rows[:1])
+    assert calls == [1]
+    assert np.allclose(compiled.predict(rows[:compiled.max_rows + 1]), model.predict(rows[:compiled.max_rows + 1]))
+    assert calls == [1]
+
+
+# Test export reuse: ensures the export is regenerated only when the .cbm is newer
+def test_compiled_export_reused_until_model_changes(trained):
+    """A current export is loaded as is; touching the .cbm forces a fresh one."""
+    model, model_path, data_path, df = trained
+    create_backend("compiled", model, model_path, data_path, FEATURES)
+    export = export_path_for(model_path)
+    stamp = export.stat().st_mtime
+
+    create_backend("compiled", model, model_path, data_path, FEATURES)
+    assert export.stat().st_mtime == stamp
+
+    os.utime(model_path, (stamp + 10, stamp + 10))
+    create_backend("compiled", model, model_path, data_path, FEATURES)
+    assert export.stat().st_mtime > stamp
+
+
+# Test SHAP through a backend: ensures explanations still come from the CatBoost model
+def test_compiled_backend_keeps_shap(trained):
+    """compute_shap_values works unchanged on a compiled backend."""
+    from utils.plotting import compute_shap_values
+
+    model, model_path, data_path, df = trained
+    compiled = create_backend("compiled", model, model_path, data_path, FEATURES)
+    rows = _request_rows(df)[-2:]
+    values, expected = compute_shap_values(compiled, rows, FEATURES)
+
+    assert values.shape == (2, len(FEATURES))
+    assert np.allclose(values.sum(axis=1) + expected, compiled.predict(rows), atol=1e-6)
+
+
+# Test an unknown backend kind: ensures a clear configuration error
+def test_unknown_backend_kind(trained):
+    """Misspelt MODEL_BACKEND values fail at startup instead of serving silently."""
+    with pytest.raises(ValueError):
+        create_backend("onnx-gpu", trained[0])
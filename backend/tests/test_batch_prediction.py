@@ -0,0 +1,112 @@
+import pytest
+from types import SimpleNamespace
+from fastapi import HTTPException
+
+from services.prediction import run_batch_prediction
+from schemas.requests import BatchPredictRequest
+
+
+@pytest.fixture
+def fake_app():
+    """Fake FastAPI app with a models dictionary in state"""
+    class App:
+        state = SimpleNamespace()
+    return App()
+
+
+class RecordingModel:
+    """Returns the Year of each row as its prediction and records every call"""
+    def __init__(self, year_index):
+        self.year_index = year_index
+        self.calls = []
+
+    def predict(self, rows):
+        self.calls.append(rows)
+        return [float(row[self.year_index]) for row in rows]
+
+
+def make_item(model_name, year):
+    return {
+        "model_name": model_name,
+        "features": {"TaskName": None, "Make": "TOYOTA", "Model": "TOYOTA COROLLA", "Year": year},
+    }
+
+
+@pytest.fixture(autouse=True)
+def patch_shap(monkeypatch):
+    monkeypatch.setattr("services.prediction.compute_shap_values", lambda model, rows, names: ([[0.0]] * len(rows), 0.0))
+    monkeypatch.setattr("services.prediction.render_shap_waterfall", lambda *a, **kw: "fake_shap")
+
+
+# Test grouping by model: ensures each model is called once and results keep request order
+def test_batch_groups_by_model(fake_app):
+    """Mixed-model batch -> one predict per model, results in request order"""
+    capped, logbook = RecordingModel(2), RecordingModel(2)
+    fake_app.state.models = {"Capped": capped, "Logbook": logbook}
+
+    req = BatchPredictRequest(items=[
+        make_item("Capped", 2010),
+        make_item("Logbook", 2011),
+        make_item("Capped", 2012),
+    ])
+    result = run_batch_prediction(fake_app, req)
+
+    assert len(capped.calls) == 1 and len(capped.calls[0]) == 2
+    assert len(logbook.calls) == 1 and len(logbook.calls[0]) == 1
+    assert [r["prediction"] for r in result["results"]] == [2010.0, 2011.0, 2012.0]
+    assert [r["index"] for r in result["results"]] == [0, 1, 2]
+    assert result["failed"] == 0
+    assert result["results"][0]["plots"]["shap_png"] is None
+
+
+# Test unknown models inside a batch: ensures only the bad row fails
+def test_batch_unknown_model_row(fake_app):
+    """Unknown model -> per-row error, other rows still scored"""
+    fake_app.state.models = {"Capped": RecordingModel(2)}
+
+    req = BatchPredictRequest(items=[make_item("Nope", 2010), make_item("Capped", 2011)])
+    result = run_batch_prediction(fake_app, req)
+
+    assert result["results"][0]["error"]["code"] == "BAD_REQUEST"
+    assert "Unknown model" in result["results"][0]["error"]["message"]
+    assert result["results"][1]["prediction"] == 2011.0
+    assert result["failed"] == 1
+
+
+# Test model failure inside a batch: ensures every row of the failing group gets an error
+def test_batch_model_predict_fails(fake_app):
+    """Model.predict raises -> rows for that model carry an error"""
+    class BrokenModel:
+        def predict(self, rows):
+            raise ValueError("prediction failed")
+
+    fake_app.state.models = {"Capped": BrokenModel(), "Logbook": RecordingModel(2)}
+
+    req = BatchPredictRequest(items=[make_item("Capped", 2010), make_item("Logbook", 2011)])
+    result = run_batch_prediction(fake_app, req)
+
+    assert "Model prediction failed" in result["results"][0]["error"]["message"]
+    assert result["results"][1]["prediction"] == 2011.0
+
+
+# Test opt-in SHAP: ensures plots are only produced when requested
+def test_batch_include_shap(fake_app):
+    """include_shap=True -> every successful row has a SHAP plot"""
+    fake_app.state.models = {"Capped": RecordingModel(2)}
+
+    req = BatchPredictRequest(items=[make_item("Capped", 2010)], include_shap=True)
+    result = run_batch_prediction(fake_app, req)
+
+    assert result["results"][0]["plots"]["shap_png"] == "fake_shap"
+
+
+# Test batch size limit: ensures oversized batches are rejected up front
+def test_batch_too_large(fake_app, monkeypatch):
+    """More rows than PREDICT_BATCH_MAX_ROWS -> HTTP 400"""
+    monkeypatch.setattr("services.prediction.PREDICT_BATCH_MAX_ROWS", 1)
+    fake_app.state.models = {"Capped": RecordingModel(2)}
+
+    req = BatchPredictRequest(items=[make_item("Capped", 2010), make_item("Capped", 2011)])
+    with pytest.raises(HTTPException) as exc:
+        run_batch_prediction(fake_app, req)
+    assert exc.value.status_code == 400
@@ -0,0 +1,116 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+
+from schemas.requests import PredictRequest, CarFeatures
+from services.prediction import run_prediction_async
+from utils.batching import MicroBatcher, create_batchers
+from utils.concurrency import create_executors
+from utils.metrics import Histogram
+
+
+class RecordingModel:
+    """Fake model: predicts the row's Distance and records every batch it sees"""
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, rows):
+        self.calls.append(len(rows))
+        return [row[0] for row in rows]
+
+
+def _req(distance, model_name="Capped"):
+    return PredictRequest(model_name=model_name, features=CarFeatures(TaskName=None, Make="TOYOTA", Model="COROLLA", Distance=distance))
+
+
+async def slow_run(fn, rows):
+    """Stands in for the predict stage: each batch takes a while"""
+    await asyncio.sleep(0.02)
+    return fn(rows)
+
+
+# Test coalescing: ensures rows arriving during a running batch share the next predict call
+def test_concurrent_rows_share_one_predict():
+    """First row goes alone, the nine queued behind it -> one predict(rows), each caller gets its own value"""
+    model = RecordingModel()
+    batcher = MicroBatcher("m", model.predict, window=1, max_batch=64, run=slow_run)
+
+    async def scenario():
+        return await asyncio.gather(*[batcher.predict([float(i)]) for i in range(10)])
+
+    assert asyncio.run(scenario()) == [float(i) for i in range(10)]
+    assert model.calls == [1, 9]
+    stats = batcher.stats()
+    assert stats["batch_size"]["count"] == 2 and stats["batch_size"]["sum"] == 10
+    assert stats["queue_wait_ms"]["count"] == 10
+
+
+# Test the idle path: ensures a lone request is scored without waiting for the window
+def test_idle_batcher_does_not_wait():
+    """No batch running -> predicted immediately even with a long window"""
+    model = RecordingModel()
+    batcher = MicroBatcher("m", model.predict, window=10, max_batch=64)
+    assert asyncio.run(asyncio.wait_for(batcher.predict([3.0]), 1)) == 3.0
+    assert model.calls == [1]
+
+
+# Test the size cap: ensures a full queue is flushed without waiting for the running batch
+def test_max_batch_flushes_early():
+    """max_batch rows queued behind a running batch -> dispatched at once"""
+    model = RecordingModel()
+    batcher = MicroBatcher("m", model.predict, window=10, max_batch=4, run=slow_run)
+
+    async def scenario():
+        return await asyncio.wait_for(asyncio.gather(*[batcher.predict([1.0]) for _ in range(9)]), 1)
+
+    assert asyncio.run(scenario()) == [1.0] * 9
+    assert model.calls == [1, 4, 4]
+
+
+# Test failure fan-out: ensures every caller in a failed batch sees the error
+def test_failed_batch_raises_for_every_caller():
+    """predict raising -> all waiting callers get the exception"""
+    def broken(rows):
+        raise RuntimeError("model exploded")
+    batcher = MicroBatcher("m", broken, window=0.001, max_batch=8)
+
+    async def scenario():
+        return await asyncio.gather(*[batcher.predict([1.0]) for _ in range(3)], return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+# Test the service path: ensures /predict uses the batcher only when no SHAP output is requested
+def test_run_prediction_async_uses_batcher(monkeypatch):
+    """explain=none -> batched on the predict stage; explain=values -> the direct path"""
+    monkeypatch.setattr("services.prediction.preprocess", lambda features, name: [[features.Distance]])
+    monkeypatch.setattr("services.prediction.explain_values", lambda *a: None)
+    model = RecordingModel()
+    app = SimpleNamespace(state=SimpleNamespace(models={"Capped": model}))
+    app.state.executors = create_executors({"predict": (2, 16)})
+    app.state.batchers = create_batchers(app, window_ms=5, max_batch=64)
+
+    async def scenario():
+        batched = await asyncio.gather(*[run_prediction_async(app, _req(d)) for d in (100, 200, 300)])
+        direct = await run_prediction_async(app, _req(400), explain="values")
+        return batched, direct
+
+    try:
+        batched, direct = asyncio.run(scenario())
+    finally:
+        app.state.executors["predict"].shutdown()
+    assert [r["prediction"] for r in batched] == [100, 200, 300]
+    assert direct["prediction"] == 400
+    assert model.calls == [1, 2, 1]
+
+
+# Test histogram buckets: ensures snapshots are cumulative with an +Inf bucket
+def test_histogram_snapshot_is_cumulative():
+    """observations land in the first bucket whose bound is >= the value"""
+    h = Histogram([1, 5])
+    for v in (0.5, 1, 3, 9):
+        h.observe(v)
+    snap = h.snapshot()
+    assert snap["buckets"] == {"1": 2, "5": 3, "+Inf": 4}
+    assert snap["count"] == 4 and snap["sum"] == pytest.approx(13.5)
@@ -0,0 +1,49 @@
+import numpy as np
+
+from benchmarks import synthetic
+from benchmarks.suite import compare, parse_rows
+
+
+# Test the synthetic generator: ensures rows look like the preprocessed CSVs
+def test_historical_chunk_shape():
+    """Right columns, ids continue from first_id, service-only columns left empty for Repair"""
+    catalogue = synthetic.vehicle_catalogue(variants=200)
+    rng = np.random.default_rng(0)
+    logbook = synthetic.historical_chunk("Logbook", catalogue, 500, rng, first_id=1000)
+    repair = synthetic.historical_chunk("Repair", catalogue, 500, rng)
+
+    assert list(logbook.columns) == synthetic.HISTORICAL_COLUMNS
+    assert logbook["BTicketID"].tolist() == list(range(1000, 1500))
+    assert logbook["Months"].notna().all() and (logbook["AdjustedPrice"] > 0).all()
+    assert repair["Distance"].isna().all() and repair["Months"].isna().all()
+    # Popularity is skewed, so some vehicles repeat many times
+    assert logbook.groupby(["Make", "Model"]).size().max() > 10
+
+
+# Test registrations: ensures generated plates are unique across chunks
+def test_rego_chunk_unique_plates():
+    """Plates come from the row id, so chunks with different first_id never collide"""
+    catalogue = synthetic.vehicle_catalogue(variants=50)
+    rng = np.random.default_rng(0)
+    plates = [
+        *synthetic.rego_chunk(catalogue, 1000, rng)["Registration"],
+        *synthetic.rego_chunk(catalogue, 1000, rng, first_id=1000)["Registration"],
+    ]
+    assert len(set(plates)) == 2000
+    assert all(len(p) == 7 for p in plates)
+
+
+# Test result comparison: ensures only metrics slower beyond the threshold are flagged
+def test_compare_flags_regressions():
+    """p50 up 50% -> flagged; within threshold or faster -> not; throughput drop -> flagged"""
+    baseline = {
+        "micro": {"a": {"p50_ms": 1.0}, "b": {"p50_ms": 2.0}, "c": {"p50_ms": 3.0}},
+        "load": {"throughput_rps": 100.0, "endpoints": {"predict": {"p95_ms": 10.0}}},
+    }
+    current = {
+        "micro": {"a": {"p50_ms": 1.5}, "b": {"p50_ms": 2.1}, "c": {"p50_ms": 1.0}, "new": {"p50_ms": 9.0}},
+        "load": {"throughput_rps": 50.0, "endpoints": {"predict": {"p95_ms": 10.0}}},
+    }
+    regressions = compare(baseline, current, threshold=0.15)
+    assert [r["metric"] for r in regressions] == ["load/seconds_per_1k_requests", "micro/a/p50_ms"]
+    assert parse_rows("1M") == 1_000_000 and parse_rows("2500") == 2500
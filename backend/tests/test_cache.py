@@ -0,0 +1,65 @@
+import threading
+from utils.cache import TTLCache, canonical_key
+
+
+# Test LRU eviction: ensures the least recently used entry is dropped first
+def test_lru_eviction():
+    """Cache over maxsize -> oldest untouched key evicted"""
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+# Test TTL expiry: ensures expired entries count as misses
+def test_ttl_expiry(monkeypatch):
+    """Entry older than ttl -> miss"""
+    now = [100.0]
+    monkeypatch.setattr("utils.cache.time.monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=4, ttl=10)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    now[0] += 11
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+# Test cached None values: ensures a stored None is distinguishable from a miss
+def test_cached_none_with_default():
+    """Stored None -> returned instead of the default"""
+    cache = TTLCache()
+    cache.set("empty", None)
+    assert cache.get("empty", False) is None
+    assert cache.get("other", False) is False
+
+
+# Test thread safety: ensures concurrent writers keep the size bound
+def test_concurrent_access():
+    """Many threads setting keys -> size never exceeds maxsize"""
+    cache = TTLCache(maxsize=50)
+
+    def worker(offset):
+        for i in range(500):
+            cache.set((offset, i), i)
+            cache.get((offset, i - 1))
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(cache) == 50
+
+
+# Test key canonicalisation: ensures dict ordering does not change the key
+def test_canonical_key_order_independent():
+    assert canonical_key("Capped", {"Make": "A", "Year": 1}) == canonical_key("Capped", {"Year": 1, "Make": "A"})
+    assert canonical_key("Capped", {"Make": "A"}) != canonical_key("Logbook", {"Make": "A"})
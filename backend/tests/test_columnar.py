@@ -0,0 +1,98 @@
+import os
+import pytest
+import numpy as np
+import pandas as pd
+
+from models.columnar import load_columnar, cache_dir_for, HISTORICAL_CATEGORICALS
+from schemas.requests import CarFeatures
+from utils.historical_summary import filter_df_by_features
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    """Small CSV shaped like a preprocessed historical file"""
+    rng = np.random.default_rng(1)
+    n = 500
+    df = pd.DataFrame({
+        "TaskName": rng.choice(["Logbook Service", "Brake Pads"], n),
+        "Make": rng.choice(["TOYOTA", "MAZDA"], n),
+        "Model": rng.choice(["COROLLA", "CX-5", "86"], n),
+        "Year": rng.integers(2010, 2016, n),
+        "FuelType": rng.choice(["Petrol", "Diesel", None], n),
+        "EngineSize": rng.choice([1.8, 2.0, 2.5], n),
+        "Distance": rng.choice([10000.0, 20000.0, np.nan], n),
+        "AdjustedPrice": rng.uniform(100, 500, n).round(2),
+    })
+    path = tmp_path / "preprocessed_test_data.csv"
+    df.to_csv(path, index=False)
+    return path
+
+
+# Test compact schema: ensures categoricals and lossless downcasts are applied
+def test_compact_dtypes(csv_path):
+    """Text columns -> category, ints shrink, floats only shrink when exact"""
+    df = load_columnar(csv_path, HISTORICAL_CATEGORICALS)
+
+    for col in ["TaskName", "Make", "Model", "FuelType"]:
+        assert isinstance(df[col].dtype, pd.CategoricalDtype)
+    assert df["Year"].dtype == np.int16
+    assert df["Distance"].dtype == np.float32   # 10000.0 / 20000.0 are exact in float32
+    assert df["EngineSize"].dtype == np.float64  # 1.8 is not
+    assert df["AdjustedPrice"].dtype == np.float64
+
+
+# Test value parity: ensures the compact frame holds the same data as a plain read
+def test_values_match_plain_read(csv_path):
+    """Compact frame -> same values as pd.read_csv"""
+    plain = pd.read_csv(csv_path)
+    compact = load_columnar(csv_path, HISTORICAL_CATEGORICALS)
+
+    assert list(compact.columns) == list(plain.columns)
+    for col in plain.columns:
+        expected = plain[col].astype(object).where(plain[col].notna(), None).tolist()
+        result = compact[col].astype(object).where(compact[col].notna(), None).tolist()
+        assert result == expected, col
+
+
+# Test cache reuse: ensures later loads skip CSV parsing and memory-map the columns
+def test_second_load_uses_cache(csv_path, monkeypatch):
+    """Cache present and fingerprint unchanged -> no read_csv, mmap-backed arrays"""
+    load_columnar(csv_path, HISTORICAL_CATEGORICALS)
+    assert (cache_dir_for(csv_path) / "manifest.json").exists()
+
+    monkeypatch.setattr("models.columnar.pd.read_csv", lambda *a, **kw: pytest.fail("CSV re-parsed"))
+    df = load_columnar(csv_path, HISTORICAL_CATEGORICALS)
+
+    base = df["AdjustedPrice"].to_numpy()
+    while base is not None and not isinstance(base, np.memmap):
+        base = base.base
+    assert isinstance(base, np.memmap)
+
+
+# Test invalidation: ensures a changed CSV rebuilds the cache
+def test_changed_csv_rebuilds(csv_path):
+    """CSV rewritten with a new mtime -> fresh data returned"""
+    first = load_columnar(csv_path, HISTORICAL_CATEGORICALS)
+
+    pd.read_csv(csv_path).head(10).to_csv(csv_path, index=False)
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    second = load_columnar(csv_path, HISTORICAL_CATEGORICALS)
+    assert len(first) == 500
+    assert len(second) == 10
+
+
+# Test filtering on compact frames: ensures categorical / downcast columns filter like the originals
+def test_filter_parity_on_compact_frame(csv_path):
+    """filter_df_by_features -> same rows on compact and plain frames"""
+    plain = pd.read_csv(csv_path)
+    compact = load_columnar(csv_path, HISTORICAL_CATEGORICALS)
+    car = CarFeatures(TaskName=None, Make="TOYOTA", Model="COROLLA", FuelType="Petrol", Distance=20000, EngineSize=1.8)
+
+    expected = filter_df_by_features(plain, car, required_keys=["Make", "Model"])
+    result = filter_df_by_features(compact, car, required_keys=["Make", "Model"])
+
+    assert len(expected) > 0
+    assert list(result.index) == list(expected.index)
+    assert np.array_equal(result["AdjustedPrice"].to_numpy(), expected["AdjustedPrice"].to_numpy())
@@ -0,0 +1,52 @@
+import asyncio
+import threading
+import pytest
+from types import SimpleNamespace
+
+from utils.concurrency import StageExecutor, run_stage
+from utils.errors import ServiceUnavailableException
+
+
+@pytest.fixture
+def stage():
+    """One worker, room for two jobs"""
+    executor = StageExecutor("test", workers=1, max_pending=2)
+    yield executor
+    executor.shutdown()
+
+
+# Test offload: ensures work runs on the stage's own threads, not the caller's
+def test_runs_on_stage_thread(stage):
+    """run() -> result computed on a 'test-stage' thread"""
+    name = asyncio.run(stage.run(lambda: threading.current_thread().name))
+    assert name.startswith("test-stage")
+    assert stage.pending == 0
+
+
+# Test load shedding: ensures a full stage answers 503 immediately instead of queueing
+def test_full_stage_returns_503(stage):
+    """max_pending jobs in flight -> ServiceUnavailableException with Retry-After"""
+    gate = threading.Event()
+    app = SimpleNamespace(state=SimpleNamespace(executors={"filter": stage}))
+
+    async def scenario():
+        blocked = [asyncio.ensure_future(run_stage(app, "filter", gate.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(ServiceUnavailableException) as exc:
+            await run_stage(app, "filter", abs, -1)
+        gate.set()
+        await asyncio.gather(*blocked)
+        return exc.value
+
+    exc = asyncio.run(scenario())
+    assert exc.status_code == 503
+    assert exc.headers["Retry-After"] == "1"
+    assert stage.stats()["rejected"] == 1
+    assert stage.pending == 0
+
+
+# Test fallback: ensures apps without executors (tests, scripts) still run the work inline
+def test_run_stage_inline_without_executors():
+    """No app.state.executors -> fn called directly"""
+    app = SimpleNamespace(state=SimpleNamespace())
+    assert asyncio.run(run_stage(app, "predict", abs, -4)) == 4
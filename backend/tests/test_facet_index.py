@@ -0,0 +1,76 @@
+import pytest
+import pandas as pd
+
+from models.columnar import compact_frame, HISTORICAL_CATEGORICALS
+from utils.facet_index import FacetIndex, FACET_COLUMNS
+from utils.historical_summary import filter_df_by_features
+from tests.helpers import features
+
+
+@pytest.fixture
+def historical_params():
+    """More rows than the default frame, with repeated combinations and missing FuelType"""
+    return {"rows": 3000, "seed": 3, "fuel_types": ["Petrol", "Diesel", None]}
+
+
+CASES = [
+    features(),
+    features(Make="TOYOTA"),
+    features(Make="TOYOTA", Model="COROLLA"),
+    features(Make="MAZDA", Model="CX-5", Year=2012, EngineSize=2.0),
+    features(Make="FORD", Model="RANGER", TaskName="Brake Pads", Distance=50000, Months=12),
+    features(Year=2014, FuelType="Diesel"),
+    features(Make="TOYOTA", Model="UNKNOWN"),
+]
+
+
+def expected_options(df, car):
+    """Reference: scan the whole frame, then sorted distinct values per column"""
+    filtered = filter_df_by_features(df, car)
+    return {col: sorted(filtered[col].dropna().unique().tolist()) for col in FACET_COLUMNS}
+
+
+# Test option parity: ensures facet lookups equal a full-frame scan, sorted
+@pytest.mark.parametrize("car", CASES)
+def test_options_match_full_scan(historical_df, car):
+    """Plain and compact frames -> same options as filtering the frame directly"""
+    expected = expected_options(historical_df, car)
+
+    assert FacetIndex(historical_df).options(car.model_dump()) == expected
+    compact = compact_frame(historical_df, HISTORICAL_CATEGORICALS)
+    assert FacetIndex(compact).options(car.model_dump()) == expected
+
+
+# Test combination table: ensures the index holds distinct combinations, not rows
+def test_combinations_are_deduplicated(historical_df):
+    """Repeated rows collapse to one combination; repeat lookups served from the cache"""
+    repeated = pd.concat([historical_df] * 4, ignore_index=True)
+    facets = FacetIndex(repeated)
+    assert len(facets) <= len(historical_df)
+
+    data = features(Make="TOYOTA", Model="COROLLA").model_dump()
+    first = facets.options(data)
+    assert facets.options(data) is first
+    assert facets.cache.stats()["hits"] >= 1
+
+
+# Test mostly-unique frames: ensures no second copy is made when deduplication barely helps
+def test_unique_rows_search_frame(historical_df):
+    """Every row distinct -> the frame (and a given HistoricalIndex) is reused"""
+    from utils.historical_index import HistoricalIndex
+
+    unique = historical_df.drop_duplicates(subset=FACET_COLUMNS + ["TaskName", "FuelType"], ignore_index=True)
+    index = HistoricalIndex(unique)
+    facets = FacetIndex(unique, index=index)
+
+    assert facets.combos is unique
+    assert facets.index is index
+    car = features(Make="MAZDA", Model="CX-5")
+    assert facets.options(car.model_dump()) == expected_options(unique, car)
+
+
+# Test unsupported filters: ensures price filters are left to the full scan
+def test_price_filter_not_supported(historical_df):
+    facets = FacetIndex(historical_df)
+    assert facets.supports(features(Make="TOYOTA").model_dump())
+    assert not facets.supports(features(Make="TOYOTA", AdjustedPrice=120.0).model_dump())
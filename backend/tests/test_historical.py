@@ -39,12 +39,12 @@ def fake_req():
 @pytest.fixture(autouse=True)
 def patch_historical_services(monkeypatch):
     # Patch all external dependencies used in run_historical_summary
-    monkeypatch.setattr("services.historical.filter_df_by_features", lambda df, f: df)
-    monkeypatch.setattr("services.historical.build_price_summary", lambda df: {"mean": 200})
-    monkeypatch.setattr("services.historical.compare_price", lambda pred, summary, prices: {"diff": 0})
+    monkeypatch.setattr("services.historical.filter_df_by_features", lambda df, f, **kw: df)
+    monkeypatch.setattr("services.historical.build_price_summary", lambda df, **kw: {"mean": 200})
+    monkeypatch.setattr("services.historical.compare_price", lambda pred, summary, prices, **kw: {"diff": 0})
     monkeypatch.setattr(
         "services.historical.get_all_price_plots", 
-        lambda df, pred, m, d: {"boxplot_png": "data", "histogram_png": "data", "month_vs_price_png": "data", "distance_vs_price_png": "data"}
+        lambda df, pred, m, d, **kw: {"boxplot_png": "data", "histogram_png": "data", "month_vs_price_png": "data", "distance_vs_price_png": "data"}
     )
 
 # Test handling of invalid model names: ensures proper error response when the model does not exist
@@ -69,7 +69,7 @@ def test_empty_filtered(fake_app, fake_req, monkeypatch):
     fake_app.state.historical_sets = {"test_model": df}
 
     # Return empty DataFrame after filtering
-    monkeypatch.setattr("services.historical.filter_df_by_features", lambda df, f: pd.DataFrame())
+    monkeypatch.setattr("services.historical.filter_df_by_features", lambda df, f, **kw: pd.DataFrame())
     result = run_historical_summary(fake_app, fake_req)
 
     assert result["summary"] is None
@@ -99,3 +99,49 @@ def test_plotting_exception(fake_app, fake_req, monkeypatch):
 
     assert result["plots"]["boxplot_png"] is None
     assert result["message"] == "Historical summary computed successfully"
+
+# Test summary / plot caching: ensures repeat requests skip filtering and plotting
+def test_cache_hit_skips_work(fake_app, fake_req, monkeypatch):
+    from services.historical import create_historical_cache, historical_cache_stats
+
+    df = pd.DataFrame({"AdjustedPrice": [100, 200, 300]})
+    fake_app.state.historical_sets = {"test_model": df}
+    fake_app.state.historical_cache = create_historical_cache()
+
+    calls = {"filter": 0, "plots": 0}
+
+    def counting_filter(df, f, **kw):
+        calls["filter"] += 1
+        return df
+
+    def counting_plots(*a, **kw):
+        calls["plots"] += 1
+        return {"boxplot_png": "data"}
+
+    monkeypatch.setattr("services.historical.filter_df_by_features", counting_filter)
+    monkeypatch.setattr("services.historical.get_all_price_plots", counting_plots)
+
+    first = run_historical_summary(fake_app, fake_req)
+    second = run_historical_summary(fake_app, fake_req)
+
+    assert first == second
+    assert calls == {"filter": 1, "plots": 1}
+    assert historical_cache_stats(fake_app)["summary"]["hits"] == 1
+    assert historical_cache_stats(fake_app)["plots"]["hits"] == 1
+
+# Test async path: ensures the executor-backed variant returns the same response as the sync one
+def test_async_matches_sync(fake_app, fake_req):
+    import asyncio
+    from services.historical import run_historical_summary_async
+    from utils.concurrency import create_executors
+
+    df = pd.DataFrame({"AdjustedPrice": [100, 200, 300]})
+    fake_app.state.historical_sets = {"test_model": df}
+    fake_app.state.executors = create_executors({"filter": (1, 4)})
+
+    try:
+        result = asyncio.run(run_historical_summary_async(fake_app, fake_req))
+    finally:
+        fake_app.state.executors["filter"].shutdown()
+
+    assert result == run_historical_summary(fake_app, fake_req)
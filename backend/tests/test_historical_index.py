@@ -0,0 +1,74 @@
+import pytest
+import numpy as np
+
+from utils.historical_index import HistoricalIndex
+from utils.historical_summary import filter_df_by_features
+from tests.helpers import features
+
+
+CASES = [
+    features(Make="TOYOTA", Model="COROLLA"),
+    features(Make="TOYOTA", Model="COROLLA", Year=2012, EngineSize=1.8),
+    features(Make="MAZDA", Model="CX-5", Distance=50000, Months=12, FuelType="Diesel"),
+    features(Make="FORD", Model="RANGER", TaskName="Brake Pads", Year=2015, EngineSize=2.5),
+    features(Make="TOYOTA", Model="UNKNOWN"),
+    features(Make="FORD", Year=2011),
+]
+
+
+# Test index parity: ensures the partitioned path returns exactly what the full-frame mask returns
+@pytest.mark.parametrize("car", CASES)
+def test_index_matches_full_scan(historical_df, car):
+    """Indexed filtering -> identical rows, order and index to the unindexed path"""
+    index = HistoricalIndex(historical_df)
+    required = ["Make", "Model"] if car.Model is not None else []
+
+    expected = filter_df_by_features(historical_df, car, required_keys=required)
+    result = filter_df_by_features(historical_df, car, required_keys=required, index=index)
+
+    assert result.equals(expected)
+    assert list(result.index) == list(expected.index)
+
+
+# Test requests without Make: ensures the index declines and the full scan is used
+def test_index_declines_without_make(historical_df):
+    """No Make in the request -> select returns None"""
+    index = HistoricalIndex(historical_df)
+    assert index.select(features(Year=2012).model_dump()) is None
+
+
+# Test stale index: ensures an index built for another frame is ignored
+def test_index_for_other_frame_ignored(historical_df):
+    """Index over a different DataFrame -> falls back to the mask"""
+    index = HistoricalIndex(historical_df.copy())
+    car = features(Make="TOYOTA", Model="COROLLA")
+
+    result = filter_df_by_features(historical_df, car, required_keys=["Make", "Model"], index=index)
+    assert result.equals(filter_df_by_features(historical_df, car, required_keys=["Make", "Model"]))
+
+
+# Test presorted partition prices: ensures summary and percentile match the per-request computation
+@pytest.mark.parametrize("car", [features(Make="TOYOTA", Model="COROLLA"), features(Make="MAZDA")])
+def test_partition_prices_match_summary(historical_df, car):
+    """Partition prices -> same summary and comparison as sorting the filtered rows"""
+    from utils.historical_summary import build_price_summary, compare_price
+
+    df = historical_df.copy()
+    df.loc[df.index[::97], "AdjustedPrice"] = np.nan
+    index = HistoricalIndex(df)
+    filtered = filter_df_by_features(df, car, index=index)
+
+    prices = index.sorted_prices(car.model_dump())
+    assert prices is not None
+
+    summary = build_price_summary(filtered)
+    assert build_price_summary(filtered, sorted_prices=prices) == summary
+    for predicted in [150.0, 299.99, 1000.0]:
+        assert compare_price(predicted, summary, prices, presorted=True) == compare_price(predicted, summary, filtered["AdjustedPrice"])
+
+
+# Test narrower filters: ensures partition prices are only used for whole partitions
+def test_partition_prices_only_for_whole_partition(historical_df):
+    index = HistoricalIndex(historical_df)
+    assert index.sorted_prices(features(Make="TOYOTA", Model="COROLLA", Year=2012).model_dump()) is None
+    assert index.sorted_prices(features(Year=2012).model_dump()) is None
@@ -16,3 +16,62 @@ def test_load_historical_sets():
 def test_load_rego_data():
     rego_data = load_rego_data()
     assert not rego_data.empty
+
+# Test shared-state preparation and attach: ensures workers can attach to what the launcher prepared
+def test_prepare_and_attach_shared_state(tmp_path, monkeypatch):
+    import pandas as pd
+    from models import loader
+
+    hist = tmp_path / "preprocessed_capped_data.csv"
+    rego = tmp_path / "rego_data.csv"
+    pd.DataFrame({"Make": ["TOYOTA"], "Model": ["COROLLA"], "AdjustedPrice": [120.5]}).to_csv(hist, index=False)
+    pd.DataFrame({"Registration": ["ABC123"], "Make": ["Toyota"]}).to_csv(rego, index=False)
+    monkeypatch.setattr(loader, "DATA_PATHS", {"Capped": hist, "Logbook": tmp_path / "missing.csv", "Rego": rego})
+
+    loader.prepare_shared_state()
+    sets = loader.attach_historical_sets()
+    rego_index = loader.attach_rego_index()
+
+    assert sets["Capped"]["AdjustedPrice"].tolist() == [120.5]
+    assert sets["Logbook"].empty
+    assert rego_index.get("abc123")["Make"] == "Toyota"
+
+
+# Test attach without preparation: ensures a clear error instead of silently loading per worker
+def test_attach_without_prepare_fails(tmp_path, monkeypatch):
+    import pandas as pd
+    import pytest
+    from models import loader
+
+    hist = tmp_path / "preprocessed_capped_data.csv"
+    pd.DataFrame({"Make": ["TOYOTA"], "AdjustedPrice": [1.0]}).to_csv(hist, index=False)
+    monkeypatch.setattr(loader, "DATA_PATHS", {"Capped": hist, "Rego": tmp_path / "rego.csv"})
+
+    with pytest.raises(RuntimeError):
+        loader.attach_historical_sets()
+
+
+# Test attach after the CSVs change: ensures a worker refuses stale shared state instead of serving it
+def test_attach_stale_shared_state_fails(tmp_path, monkeypatch):
+    import pandas as pd
+    import pytest
+    from models import loader
+
+    hist = tmp_path / "preprocessed_capped_data.csv"
+    rego = tmp_path / "rego_data.csv"
+    pd.DataFrame({"Make": ["TOYOTA"], "AdjustedPrice": [1.0]}).to_csv(hist, index=False)
+    pd.DataFrame({"Registration": ["ABC123"], "Make": ["Toyota"]}).to_csv(rego, index=False)
+    monkeypatch.setattr(loader, "DATA_PATHS", {"Capped": hist, "Rego": rego})
+    loader.prepare_shared_state()
+
+    pd.DataFrame({"Make": ["TOYOTA", "MAZDA"], "AdjustedPrice": [1.0, 2.0]}).to_csv(hist, index=False)
+    with pytest.raises(RuntimeError, match="out of date"):
+        loader.attach_historical_sets()
+
+    pd.DataFrame({"Registration": ["ABC123", "XYZ789"], "Make": ["Toyota", "Mazda"]}).to_csv(rego, index=False)
+    with pytest.raises(RuntimeError, match="out of date"):
+        loader.attach_rego_index()
+
+    loader.prepare_shared_state()
+    assert loader.attach_historical_sets()["Capped"]["Make"].tolist() == ["TOYOTA", "MAZDA"]
+    assert loader.attach_rego_index().get("xyz789")["Make"] == "Mazda"
@@ -0,0 +1,105 @@
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from routes import metrics as metrics_route
+from utils.concurrency import create_executors, run_stage
+from utils.metrics import MetricsRegistry, create_metrics, STAGE_DURATION
+from utils.middleware import TimingMiddleware
+from utils.timing import TimedRoute, stage, start_timings, reset_timings, timed_render, record_rendered
+
+
+class Body(BaseModel):
+    model_name: str
+
+
+def _app(server_timing=True):
+    """Tiny app: one timed route whose work runs on a thread-pool stage"""
+    app = FastAPI()
+    app.state.metrics = create_metrics()
+    app.state.executors = create_executors({"predict": (1, 4)})
+    router = APIRouter(route_class=TimedRoute)
+
+    def work():
+        with stage("predict"):
+            return 1.0
+
+    @router.post("/score")
+    async def score(req: Body, request: Request):
+        with stage("preprocess"):
+            pass
+        return {"value": await run_stage(request.app, "predict", work)}
+
+    app.include_router(router)
+    app.include_router(metrics_route.router)
+    app.add_middleware(TimingMiddleware, server_timing=server_timing)
+    return app
+
+
+# Test the Prometheus rendering: ensures cumulative buckets, sum and count per label set
+def test_registry_renders_prometheus_text():
+    """Two observations -> le buckets cumulative, +Inf == count, labels escaped and sorted"""
+    registry = MetricsRegistry()
+    registry.histogram("latency_ms", "Latency.", buckets=(1, 10))
+    registry.observe("latency_ms", 0.5, route="/a")
+    registry.observe("latency_ms", 50, route="/a")
+    registry.observe("latency_ms", 5, route='say "hi"')
+
+    text = registry.render()
+    assert "# TYPE latency_ms histogram" in text
+    assert 'latency_ms_bucket{route="/a",le="1"} 1' in text
+    assert 'latency_ms_bucket{route="/a",le="10"} 1' in text
+    assert 'latency_ms_bucket{route="/a",le="+Inf"} 2' in text
+    assert 'latency_ms_count{route="/a"} 2' in text
+    assert 'latency_ms_sum{route="/a"} 50.5' in text
+    assert 'route="say \\"hi\\""' in text
+
+
+# Test request instrumentation: ensures stages from the handler and its thread-pool stage reach /metrics
+def test_stage_timings_reach_metrics_and_header():
+    """Stages recorded under route + model; Server-Timing lists them with total"""
+    app = _app()
+    with TestClient(app) as client:
+        response = client.post("/score", json={"model_name": "Capped"})
+        assert response.status_code == 200
+        names = [entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")]
+        assert names[-1] == "total"
+        assert {"validation", "preprocess", "predict", "serialization"} <= set(names)
+
+        series = app.state.metrics.snapshot(STAGE_DURATION)
+        stages = {dict(key)["stage"] for key in series if dict(key)["model"] == "Capped"}
+        assert {"validation", "preprocess", "predict", "serialization"} <= stages
+        assert all(dict(key)["route"] == "/score" for key in series)
+
+        text = client.get("/metrics").text
+        assert 'http_request_duration_milliseconds_count{method="POST",route="/score",status="200"} 1' in text
+    for executor in app.state.executors.values():
+        executor.shutdown()
+
+
+# Test the opt-in header: ensures Server-Timing is only sent when enabled
+def test_server_timing_header_is_optional():
+    """server_timing=False -> no header, metrics still recorded"""
+    app = _app(server_timing=False)
+    with TestClient(app) as client:
+        response = client.post("/score", json={"model_name": "Capped"})
+        assert "server-timing" not in response.headers
+        assert app.state.metrics.snapshot(STAGE_DURATION)
+
+
+# Test render timings: ensures stages measured inside a render job are added to the request
+def test_timed_render_carries_stages():
+    """timed_render result -> record_rendered returns the value and adds its stages"""
+    def render():
+        with stage("render.boxplot_png"):
+            return {"boxplot_png": "data"}
+
+    timings, token = start_timings()
+    try:
+        rendered = timed_render(render)
+        assert "render.boxplot_png" not in timings.stages  # kept apart until recorded
+        assert record_rendered(rendered) == {"boxplot_png": "data"}
+        assert record_rendered(None) is None
+    finally:
+        reset_timings(token)
+    assert "render.boxplot_png" in timings.stages
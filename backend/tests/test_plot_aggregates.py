@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+from types import SimpleNamespace
+from matplotlib import cbook
+
+from schemas.requests import CarFeatures
+from services import historical
+from utils import plotting
+from utils.plot_aggregates import PlotAggregates, box_stats, density_grid
+
+
+def _frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Make": "TOYOTA", "Model": "COROLLA",
+        "Months": rng.choice([6.0, 12.0, 24.0], rows),
+        "Distance": rng.uniform(0, 2e5, rows),
+        "AdjustedPrice": rng.lognormal(5.5, 0.4, rows),
+    })
+
+
+# Test boxplot statistics: ensures the binned boxplot matches what matplotlib computes from raw rows
+def test_box_stats_match_matplotlib():
+    """q1 / median / q3 / whiskers equal cbook.boxplot_stats; fliers capped"""
+    prices = np.sort(_frame(5000)["AdjustedPrice"].to_numpy())
+    ours, reference = box_stats(prices), cbook.boxplot_stats(prices)[0]
+    for key in ("q1", "med", "q3", "whislo", "whishi"):
+        assert np.isclose(ours[key], reference[key])
+    assert len(ours["fliers"]) <= min(len(reference["fliers"]), 200)
+    assert box_stats(np.array([])) is None
+
+
+# Test the density grid: ensures counts cover every complete row and bands are per-bucket percentiles
+def test_density_grid_counts_and_bands():
+    """Two x buckets with known prices -> medians 10 and 100; NaN rows dropped"""
+    x = np.array([0, 0, 0, 10, 10, 10, np.nan])
+    y = np.array([5, 10, 15, 50, 100, 150, 1.0])
+    grid = density_grid(x, y, bins=2)
+    assert grid["counts"].sum() == 6
+    assert np.allclose(grid["p50"], [10, 100])
+    assert density_grid(np.array([np.nan]), np.array([1.0]), bins=2) is None
+
+
+# Test adaptive rendering: ensures large frames and cached aggregates render the same set of charts
+def test_price_plots_from_aggregates(monkeypatch):
+    """Frame over the threshold and a PlotAggregates both -> all four PNGs"""
+    monkeypatch.setattr(plotting, "PLOT_AGGREGATE_ROWS", 100)
+    df = _frame(500)[["Months", "Distance", "AdjustedPrice"]]
+    for data in (df, PlotAggregates(df, bins=10)):
+        plots = plotting.get_all_price_plots(data, 250.0, 12.0, 5e4)
+        assert set(plots) == {"boxplot_png", "histogram_png", "month_vs_price_png", "distance_vs_price_png"}
+        assert all(plots.values())
+
+
+# Test caching: ensures summaries of large partitions cache aggregates instead of rows
+def test_summary_entry_holds_aggregates(monkeypatch):
+    """Above PLOT_AGGREGATE_ROWS the entry's plot_data is a PlotAggregates of the filtered rows"""
+    monkeypatch.setattr(historical, "PLOT_AGGREGATE_ROWS", 100)
+    df = _frame(300)
+    app = SimpleNamespace(state=SimpleNamespace(historical_index={}))
+    features = CarFeatures(TaskName=None, Make="TOYOTA", Model="COROLLA")
+
+    entry = historical._summarise(app, "Capped", features, df)
+    assert isinstance(entry["plot_data"], PlotAggregates) and len(entry["plot_data"]) == 300
+
+    small = historical._summarise(app, "Capped", features, df.iloc[:50])
+    assert isinstance(small["plot_data"], pd.DataFrame)
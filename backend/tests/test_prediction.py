@@ -72,7 +72,7 @@ def test_successful_prediction(fake_app, fake_req):
 
     fake_app.state.models = {"test_model": FakeModel()}
 
-    result = run_prediction(fake_app, fake_req)
+    result = run_prediction(fake_app, fake_req, explain="png")
     assert result["model"] == "test_model"
     assert result["prediction"] == 123.45
     assert result["plots"]["shap_png"] == "fake_shap"
@@ -92,7 +92,7 @@ def test_shap_fails(fake_app, fake_req, monkeypatch):
         lambda *a, **kw: (_ for _ in ()).throw(Exception("fail"))
     )
 
-    result = run_prediction(fake_app, fake_req)
+    result = run_prediction(fake_app, fake_req, explain="png")
     assert result["plots"]["shap_png"] is None
     assert result["prediction"] == 123.45
 
@@ -109,3 +109,40 @@ def test_model_predict_fails(fake_app, fake_req):
         run_prediction(fake_app, fake_req)
     assert exc.value.status_code == 500
     assert "Model prediction failed" in exc.value.detail
+
+# Test default explain mode: ensures SHAP is skipped entirely unless requested
+def test_default_skips_shap(fake_app, fake_req, monkeypatch):
+    """explain defaults to none -> no SHAP work, no plot, no explanation"""
+    class FakeModel:
+        def predict(self, df):
+            return [123.45]
+
+    fake_app.state.models = {"test_model": FakeModel()}
+    monkeypatch.setattr(
+        "services.prediction.generate_shap_plot",
+        lambda *a, **kw: pytest.fail("SHAP should not run")
+    )
+
+    result = run_prediction(fake_app, fake_req)
+    assert result["plots"]["shap_png"] is None
+    assert result["explanation"] is None
+
+
+# Test JSON SHAP values: ensures raw contributions and base value are returned without a PNG
+def test_explain_values(fake_app, fake_req, monkeypatch):
+    """explain=values -> expected value + per-feature contributions"""
+    import numpy as np
+
+    class FakeModel:
+        def predict(self, df):
+            return [123.45]
+
+    fake_app.state.models = {"test_model": FakeModel()}
+    monkeypatch.setattr(
+        "services.prediction.compute_shap_values",
+        lambda model, processed, names: (np.array([[1.5]]), np.float64(100.0))
+    )
+
+    result = run_prediction(fake_app, fake_req, explain="values")
+    assert result["plots"]["shap_png"] is None
+    assert result["explanation"] == {"expected_value": 100.0, "features": ["Feature1"], "values": [1.5]}
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+from types import SimpleNamespace
+
+from schemas.requests import PredictRequest, CarFeatures, BatchPredictRequest
+from services import prediction, reload
+from utils.cache import TTLCache
+
+
+class CountingModel:
+    """Prices each row at its Distance and counts the rows it is asked for"""
+    def __init__(self):
+        self.rows = 0
+
+    def predict(self, rows):
+        self.rows += len(rows)
+        return [row[0] for row in rows]
+
+
+@pytest.fixture(autouse=True)
+def patch_preprocess(monkeypatch):
+    monkeypatch.setattr("services.prediction.preprocess", lambda features, name: [[features.Distance, features.Make]])
+    monkeypatch.setitem(prediction.MODEL_FEATURES, "Capped", ["Distance", "Make"])
+
+
+def _app(model, version="v1"):
+    return SimpleNamespace(state=SimpleNamespace(
+        models={"Capped": model},
+        versions={"models": {"Capped": version}},
+        prediction_cache=prediction.create_prediction_cache(),
+        renderer=None,
+    ))
+
+
+def _req(distance, make="TOYOTA"):
+    return PredictRequest(model_name="Capped", features=CarFeatures(TaskName=None, Make=make, Model="COROLLA", Distance=distance))
+
+
+# Test memoization: ensures a repeated feature vector is answered without calling the model
+def test_repeat_prediction_is_cached():
+    """Same vehicle twice -> one model row; a different vehicle -> a miss"""
+    model = CountingModel()
+    app = _app(model)
+
+    assert prediction.run_prediction(app, _req(100))["prediction"] == 100
+    assert prediction.run_prediction(app, _req(100))["prediction"] == 100
+    assert prediction.run_prediction(app, _req(200))["prediction"] == 200
+    assert model.rows == 2
+
+    stats = prediction.prediction_cache_stats(app)["prediction"]
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 2, 2)
+
+
+# Test SHAP memoization: ensures SHAP vectors are cached apart from predictions and shared by the batch endpoint
+def test_shap_vectors_cached_separately(monkeypatch):
+    """explain=values twice -> one SHAP call; the batch row for that vehicle reuses it"""
+    calls = []
+
+    def fake_shap(model, rows, names):
+        calls.append(len(rows))
+        return np.array([[float(r[0]), 1.0] for r in rows]), np.float64(50.0)
+
+    monkeypatch.setattr("services.prediction.compute_shap_values", fake_shap)
+    monkeypatch.setattr("services.prediction.render_shap_waterfall", lambda values, *a: f"png:{values[0]:.0f}")
+    app = _app(CountingModel())
+
+    prediction.run_prediction(app, _req(100))
+    assert prediction.prediction_cache_stats(app)["shap"]["size"] == 0
+    first = prediction.run_prediction(app, _req(100), explain="values")["explanation"]
+    second = prediction.run_prediction(app, _req(100), explain="values")["explanation"]
+    assert first == second == {"expected_value": 50.0, "features": ["Distance", "Make"], "values": [100.0, 1.0]}
+
+    batch = BatchPredictRequest(items=[_req(100), _req(300)], include_shap=True)
+    results = prediction.run_batch_prediction(app, batch)["results"]
+    assert [r["plots"]["shap_png"] for r in results] == ["png:100", "png:300"]
+    assert calls == [1, 1]
+
+
+# Test invalidation: ensures a model reload makes earlier predictions unreachable
+def test_model_version_invalidates(monkeypatch):
+    """New version in app.state.versions -> miss; reload_artifacts clears the caches"""
+    app = _app(CountingModel())
+    prediction.run_prediction(app, _req(100))
+
+    app.state.versions = {"models": {"Capped": "v2"}}
+    key = prediction.prediction_keys(app, "Capped", [[100, "TOYOTA"]])[0]
+    assert key[1] == "v2" and app.state.prediction_cache["prediction"].get(key) is None
+
+    monkeypatch.setattr(reload, "model_versions", lambda: {"Capped": "v3"})
+    monkeypatch.setattr(reload, "load_validated_models", lambda: {"Capped": CountingModel()})
+    monkeypatch.setattr(reload, "set_versions", lambda app, models, data: None)
+    reload.reload_artifacts(app, models=True, data=False)
+    assert all(c.stats()["size"] == 0 for c in app.state.prediction_cache.values())
+
+
+# Test the memory bound: ensures least recently used entries go once the byte budget is spent
+def test_byte_bound_evicts_lru():
+    """maxbytes fits two entries -> the third evicts the least recently used"""
+    cache = TTLCache(maxsize=100, maxbytes=250, sizeof=lambda key, value: 100)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+    stats = cache.stats()
+    assert (stats["bytes"], stats["maxbytes"], stats["evictions"]) == (200, 250, 1)
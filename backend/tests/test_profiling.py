@@ -0,0 +1,93 @@
+import asyncio
+import pstats
+import threading
+import time
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from utils.concurrency import create_executors, run_stage
+from utils.profiling import ProfilingMiddleware, list_profiles, profile_path, prune_profiles
+
+
+def _app(tmp_path, mode, admin_token=""):
+    """Tiny app whose one route does its work on a thread-pool stage"""
+    app = FastAPI()
+
+    app.state.executors = create_executors({"filter": (2, 4)})
+
+    def work():
+        time.sleep(0.05)
+        return threading.current_thread().name
+
+    def other_work():
+        time.sleep(0.05)
+        return threading.current_thread().name
+
+    @app.get("/work")
+    async def route(request: Request):
+        await asyncio.sleep(0.02)  # the loop serves other requests meanwhile
+        return {"thread": await run_stage(request.app, "filter", work)}
+
+    @app.get("/other")
+    async def other(request: Request):
+        return {"thread": await run_stage(request.app, "filter", other_work)}
+
+    app.add_middleware(ProfilingMiddleware, mode=mode, directory=tmp_path, keep=3, admin_token=admin_token)
+    return app
+
+
+# Test a profiled request: ensures the pstats file and metadata are written and named in the response
+def test_profiled_request_writes_pstats(tmp_path):
+    """?profile=1 in debug mode -> X-Profile name, loadable .prof holding the stage job, which still ran on its executor"""
+    client = TestClient(_app(tmp_path, "debug"))
+    response = client.get("/work?profile=1")
+    name = response.headers["x-profile"]
+
+    assert response.json()["thread"].startswith("filter-stage")
+    entry = list_profiles(tmp_path)[0]
+    assert entry["name"] == name and entry["path"] == "/work" and entry["status"] == 200
+    assert entry["jobs"] == 1 and entry["top"]
+    functions = {func for _, _, func in pstats.Stats(str(profile_path(tmp_path, name))).stats}
+    assert "work" in functions
+
+    unprofiled = client.get("/work")
+    assert "x-profile" not in unprofiled.headers
+    assert unprofiled.json()["thread"].startswith("filter-stage")
+
+
+# Test access control: ensures admin mode only profiles for clients with the admin token
+def test_admin_mode_requires_token(tmp_path):
+    """X-Profile without / with a wrong token -> not profiled; with the token -> profiled"""
+    client = TestClient(_app(tmp_path, "admin", admin_token="secret"))
+    assert "x-profile" not in client.get("/work", headers={"X-Profile": "1"}).headers
+    assert "x-profile" not in client.get("/work", headers={"X-Profile": "1", "X-Admin-Token": "nope"}).headers
+    assert "x-profile" in client.get("/work", headers={"X-Profile": "1", "X-Admin-Token": "secret"}).headers
+    assert len(list_profiles(tmp_path)) == 1
+
+
+# Test retention and lookup: ensures old profiles are pruned and only well-formed names resolve
+def test_prune_and_profile_path(tmp_path):
+    """keep=3 after 5 requests; path traversal names -> None"""
+    client = TestClient(_app(tmp_path, "debug"))
+    for _ in range(5):
+        client.get("/work", headers={"X-Profile": "true"})
+    assert len(list_profiles(tmp_path)) == 3
+    prune_profiles(tmp_path, 1)
+    assert len(list(tmp_path.glob("*.prof"))) == 1
+    assert profile_path(tmp_path, "../etc/passwd") is None
+
+
+# Test isolation: ensures a profile holds only its own request's jobs while other requests run alongside
+def test_profile_excludes_concurrent_requests(tmp_path):
+    """Profiled /work overlapping an unprofiled /other on the same stage -> neither its handler nor its job in the profile"""
+    app = _app(tmp_path, "debug")
+
+    async def both():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await asyncio.gather(client.get("/work?profile=1"), client.get("/other"))
+
+    profiled, other = asyncio.run(both())
+    assert other.json()["thread"].startswith("filter-stage")
+    functions = {func for _, _, func in pstats.Stats(str(profile_path(tmp_path, profiled.headers["x-profile"]))).stats}
+    assert "work" in functions and not {"other", "other_work"} & functions
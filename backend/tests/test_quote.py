@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+import pandas as pd
+from types import SimpleNamespace
+from fastapi import HTTPException
+
+from services.quote import run_quote
+from services.historical import create_historical_cache
+from schemas.requests import QuoteRequest
+
+
+class FakeModel:
+    def predict(self, df):
+        return [250.0]
+
+
+@pytest.fixture
+def fake_app():
+    """Fake app with one model and a small historical set"""
+    class App:
+        state = SimpleNamespace(
+            models={"test_model": FakeModel()},
+            historical_sets={"test_model": pd.DataFrame({
+                "Make": ["TOYOTA"] * 4,
+                "Model": ["TOYOTA COROLLA"] * 4,
+                "Months": [6.0, 12.0, 12.0, 24.0],
+                "Distance": [1e4, 2e4, 3e4, 5e4],
+                "AdjustedPrice": [100.0, 200.0, 300.0, 400.0],
+            })},
+            historical_cache=create_historical_cache(),
+        )
+    return App()
+
+
+@pytest.fixture
+def features():
+    """Quote features (Make / Model plus overlay values)"""
+    return {
+        "TaskName": "Brake service", "Make": "TOYOTA", "Model": "TOYOTA COROLLA",
+        "Distance": 50000, "Months": 12,
+    }
+
+
+@pytest.fixture(autouse=True)
+def patch_dependencies(monkeypatch):
+    """Isolate from preprocessing and real plotting"""
+    monkeypatch.setattr("services.prediction.preprocess", lambda features, model_name: pd.DataFrame([features.model_dump()]))
+    monkeypatch.setattr(
+        "services.historical.get_all_price_plots",
+        lambda df, pred, m, d, plots=None: {name: f"{name}:{pred}" for name in (plots or ["boxplot_png"])},
+    )
+
+
+# Test combined quote: ensures the prediction feeds the historical comparison in one call
+def test_quote_combines_prediction_and_history(fake_app, features):
+    """Prediction + summary + comparison against that prediction"""
+    req = QuoteRequest(model_name="test_model", features=features, filters={"Make": "TOYOTA", "Model": "TOYOTA COROLLA", "TaskName": None})
+    result = asyncio.run(run_quote(fake_app, req))
+
+    assert result["prediction"]["prediction"] == 250.0
+    assert result["historical"]["summary"]["count"] == 4
+    assert result["historical"]["comparison"]["predicted_price"] == 250.0
+    assert result["historical"]["message"] == "Historical summary computed successfully"
+
+
+# Test plot selection: ensures only the requested plots are rendered
+def test_quote_selected_plots(fake_app, features):
+    """plots=[histogram_png] -> only that plot, [] -> none"""
+    filters = {"Make": "TOYOTA", "Model": "TOYOTA COROLLA", "TaskName": None}
+
+    req = QuoteRequest(model_name="test_model", features=features, filters=filters, plots=["histogram_png"])
+    plots = asyncio.run(run_quote(fake_app, req))["historical"]["plots"]
+    assert plots["histogram_png"] == "histogram_png:250.0"
+    assert plots["boxplot_png"] is None
+
+    req = QuoteRequest(model_name="test_model", features=features, filters=filters, plots=[])
+    plots = asyncio.run(run_quote(fake_app, req))["historical"]["plots"]
+    assert all(v is None for v in plots.values())
+
+
+# Test no history: ensures the prediction is still returned when nothing matches
+def test_quote_without_matches(fake_app, features):
+    """Filters that match nothing -> prediction plus an empty historical part"""
+    req = QuoteRequest(model_name="test_model", features=dict(features, Make="MAZDA"))
+    result = asyncio.run(run_quote(fake_app, req))
+
+    assert result["prediction"]["prediction"] == 250.0
+    assert result["historical"]["summary"] is None
+    assert result["historical"]["message"] == "No matching historical records"
+
+
+# Test unknown model: ensures a 400 before any work starts
+def test_quote_unknown_model(fake_app, features):
+    req = QuoteRequest(model_name="nope", features=features)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(run_quote(fake_app, req))
+    assert exc.value.status_code == 400
@@ -44,3 +44,59 @@ def test_registration_found(fake_app):
     assert result["Registration"] == "ABC123"
     assert result["Make"] == "Toyota"
     assert result["Model"] == "Corolla"
+
+# Test lookup normalization via the index: ensures case and whitespace don't matter
+def test_index_normalizes_registration(fake_app):
+    """' abc 123 ' -> matches stored 'ABC123', NaN fields become None"""
+    from utils.registration_index import RegistrationIndex
+
+    df = pd.DataFrame({
+        "Registration": ["ABC123", "abc123", "XYZ999"],
+        "Make": ["Toyota", "Mazda", None],
+        "Year": [2015.0, 2016.0, float("nan")],
+    })
+    fake_app.state.rego_index = RegistrationIndex(df)
+
+    result = lookup_registration(fake_app, " abc 123 ")
+    assert result["Registration"] == "ABC123"
+    assert result["Make"] == "Toyota"  # first row wins on duplicates
+    assert result["Year"] == 2015.0
+    assert result["Model"] is None
+
+    missing = lookup_registration(fake_app, "XYZ999")
+    assert missing["Make"] is None and missing["Year"] is None
+
+
+# Test batch lookup: ensures results keep request order and flag unknown registrations
+def test_batch_lookup(fake_app):
+    """Mixed known / unknown registrations -> per-item found flag"""
+    from services.registration import lookup_registrations
+
+    df = pd.DataFrame({"Registration": ["ABC123", "XYZ999"], "Make": ["Toyota", "Honda"]})
+    fake_app.state.rego_data = df
+
+    result = lookup_registrations(fake_app, ["xyz999", "NOPE", "ABC123"])["results"]
+    assert [r["found"] for r in result] == [True, False, True]
+    assert result[0]["record"]["Make"] == "Honda"
+    assert result[0]["registration"] == "xyz999"
+    assert result[1]["record"] is None
+
+# Test shared (memory-mapped) index: ensures it answers exactly like the in-process index
+def test_shared_index_matches(tmp_path):
+    """save + attach -> same records, unknowns stay unknown"""
+    from utils.registration_index import RegistrationIndex, SharedRegistrationIndex, save_registration_index
+
+    df = pd.DataFrame({
+        "Registration": ["ZZZ1", "abc 123", "MMM555", "LONGREGISTRATION9"],
+        "Make": ["Toyota", "Honda", None, "Ford"],
+        "Year": [2015, 2016, 2017, 2018],
+        "EngineSize": [1.8, float("nan"), 2.0, 3.2],
+    })
+    local = RegistrationIndex(df)
+    save_registration_index(local, tmp_path / "rego.index")
+    shared = SharedRegistrationIndex(tmp_path / "rego.index")
+
+    queries = ["zzz1", "ABC123", "mmm555", "longregistration9", "NOPE", "LONGREGISTRATION99", ""]
+    assert shared.get_many(queries) == local.get_many(queries)
+    assert shared.get("abc123") == local.get("abc123")
+    assert shared.get("nope") is None
@@ -0,0 +1,146 @@
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+from types import SimpleNamespace
+from catboost import CatBoostRegressor
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from config import MODEL_FEATURES
+from models import loader
+from routes import admin
+from services import reload as reload_service
+from utils.middleware import VersionHeaderMiddleware
+
+FEATURES = MODEL_FEATURES["Capped"]
+
+
+def _train(path, offset=0.0, feature_names=FEATURES):
+    """Writes a tiny Capped-shaped model whose prices are shifted by offset"""
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        "Make": rng.choice(["TOYOTA", "MAZDA"], 60), "Model": rng.choice(["COROLLA", "CX5"], 60),
+        "Year": rng.integers(2005, 2020, 60), "FuelType": "Petrol", "EngineSize": rng.uniform(1, 3, 60),
+        "Transmission": "Automatic", "DriveType": "FWD", "Distance": rng.uniform(0, 1e5, 60),
+    })
+    df.columns = feature_names
+    cats = [c for c in feature_names if df[c].dtype == object or pd.api.types.is_string_dtype(df[c])]
+    model = CatBoostRegressor(iterations=10, depth=2, verbose=0, cat_features=cats, allow_writing_files=False)
+    model.fit(df, 200 + offset + rng.normal(0, 1, 60))
+    model.save_model(str(path))
+
+
+@pytest.fixture
+def artifacts(tmp_path, monkeypatch):
+    """One model and one historical CSV on disk, with config pointed at them"""
+    model_path, hist_path, rego_path = tmp_path / "capped_model.cbm", tmp_path / "capped.csv", tmp_path / "rego.csv"
+    _train(model_path)
+    pd.DataFrame({"Make": ["TOYOTA"], "Model": ["COROLLA"], "AdjustedPrice": [150.0]}).to_csv(hist_path, index=False)
+    model_paths = {"Capped": model_path}
+    data_paths = {"Capped": hist_path, "Rego": rego_path}
+    for module in (loader, reload_service):
+        monkeypatch.setattr(module, "MODEL_PATHS", model_paths)
+        monkeypatch.setattr(module, "DATA_PATHS", data_paths)
+    monkeypatch.setattr(loader, "MODEL_BACKENDS", {"Capped": "native"})
+    return model_path, hist_path
+
+
+@pytest.fixture
+def served(artifacts):
+    """App state as the lifespan builds it from the artifacts"""
+    app = SimpleNamespace(state=SimpleNamespace(shared_state=False, reload_lock=asyncio.Lock()))
+    app.state.models = loader.load_model_backends()
+    reload_service.install_state(app, reload_service.build_historical_state(loader.load_historical_sets()))
+    reload_service.set_versions(app, reload_service.model_versions(), reload_service.data_versions())
+    return app
+
+
+# Test a valid reload: ensures new models and data are swapped in with new versions
+def test_reload_swaps_models_and_data(artifacts, served):
+    """Retrained .cbm + refreshed CSV -> new objects in app.state, versions change, old model untouched"""
+    model_path, hist_path = artifacts
+    old_model, old_versions = served.state.models["Capped"], dict(served.state.versions)
+    old_prediction = old_model.predict([["TOYOTA", "COROLLA", 2015, "Petrol", 1.8, "Automatic", "FWD", 5e4]])[0]
+
+    _train(model_path, offset=1000)
+    pd.DataFrame({"Make": ["MAZDA"], "Model": ["CX5"], "AdjustedPrice": [99.0]}).to_csv(hist_path, index=False)
+    versions = asyncio.run(reload_service.reload_artifacts_async(served))
+
+    new_model = served.state.models["Capped"]
+    row = [["TOYOTA", "COROLLA", 2015, "Petrol", 1.8, "Automatic", "FWD", 5e4]]
+    assert new_model is not old_model
+    assert new_model.predict(row)[0] > old_prediction + 500
+    assert old_model.predict(row)[0] == old_prediction  # in-flight requests keep the old model
+    assert versions["model"] != old_versions["model"] and versions["data"] != old_versions["data"]
+    assert served.state.historical_sets["Capped"]["Make"].tolist() == ["MAZDA"]
+
+
+# Test a rejected reload: ensures a model with the wrong features never replaces the served one
+def test_reload_rejects_mismatched_features(artifacts, served):
+    """Features not matching MODEL_FEATURES -> 422, previous model and versions stay"""
+    model_path, _ = artifacts
+    old_model, old_versions = served.state.models["Capped"], dict(served.state.versions)
+    _train(model_path, feature_names=[f"f{i}" for i in range(len(FEATURES))])
+
+    with pytest.raises(HTTPException) as exc:
+        reload_service.reload_artifacts(served, models=True, data=False)
+    assert exc.value.status_code == 422
+    assert served.state.models["Capped"] is old_model
+    assert served.state.versions == old_versions
+
+
+# Test shared-state workers: ensures data reload is refused where the data is memory-mapped
+def test_reload_data_refused_in_shared_state(served):
+    """shared_state -> 409 for data, the launcher owns those files"""
+    served.state.shared_state = True
+    with pytest.raises(HTTPException) as exc:
+        reload_service.reload_artifacts(served, models=False, data=True)
+    assert exc.value.status_code == 409
+
+
+def _admin_app(served):
+    app = FastAPI()
+    app.state = served.state
+    app.include_router(admin.router)
+    app.add_middleware(VersionHeaderMiddleware)
+    return app
+
+
+# Test the admin route and version headers: ensures every response names the versions served
+def test_admin_reload_route_and_version_headers(served, monkeypatch):
+    """X-Model-Version / X-Data-Version on responses; ADMIN_TOKEN guards /admin"""
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "secret")
+    client = TestClient(_admin_app(served))
+
+    response = client.get("/admin/versions", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert response.headers["x-model-version"] == served.state.versions["model"]
+    assert response.headers["x-data-version"] == served.state.versions["data"]
+    assert set(response.json()["models"]) == {"Capped"}
+
+    assert client.post("/admin/reload?data=false").status_code == 403
+    reloaded = client.post("/admin/reload?data=false", headers={"X-Admin-Token": "secret"})
+    assert reloaded.status_code == 200
+
+
+# Test the default: ensures the admin API refuses everyone while no ADMIN_TOKEN is configured
+def test_admin_closed_without_token(served, monkeypatch):
+    """ADMIN_TOKEN unset -> /admin/reload is 403 with or without a header, and nothing reloads"""
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "")
+    monkeypatch.setattr(admin, "reload_artifacts_async", lambda *args: pytest.fail("reload ran without a token"))
+    client = TestClient(_admin_app(served))
+
+    for headers in ({}, {"X-Admin-Token": ""}, {"X-Admin-Token": "anything"}):
+        response = client.post("/admin/reload", headers=headers)
+        assert response.status_code == 403
+    assert client.get("/admin/versions").status_code == 403
+
+
+# Test change detection: ensures the watcher reloads only the kinds whose files changed
+def test_changed_kinds():
+    """stamp differences -> {"models"} / {"data"}"""
+    before = {("models", "Capped"): (1, 1), ("data", "Capped"): (5, 5)}
+    assert reload_service.changed_kinds(before, dict(before)) == set()
+    assert reload_service.changed_kinds(before, {**before, ("data", "Capped"): (6, 7)}) == {"data"}
+    assert reload_service.changed_kinds(before, {**before, ("models", "Capped"): None}) == {"models"}
@@ -0,0 +1,68 @@
+import asyncio
+import base64
+import time
+import pytest
+import pandas as pd
+
+from utils.rendering import PlotRenderer, RenderQueueFull, submit_render, render_result
+from utils.plotting import get_all_price_plots
+from utils import profiling
+
+
+@pytest.fixture(scope="module")
+def renderer():
+    r = PlotRenderer(workers=1, max_pending=1)
+    yield r
+    r.shutdown()
+
+
+# Test process-pool rendering: ensures historical plots come back as PNGs from a worker
+def test_renders_plots_in_worker(renderer):
+    """get_all_price_plots in a worker -> base64 PNGs"""
+    df = pd.DataFrame({"AdjustedPrice": [100.0, 150.0, 200.0], "Months": [6, 12, 24], "Distance": [1e4, 2e4, 3e4]})
+    plots = renderer.submit(get_all_price_plots, df, 150.0, 12, 2e4).result(timeout=60)
+
+    assert set(plots) == {"boxplot_png", "histogram_png", "month_vs_price_png", "distance_vs_price_png"}
+    assert base64.b64decode(plots["boxplot_png"]).startswith(b"\x89PNG")
+
+
+# Test queue depth limit: ensures submissions beyond max_pending are refused
+def test_queue_full(renderer):
+    """Second job while one is pending -> RenderQueueFull"""
+    future = renderer.submit(time.sleep, 0.5)
+    with pytest.raises(RenderQueueFull):
+        renderer.submit(time.sleep, 0)
+    future.result(timeout=60)
+    assert renderer.pending == 0
+
+
+# Test profiled renders: ensures a profiled request's render job is profiled in the worker and recorded
+def test_profiled_render_in_worker(renderer):
+    """Inside a RequestProfile -> job still runs in the worker; its stats come back with the result"""
+    df = pd.DataFrame({"AdjustedPrice": [100.0, 150.0, 200.0], "Months": [6, 12, 24]})
+    request_profile = profiling.RequestProfile()
+    token = profiling._active.set(request_profile)
+    try:
+        future = submit_render(renderer, get_all_price_plots, df, 150.0, 12, plots=["boxplot_png"])
+    finally:
+        profiling._active.reset(token)
+
+    assert set(future.result(timeout=60)) == {"boxplot_png"}
+    assert request_profile.jobs == 1
+    assert "get_all_price_plots" in {func for _, _, func in request_profile.stats().stats}
+
+
+# Test awaitable API: ensures run() can be awaited from the event loop
+def test_run_is_awaitable(renderer):
+    """await renderer.run(...) -> result"""
+    assert asyncio.run(renderer.run(abs, -3)) == 3
+
+
+# Test inline fallback: ensures failures are captured in the future and mapped to the default
+def test_inline_render_failure():
+    """No renderer + failing fn -> render_result returns default"""
+    def boom():
+        raise RuntimeError("fail")
+
+    assert render_result(submit_render(None, boom), default="none") == "none"
+    assert render_result(submit_render(None, abs, -2)) == 2
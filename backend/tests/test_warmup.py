@@ -0,0 +1,60 @@
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+from services import warmup
+
+
+def _backend(predict):
+    return SimpleNamespace(model=SimpleNamespace(), predict=predict)
+
+
+def _app(**models):
+    return SimpleNamespace(state=SimpleNamespace(models=models, renderer=None))
+
+
+# Test model warm-up: ensures every model is priced once and a failing one doesn't stop startup
+def test_warm_up_models_times_each_model():
+    """Good model -> timing; model raising -> logged and left out"""
+    calls = []
+
+    def predict(rows):
+        calls.append(len(rows))
+        return [123.0]
+
+    def broken(rows):
+        raise RuntimeError("bad model")
+
+    timings = warmup.warm_up_models(_app(Capped=_backend(predict), Repair=_backend(broken)))
+    assert list(timings) == ["Capped"] and timings["Capped"] >= 0
+    assert calls == [1]
+
+
+# Test the render modes: ensures "wait" renders before returning and "off" skips rendering
+def test_warm_up_render_modes(monkeypatch):
+    """No renderer -> inline render without SHAP; background fills render_ms once the task ends"""
+    rendered = []
+    monkeypatch.setattr(warmup, "warm_up_rendering", lambda shap_plots=True: rendered.append(shap_plots) or 5.0)
+    app = _app(Capped=_backend(lambda rows: [1.0]))
+
+    assert asyncio.run(warmup.warm_up(app, render="off"))["render_ms"] is None
+    assert rendered == []
+    assert asyncio.run(warmup.warm_up(app, render="wait"))["render_ms"] == 5.0
+    assert rendered == [False]
+
+    async def background():
+        result = await warmup.warm_up(app, render="background")
+        await app.state.render_warmup
+        return result
+
+    assert asyncio.run(background())["render_ms"] == 5.0
+
+
+# Test lazy imports: ensures importing the plotting helpers doesn't load shap or pyplot
+def test_plotting_import_is_light():
+    """shap / matplotlib.pyplot stay out of sys.modules until a plot is drawn"""
+    code = "import sys, utils.plotting; print('shap' in sys.modules, 'matplotlib.pyplot' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).parent.parent, capture_output=True, text=True)
+    assert out.stdout.split() == ["False", "False"]
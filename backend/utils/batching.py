@@ -0,0 +1,107 @@
+import asyncio
+import time
+
+from utils.concurrency import run_stage
+from utils.metrics import Histogram, LATENCY_BUCKETS_MS, BATCH_SIZE_BUCKETS
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-row predictions for one model into single
+    predict(rows) calls whose results are fanned back out to the callers.
+    An idle batcher scores a row straight away, so a lone request pays no
+    window; while a batch is running, new rows queue until it finishes,
+    window seconds pass or max_batch rows are waiting, whichever is first.
+
+    predict is run through run(fn, rows), normally the predict stage
+    executor, so the event loop never blocks on the model. Lives on the
+    event loop it is first used from; not thread-safe.
+    """
+
+    def __init__(self, name: str, predict, window: float, max_batch: int, run=None):
+        self.name = name
+        self.predict_rows = predict
+        self.window = window
+        self.max_batch = max_batch
+        self._run = run
+        self._queue = []
+        self._timer = None
+        self._inflight = set()
+        self._running = 0
+        self.batch_size = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(LATENCY_BUCKETS_MS)
+
+    async def predict(self, row) -> float:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append((row, future, time.perf_counter()))
+        if len(self._queue) >= self.max_batch or not self._running:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._queue = self._queue, []
+        if batch:
+            self._running += 1
+            task = asyncio.ensure_future(self._score(batch))
+            # The loop only keeps weak references to tasks
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _score(self, batch):
+        started = time.perf_counter()
+        self.batch_size.observe(len(batch))
+        for _, _, queued in batch:
+            self.queue_wait_ms.observe((started - queued) * 1000)
+
+        rows = [row for row, _, _ in batch]
+        try:
+            if self._run is None:
+                predictions = self.predict_rows(rows)
+            else:
+                predictions = await self._run(self.predict_rows, rows)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future, _), value in zip(batch, predictions):
+                if not future.done():  # the caller may have gone away
+                    future.set_result(float(value))
+        finally:
+            self._running -= 1
+            # Rows that queued behind this batch have waited long enough
+            if not self._running and self._queue:
+                self._flush()
+
+    def stats(self) -> dict:
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "queued": len(self._queue),
+            "batch_size": self.batch_size.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+        }
+
+
+def create_batchers(app, window_ms: float, max_batch: int) -> dict:
+    """
+    One MicroBatcher per model in app.state.models. Each flush looks the
+    model up again, so a model swapped into app.state.models is picked up
+    by the next batch. Batches run on the predict stage.
+    """
+    def model_predict(name):
+        return lambda rows: app.state.models[name].predict(rows)
+
+    async def run(fn, rows):
+        return await run_stage(app, "predict", fn, rows)
+
+    return {
+        name: MicroBatcher(name, model_predict(name), window_ms / 1000, max_batch, run)
+        for name in app.state.models
+    }
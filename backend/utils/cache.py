@@ -0,0 +1,99 @@
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class TTLCache:
+    """
+    Bounded LRU cache with an optional time-to-live, safe to share between
+    request threads. Keeps hit / miss / eviction counters for monitoring.
+    With maxbytes, entries are also evicted once their total size (as
+    measured by sizeof(key, value), approx_size by default) exceeds it.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = None, maxbytes: int = None, sizeof=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self._sizeof = (sizeof or approx_size) if maxbytes else None
+        self._bytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                value, expires, size = item
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self._bytes -= size
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        size = self._sizeof(key, value) if self._sizeof else 0
+        with self._lock:
+            previous = self._data.get(key)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._data[key] = (value, expires, size)
+            self._data.move_to_end(key)
+            self._bytes += size
+            while len(self._data) > self.maxsize or (self.maxbytes and self._bytes > self.maxbytes):
+                _, (_, _, evicted) = self._data.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "bytes": self._bytes,
+                "maxbytes": self.maxbytes,
+            }
+
+
+def approx_size(*objects) -> int:
+    """Rough in-memory bytes of scalars, strings, numpy arrays and (nested) tuples / lists of them."""
+    total = 0
+    for obj in objects:
+        if isinstance(obj, np.ndarray):
+            total += sys.getsizeof(obj) + (0 if obj.flags.owndata else obj.nbytes)
+        elif isinstance(obj, (tuple, list)):
+            total += sys.getsizeof(obj) + approx_size(*obj)
+        else:
+            total += sys.getsizeof(obj)
+    return total
+
+
+def canonical_key(*parts) -> str:
+    """Stable hash of JSON-serialisable parts (dict keys sorted)."""
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
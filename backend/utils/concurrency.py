@@ -0,0 +1,90 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.errors import ServiceUnavailableException
+from utils.profiling import current_profile
+
+
+class StageBusy(Exception):
+    """Raised when a stage already has max_pending jobs queued or running."""
+
+
+class StageExecutor:
+    """
+    Dedicated thread pool for one CPU-heavy request stage (predict, filter).
+    Admission is bounded: once max_pending jobs are queued or running, run()
+    fails immediately with StageBusy instead of letting the queue grow, so a
+    burst sheds load rather than stretching every request's latency.
+    """
+
+    def __init__(self, name: str, workers: int, max_pending: int):
+        self.name = name
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pending = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-stage")
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "rejected": self._rejected,
+        }
+
+    def _acquire(self):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise StageBusy(f"{self.name}: {self._pending} jobs already pending")
+            self._pending += 1
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        self._acquire()
+        try:
+            # In a copy of the caller's context, so the job's stage timings reach its request
+            future = self._pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+        # Released when the job finishes, not when the caller stops waiting
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def create_executors(stages: dict) -> dict:
+    """stages: {name: (workers, max_pending)} -> {name: StageExecutor}"""
+    return {name: StageExecutor(name, workers, depth) for name, (workers, depth) in stages.items()}
+
+
+async def run_stage(app, stage: str, fn, *args, **kwargs):
+    """
+    Runs fn on the app's executor for stage, turning a full stage into a 503.
+    Without executors (tests, scripts) fn simply runs inline. Inside a
+    profiled request fn is profiled in the thread that runs it.
+    """
+    executor = (getattr(app.state, "executors", None) or {}).get(stage)
+    profile = current_profile()
+    if profile is not None:
+        fn, args = profile.call, (fn, *args)
+    if executor is None:
+        return fn(*args, **kwargs)
+    try:
+        return await executor.run(fn, *args, **kwargs)
+    except StageBusy:
+        raise ServiceUnavailableException(f"Server busy ({stage}), please retry")
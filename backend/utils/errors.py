@@ -25,6 +25,12 @@ class InternalErrorException(AppException):
         super().__init__(status_code=500, detail=detail, code="INTERNAL_ERROR")
 
 
+class ServiceUnavailableException(AppException):
+    def __init__(self, detail: str = "Service unavailable", retry_after: int = 1):
+        super().__init__(status_code=503, detail=detail, code="SERVICE_UNAVAILABLE")
+        self.headers = {"Retry-After": str(retry_after)}
+
+
 def error_response(exc: AppException) -> dict:
     """Format error response consistently"""
     return ErrorResponse(
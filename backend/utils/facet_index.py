@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+from schemas.requests import CarFeatures
+from utils.cache import TTLCache, canonical_key
+from utils.historical_index import HistoricalIndex
+from utils.historical_summary import feature_mask
+
+# Dropdown columns returned by /historical/prefilter, in cascade order
+FACET_COLUMNS = ["Make", "Model", "Year", "EngineSize", "Distance", "Months"]
+
+# Continuous columns that would make the combination table as large as the frame
+_UNINDEXED = {"AdjustedPrice"}
+
+
+class FacetIndex:
+    """
+    Dropdown options for one historical frame. The frame is reduced once to
+    its distinct combinations of filterable columns (partitioned by Make /
+    Model like HistoricalIndex), so a lookup scans a handful of combinations
+    instead of the full frame; results are cached per filter signature as
+    plain sorted lists ready to serialise.
+    """
+
+    def __init__(self, df: pd.DataFrame, cache_size: int = 1024, index: HistoricalIndex = None):
+        self.source_columns = set(df.columns)
+        self.columns = [c for c in CarFeatures.model_fields if c in df.columns and c not in _UNINDEXED]
+        self.outputs = [c for c in FACET_COLUMNS if c in df.columns]
+        self.cache = TTLCache(maxsize=cache_size)
+
+        combos = df[self.columns].drop_duplicates(ignore_index=True) if self.columns else pd.DataFrame()
+        if len(combos) * 2 > len(df):
+            # Hardly any repeats: a second copy wouldn't pay for itself, search the frame
+            combos = df
+        self.combos = combos
+        self.index = index if index is not None and index.df is combos else HistoricalIndex(combos)
+
+        # The unfiltered options are what every form starts from
+        if not df.empty:
+            self.options({})
+
+    def __len__(self):
+        return len(self.combos)
+
+    def supports(self, data_dict) -> bool:
+        """False when the request filters on a column the combinations don't carry."""
+        return not any(
+            data_dict.get(key) is not None and key in self.source_columns
+            for key in _UNINDEXED
+        )
+
+    def options(self, data_dict):
+        """Sorted distinct values of each facet column among rows matching data_dict."""
+        values = {k: data_dict[k] for k in self.columns if data_dict.get(k) is not None}
+        key = canonical_key(values)
+        result = self.cache.get(key)
+        if result is None:
+            result = self._compute(values)
+            self.cache.set(key, result)
+        return result
+
+    def _compute(self, data_dict):
+        positions = self.index.select(data_dict)
+        if positions is None:
+            positions = np.flatnonzero(feature_mask(self.combos, data_dict, []).to_numpy())
+
+        result = {col: [] for col in FACET_COLUMNS}
+        for col in self.outputs:
+            result[col] = distinct_sorted(self.combos[col], positions)
+        return result
+
+
+def distinct_sorted(series: pd.Series, positions: np.ndarray = None) -> list:
+    """Sorted non-null distinct values of series (at positions, if given), as native Python values."""
+    if positions is None:
+        positions = np.arange(len(series))
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()[positions]
+        present = np.unique(codes[codes >= 0])
+        return sorted(series.cat.categories[present].tolist())
+
+    values = series.to_numpy()[positions]
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        values = values[~pd.isna(values)]
+        return np.unique(values).tolist()
+    return sorted(pd.unique(values[~pd.isna(values)]).tolist())
+
+
+def build_facet_indexes(historical_sets, cache_size: int = 1024, indexes=None):
+    """indexes: HistoricalIndex per dataset, reused when the frame itself is searched."""
+    indexes = indexes or {}
+    return {name: FacetIndex(df, cache_size, indexes.get(name)) for name, df in historical_sets.items()}
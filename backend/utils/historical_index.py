@@ -0,0 +1,145 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PARTITION_KEYS = ("Make", "Model")
+SORTED_KEYS = ("Year", "EngineSize", "Distance", "Months")
+PRICE_KEY = "AdjustedPrice"
+
+# np.isclose defaults, used to turn a float match into a sorted range
+_RTOL = 1e-05
+_ATOL = 1e-08
+
+
+class Partition:
+    """
+    Row positions for one Make or (Make, Model) group, plus each secondary
+    key presorted so equality filters become a searchsorted range, and the
+    group's prices presorted for summaries / percentiles.
+    """
+
+    def __init__(self, df: pd.DataFrame, positions: np.ndarray):
+        # int32 halves the per-worker footprint; frames never get near 2**31 rows
+        self.positions = positions.astype(np.int32)
+        self.sorted_keys = {}
+        for key in SORTED_KEYS:
+            if key not in df.columns or not pd.api.types.is_numeric_dtype(df[key].dtype):
+                continue
+            values = df[key].to_numpy()[positions]
+            order = np.argsort(values, kind="stable").astype(np.int32)
+            self.sorted_keys[key] = (values[order], order)
+
+        self.prices = None
+        if PRICE_KEY in df.columns and pd.api.types.is_numeric_dtype(df[PRICE_KEY].dtype):
+            self.prices = np.sort(df[PRICE_KEY].to_numpy(dtype=np.float64)[positions])
+
+    def __len__(self):
+        return len(self.positions)
+
+
+class HistoricalIndex:
+    """
+    Partition index over one historical DataFrame. Lets filter_df_by_features
+    touch only the rows that share the requested Make / Model instead of
+    building a mask over the whole frame.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.by_make = {}
+        self.by_make_model = {}
+
+        if df.empty or any(key not in df.columns for key in PARTITION_KEYS):
+            return
+        if any(pd.api.types.is_numeric_dtype(df[key].dtype) for key in PARTITION_KEYS):
+            return
+
+        for make, positions in df.groupby("Make", sort=False).indices.items():
+            self.by_make[make] = Partition(df, positions)
+        for key, positions in df.groupby(list(PARTITION_KEYS), sort=False).indices.items():
+            self.by_make_model[key] = Partition(df, positions)
+
+    def partition_for(self, data_dict):
+        """Returns the smallest partition covering the request, or None when the index can't help."""
+        make, model = data_dict.get("Make"), data_dict.get("Model")
+        if make is None or not self.by_make:
+            return None
+        if model is not None:
+            return self.by_make_model.get((make, model), _EMPTY)
+        return self.by_make.get(make, _EMPTY)
+
+    def sorted_prices(self, data_dict):
+        """
+        Presorted prices (NaN last) when data_dict selects a whole partition,
+        i.e. nothing but Make / Model is set; None otherwise.
+        """
+        for key, value in data_dict.items():
+            if value is not None and key not in PARTITION_KEYS and key in self.df.columns:
+                return None
+        partition = self.partition_for(data_dict)
+        return None if partition is None else partition.prices
+
+    def select(self, data_dict):
+        """
+        Returns the sorted row positions matching every non-null feature in
+        data_dict (same semantics as the full-frame mask), or None if the
+        request has no Make to partition on.
+        """
+        partition = self.partition_for(data_dict)
+        if partition is None:
+            return None
+        if len(partition) == 0:
+            return partition.positions
+
+        df = self.df
+        keep = np.ones(len(partition), dtype=bool)
+
+        for key, value in data_dict.items():
+            if key in PARTITION_KEYS or value is None or key not in df.columns:
+                continue
+            try:
+                is_float = pd.api.types.is_float_dtype(df[key].dtype)
+                if key in partition.sorted_keys:
+                    keep &= _sorted_match(partition.sorted_keys[key], value, is_float)
+                elif is_float:
+                    keep &= np.isclose(df[key].to_numpy()[partition.positions], float(value))
+                else:
+                    keep &= (df[key].iloc[partition.positions] == value).to_numpy()
+            except Exception as e:
+                logger.warning("Could not apply filter", extra={"key": key, "value": value, "error": str(e)})
+
+        return partition.positions[keep]
+
+
+def _sorted_match(sorted_key, value, is_float):
+    """Boolean mask (in partition order) of rows whose key equals value."""
+    sorted_values, order = sorted_key
+    mask = np.zeros(len(order), dtype=bool)
+
+    if is_float:
+        target = float(value)
+        if np.isnan(target):
+            return mask
+        tol = _ATOL + _RTOL * abs(target)
+        # Widen slightly so rounding can't drop a boundary row, then confirm with isclose
+        margin = tol * 1e-3 + np.spacing(abs(target) + tol) * 4
+        lo = np.searchsorted(sorted_values, target - tol - margin, side="left")
+        hi = np.searchsorted(sorted_values, target + tol + margin, side="right")
+        hits = lo + np.flatnonzero(np.isclose(sorted_values[lo:hi], target))
+    else:
+        lo = np.searchsorted(sorted_values, value, side="left")
+        hi = np.searchsorted(sorted_values, value, side="right")
+        hits = np.arange(lo, hi)
+
+    mask[order[hits]] = True
+    return mask
+
+
+_EMPTY = Partition(pd.DataFrame(), np.empty(0, dtype=np.int64))
+
+
+def build_historical_indexes(historical_sets):
+    return {name: HistoricalIndex(df) for name, df in historical_sets.items()}
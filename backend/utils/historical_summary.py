@@ -1,10 +1,15 @@
+import logging
+
 import pandas as pd
 import numpy as np
 
-def filter_df_by_features(df: pd.DataFrame, raw_data, required_keys=None):
+logger = logging.getLogger(__name__)
+
+def filter_df_by_features(df: pd.DataFrame, raw_data, required_keys=None, index=None):
     """
     Filters dataframe by required fields Make & Model, and any optional fields present.
     Handles type mismatches and NaNs gracefully.
+    When a HistoricalIndex for df is given, only the matching Make/Model partition is scanned.
     """
     data_dict = raw_data.model_dump()
     required_keys = required_keys or []
@@ -13,6 +18,22 @@ def filter_df_by_features(df: pd.DataFrame, raw_data, required_keys=None):
         if key not in df.columns or data_dict.get(key) is None:
             raise ValueError(f"{key} is required for filtering but is missing")
 
+    positions = None
+    if index is not None and index.df is df and set(required_keys) <= {"Make", "Model"}:
+        positions = index.select(data_dict)
+
+    if positions is not None:
+        filtered_df = df.iloc[positions]
+    else:
+        filtered_df = df[feature_mask(df, data_dict, required_keys)]
+
+    if filtered_df.empty:
+        logger.debug("No matching rows found", extra={"filters": data_dict})
+
+    return filtered_df
+
+
+def feature_mask(df, data_dict, required_keys):
     mask = pd.Series(True, index=df.index)
 
     for key in required_keys:
@@ -23,23 +44,19 @@ def filter_df_by_features(df: pd.DataFrame, raw_data, required_keys=None):
             continue
         try:
             col_type = df[key].dtype
-            if np.issubdtype(col_type, np.floating):
+            if pd.api.types.is_float_dtype(col_type):
                 mask &= np.isclose(df[key], float(value))
             else:
                 mask &= df[key] == value
         except Exception as e:
-            print(f"Warning: Could not apply filter for {key}={value}: {e}")
-
-    filtered_df = df[mask]
+            logger.warning("Could not apply filter", extra={"key": key, "value": value, "error": str(e)})
 
-    if filtered_df.empty:
-        print("No matching rows found. Filters applied:", data_dict)
-
-    return filtered_df
+    return mask
 
 
 
-def compare_price(predicted_price, summary, historical_prices):
+def compare_price(predicted_price, summary, historical_prices, presorted=False):
+    """presorted: historical_prices is already an ascending array (NaN last), so it isn't re-sorted."""
     iqr_low = summary.get("q1", 0)
     iqr_high = summary.get("q3", 0)
     mean = summary.get("mean", 0)
@@ -54,7 +71,7 @@ def compare_price(predicted_price, summary, historical_prices):
         if (iqr_high - iqr_low) != 0 else 0
     )
 
-    sorted_prices = np.sort(historical_prices)
+    sorted_prices = historical_prices if presorted else np.sort(historical_prices)
     percentile = np.searchsorted(sorted_prices, predicted_price) / len(sorted_prices)
 
     if 0.25 <= percentile <= 0.75:
@@ -76,7 +93,20 @@ def compare_price(predicted_price, summary, historical_prices):
         "percentile": percentile
     }
 
-def build_price_summary(df, price_col="AdjustedPrice"):
+def sort_prices(df, price_col="AdjustedPrice"):
+    """Ascending float64 prices with NaN last, the layout compare_price / build_price_summary accept presorted."""
+    return np.sort(df[price_col].to_numpy(dtype=np.float64))
+
+
+def build_price_summary(df, price_col="AdjustedPrice", sorted_prices=None):
+    """
+    Price statistics for df. When sorted_prices (from sort_prices or a
+    HistoricalIndex partition) is given they are read straight off the
+    sorted array instead of recomputed from the column.
+    """
+    if sorted_prices is not None:
+        return _summary_from_sorted(sorted_prices)
+
     # Make sure the column exists
     if price_col not in df.columns:
         return {"min": 0.0, "q1": 0.0, "median": 0.0, "q3": 0.0, "max": 0.0}
@@ -87,7 +117,6 @@ def build_price_summary(df, price_col="AdjustedPrice"):
     if price_series.empty:
         return {"min": 0.0, "iqr_low": 0.0, "median": 0.0, "iqr_high": 0.0, "max": 0.0}
 
-    print(len(price_series))
     # Compute summary
     return {
         "min": float(price_series.min()),
@@ -97,3 +126,32 @@ def build_price_summary(df, price_col="AdjustedPrice"):
         "max": float(price_series.max()),
         "count": float(len(price_series)),
     }
+
+
+def _summary_from_sorted(sorted_prices):
+    # NaNs sort last; everything up to +inf is a real price
+    n = int(np.searchsorted(sorted_prices, np.inf, side="right"))
+    if n == 0:
+        return {"min": 0.0, "iqr_low": 0.0, "median": 0.0, "iqr_high": 0.0, "max": 0.0}
+
+    middle = n // 2
+    median = sorted_prices[middle] if n % 2 else (sorted_prices[middle - 1] + sorted_prices[middle]) / 2
+    return {
+        "min": float(sorted_prices[0]),
+        "iqr_low": _sorted_quantile(sorted_prices, n, 0.25),
+        "median": float(median),
+        "iqr_high": _sorted_quantile(sorted_prices, n, 0.75),
+        "max": float(sorted_prices[n - 1]),
+        "count": float(n),
+    }
+
+
+def _sorted_quantile(sorted_prices, n, q):
+    """Linear-interpolated quantile of the first n sorted values, same arithmetic as numpy / pandas."""
+    position = q * (n - 1)
+    lo = int(np.floor(position))
+    hi = min(lo + 1, n - 1)
+    t = position - lo
+    a, b = sorted_prices[lo], sorted_prices[hi]
+    diff = b - a
+    return float(b - diff * (1 - t) if t >= 0.5 else a + diff * t)
@@ -0,0 +1,53 @@
+import json
+import logging
+
+from config import LOG_LEVEL, LOG_FORMAT
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def _extra(record) -> dict:
+    return {k: v for k, v in vars(record).items() if k not in _RECORD_FIELDS}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any extra= fields."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **_extra(record),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class KeyValueFormatter(logging.Formatter):
+    """Plain text with extra= fields appended as key=value."""
+
+    def format(self, record):
+        line = super().format(record)
+        extra = _extra(record)
+        if extra:
+            line += " " + " ".join(f"{k}={v!r}" for k, v in extra.items())
+        return line
+
+
+def configure_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT):
+    """Sets up the root logger once per process; later calls only change the level."""
+    root = logging.getLogger()
+    root.setLevel(level)
+    if any(getattr(h, "_autoguru", False) for h in root.handlers):
+        return
+    handler = logging.StreamHandler()
+    handler._autoguru = True
+    if fmt == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(KeyValueFormatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    root.addHandler(handler)
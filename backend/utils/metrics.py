@@ -0,0 +1,104 @@
+import bisect
+import threading
+
+# Upper bounds for latency histograms, in milliseconds
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# Upper bounds for batch-size histograms, in rows
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram, safe to observe from several threads. Bucket i
+    counts observations <= buckets[i] (and above buckets[i - 1]); the last,
+    implicit bucket holds everything larger.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        """Cumulative counts per upper bound ("+Inf" last), with sum and count."""
+        with self._lock:
+            counts, total, count = list(self._counts), self._sum, self._count
+        cumulative, running = {}, 0
+        for bound, n in zip(list(self.buckets) + ["+Inf"], counts):
+            running += n
+            cumulative[str(bound)] = running
+        return {"buckets": cumulative, "sum": total, "count": count}
+
+
+def _label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(pairs) -> str:
+    return "{" + ",".join(f'{k}="{_label_value(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+
+class MetricsRegistry:
+    """
+    Named histogram families, each holding one Histogram per label set,
+    rendered in the Prometheus text exposition format. Label sets are created
+    on first observation.
+    """
+
+    def __init__(self):
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, description: str, buckets=LATENCY_BUCKETS_MS):
+        with self._lock:
+            self._families.setdefault(name, (description, tuple(buckets), {}))
+
+    def observe(self, name: str, value: float, **labels):
+        _, buckets, series = self._families[name]
+        key = tuple(sorted(labels.items()))
+        histogram = series.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = series.setdefault(key, Histogram(buckets))
+        histogram.observe(value)
+
+    def snapshot(self, name: str) -> dict:
+        """{label tuple: Histogram.snapshot()} for one family."""
+        _, _, series = self._families[name]
+        with self._lock:
+            items = list(series.items())
+        return {key: histogram.snapshot() for key, histogram in items}
+
+    def render(self) -> str:
+        lines = []
+        for name in sorted(self._families):
+            description = self._families[name][0]
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, snap in sorted(self.snapshot(name).items()):
+                for bound, count in snap["buckets"].items():
+                    lines.append(f"{name}_bucket{_labels(key + (('le', bound),))} {count}")
+                lines.append(f"{name}_sum{_labels(key)} {snap['sum']}")
+                lines.append(f"{name}_count{_labels(key)} {snap['count']}")
+        return "\n".join(lines) + "\n"
+
+
+REQUEST_DURATION = "http_request_duration_milliseconds"
+STAGE_DURATION = "request_stage_duration_milliseconds"
+
+
+def create_metrics() -> MetricsRegistry:
+    metrics = MetricsRegistry()
+    metrics.histogram(REQUEST_DURATION, "Time from request start to response headers, by route, method and status.")
+    metrics.histogram(STAGE_DURATION, "Time spent in each request stage, by route, model and stage.")
+    return metrics
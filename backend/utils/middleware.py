@@ -0,0 +1,94 @@
+import time
+
+from utils.metrics import REQUEST_DURATION, STAGE_DURATION
+from utils.timing import start_timings, reset_timings
+
+
+class VersionHeaderMiddleware:
+    """
+    Adds X-Model-Version / X-Data-Version to every HTTP response: the
+    versions in app.state.versions when the request arrived, i.e. the ones
+    it was served with even if a reload swaps them mid-request. Plain ASGI
+    rather than BaseHTTPMiddleware, so responses aren't re-wrapped.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        versions = getattr(scope["app"].state, "versions", None) if "app" in scope else None
+        if not versions:
+            return await self.app(scope, receive, send)
+        headers = [
+            (b"x-model-version", versions["model"].encode()),
+            (b"x-data-version", versions["data"].encode()),
+        ]
+
+        async def send_with_versions(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_versions)
+
+
+def server_timing_header(timings, total_ms: float) -> bytes:
+    entries = [f"{name};dur={ms:.2f}" for name, ms in timings.stages.items()]
+    entries.append(f"total;dur={total_ms:.2f}")
+    return ", ".join(entries).encode()
+
+
+class TimingMiddleware:
+    """
+    Starts the per-request stage timings (see utils/timing.py) and, when the
+    response headers go out, records the request and each stage into
+    app.state.metrics. With server_timing the stages are also sent back in a
+    Server-Timing header. Requests that reach no timed route are recorded
+    under route="unmatched" so arbitrary paths don't become label values.
+    """
+
+    def __init__(self, app, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        metrics = getattr(scope["app"].state, "metrics", None) if "app" in scope else None
+        if metrics is None:
+            return await self.app(scope, receive, send)
+
+        timings, token = start_timings()
+        recorded = False
+
+        def record(status_code):
+            nonlocal recorded
+            recorded = True
+            total = (time.perf_counter() - timings.start) * 1000
+            route = timings.route or "unmatched"
+            metrics.observe(REQUEST_DURATION, total, route=route, method=scope["method"], status=str(status_code))
+            for name, ms in timings.stages.items():
+                metrics.observe(STAGE_DURATION, ms, route=route, model=timings.model, stage=name)
+            return total
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and not recorded:
+                total = record(message["status"])
+                if self.server_timing:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing_header(timings, total)))
+                    message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        except Exception:
+            if not recorded:
+                record(500)
+            raise
+        finally:
+            reset_timings(token)
@@ -0,0 +1,78 @@
+import numpy as np
+
+# Histogram bins of the price chart, as in get_all_price_plots
+PRICE_BINS = 20
+# At most this many outliers are kept for the boxplot, spread over the outlier range
+MAX_FLIERS = 200
+SCATTER_COLUMNS = ("Months", "Distance")
+
+
+def box_stats(sorted_prices: np.ndarray, whis: float = 1.5) -> dict | None:
+    """matplotlib's boxplot statistics (Axes.bxp input) from ascending, NaN-free prices."""
+    if len(sorted_prices) == 0:
+        return None
+    q1, med, q3 = np.percentile(sorted_prices, [25, 50, 75])
+    iqr = q3 - q1
+    low = np.searchsorted(sorted_prices, q1 - whis * iqr, side="left")
+    high = np.searchsorted(sorted_prices, q3 + whis * iqr, side="right")
+    whislo = sorted_prices[low] if low < len(sorted_prices) else q1
+    whishi = sorted_prices[high - 1] if high > 0 else q3
+    fliers = np.concatenate([sorted_prices[:low], sorted_prices[high:]])
+    if len(fliers) > MAX_FLIERS:
+        fliers = fliers[np.linspace(0, len(fliers) - 1, MAX_FLIERS).astype(int)]
+    return {
+        "med": med, "q1": q1, "q3": q3,
+        "whislo": min(whislo, q1), "whishi": max(whishi, q3),
+        "fliers": fliers, "label": "",
+    }
+
+
+def density_grid(x: np.ndarray, y: np.ndarray, bins: int) -> dict:
+    """
+    2D histogram of (x, price) plus the 10th / 50th / 90th price percentile
+    per x bucket; None when no row has both values.
+    """
+    keep = np.isfinite(x) & np.isfinite(y)
+    x, y = x[keep], y[keep]
+    if len(x) == 0:
+        return None
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+
+    # Percentile bands: group prices by x bucket with one sort
+    bucket = np.clip(np.searchsorted(x_edges, x, side="right") - 1, 0, len(x_edges) - 2)
+    order = np.lexsort((y, bucket))
+    bucket, y = bucket[order], y[order]
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(bucket)]
+    bands = np.array([np.percentile(y[s:e], [10, 50, 90]) for s, e in zip(starts, ends)])
+    centers = (x_edges[bucket[starts]] + x_edges[bucket[starts] + 1]) / 2
+
+    return {
+        "counts": counts, "x_edges": x_edges, "y_edges": y_edges,
+        "centers": centers, "p10": bands[:, 0], "p50": bands[:, 1], "p90": bands[:, 2],
+    }
+
+
+class PlotAggregates:
+    """
+    Pre-binned stand-in for a large historical frame: boxplot statistics,
+    the price histogram and a density grid with percentile bands for each
+    scatter chart. Its size doesn't depend on the row count, so it is cheap
+    to cache with the summary and to send to a render worker, and drawing
+    from it takes the same time for 5k rows as for 5M.
+    """
+
+    def __init__(self, df, price_col: str = "AdjustedPrice", sorted_prices=None, bins: int = 50):
+        if sorted_prices is None:
+            sorted_prices = np.sort(df[price_col].to_numpy(dtype=np.float64))
+        prices = sorted_prices[~np.isnan(sorted_prices)]
+        self.rows = len(df)
+        self.columns = [c for c in SCATTER_COLUMNS if c in df.columns]
+        self.box = box_stats(prices)
+        self.hist = np.histogram(prices, bins=PRICE_BINS) if len(prices) else None
+
+        y = df[price_col].to_numpy(dtype=np.float64)
+        self.grids = {col: density_grid(df[col].to_numpy(dtype=np.float64), y, bins) for col in self.columns}
+
+    def __len__(self):
+        return self.rows
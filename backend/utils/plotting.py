@@ -1,8 +1,16 @@
-from catboost import Pool
-import matplotlib.pyplot as plt
 import io
 import base64
-import shap
+
+import numpy as np
+
+from utils.plot_aggregates import PlotAggregates
+from utils.timing import stage
+from config import PLOT_AGGREGATE_ROWS, PLOT_DENSITY_BINS
+
+# shap (which pulls in numba / sklearn), matplotlib and catboost are imported
+# where they are used: a worker that only predicts never loads shap or
+# matplotlib, and with a renderer configured only the render worker processes
+# do (see warm_up_rendering), without paying for catboost there
 
 def fig_to_base64(fig) -> str:
     buf = io.BytesIO()
@@ -10,7 +18,13 @@ def fig_to_base64(fig) -> str:
     buf.seek(0)
     return base64.b64encode(buf.read()).decode("utf-8")
 
-def generate_shap_plot(model, processed, feature_names):
+def compute_shap_values(model, processed, feature_names):
+    """
+    Computes SHAP values for every row in processed with a single CatBoost call.
+    Returns the per-row contribution matrix and the expected (base) value.
+    """
+    from catboost import Pool
+
     categorical_set = {"TaskName", "DriveType", "Make", "Model", "FuelType", "Transmission"}
     cat_features = [f for f in feature_names if f in categorical_set]
 
@@ -19,16 +33,23 @@ def generate_shap_plot(model, processed, feature_names):
         type="ShapValues"
     )
 
-    shap_values_matrix = shap_values[:, :-1]  
+    shap_values_matrix = shap_values[:, :-1]
     expected_value = shap_values[:, -1][0]
+    return shap_values_matrix, expected_value
+
+def render_shap_waterfall(values, expected_value, data_row, feature_names):
+    import shap
+    import matplotlib.pyplot as plt
 
     explainer = shap.Explanation(
-        values=shap_values_matrix[0],
+        values=values,
         base_values=expected_value,
-        data=processed[0],
+        data=data_row,
         feature_names=feature_names,
     )
 
+    # shap's waterfall only draws onto the pyplot current figure; this runs in
+    # a single-threaded render worker (utils.rendering), so the global state is safe there
     plt.figure()
     shap.plots.waterfall(explainer, show=False)
 
@@ -38,55 +59,130 @@ def generate_shap_plot(model, processed, feature_names):
     buf.seek(0)
     return base64.b64encode(buf.read()).decode("utf-8")
 
-def get_all_price_plots(filtered_df, predicted_price, month_value=None, distance_value=None, price_col="AdjustedPrice"):
+def generate_shap_plot(model, processed, feature_names):
+    shap_values_matrix, expected_value = compute_shap_values(model, processed, feature_names)
+    return render_shap_waterfall(shap_values_matrix[0], expected_value, processed[0], feature_names)
+
+def draw_density(ax, grid):
+    """
+    Row-count heatmap (log shading, darker = more jobs) of a PlotAggregates
+    grid, with the median and 10th-90th percentile band per bucket. No
+    colorbar: it costs more to lay out than the heatmap itself.
+    """
+    if grid is None:
+        return
+    from matplotlib.colors import LogNorm
+
+    counts = np.ma.masked_equal(grid["counts"].T, 0)
+    ax.pcolormesh(grid["x_edges"], grid["y_edges"], counts, cmap="Blues", norm=LogNorm(vmin=1, vmax=max(counts.max(), 1)))
+    ax.fill_between(grid["centers"], grid["p10"], grid["p90"], color="orange", alpha=0.25, label="10th-90th percentile")
+    ax.plot(grid["centers"], grid["p50"], color="darkorange", label="Median")
+
+
+def get_all_price_plots(filtered_df, predicted_price, month_value=None, distance_value=None, price_col="AdjustedPrice", plots=None):
+    """
+    Renders the historical comparison charts (all of them, or only the names
+    listed in plots). Uses standalone Figure objects (no pyplot state), so it
+    is safe to run concurrently and in render workers.
+    filtered_df may also be a PlotAggregates; frames over PLOT_AGGREGATE_ROWS
+    rows are aggregated here. Either way the charts are then drawn from bins
+    (density grids with percentile bands instead of one point per row), so
+    their cost stops growing with the row count.
+    """
+    from matplotlib.figure import Figure
+
+    aggregates = filtered_df if isinstance(filtered_df, PlotAggregates) else None
+    if aggregates is None and len(filtered_df) > PLOT_AGGREGATE_ROWS:
+        aggregates = PlotAggregates(filtered_df, price_col, bins=PLOT_DENSITY_BINS)
+    columns = filtered_df.columns if aggregates is None else aggregates.columns
+
+    wanted = None if plots is None else set(plots)
     plots = {}
 
     # Boxplot
-    fig1, ax1 = plt.subplots(figsize=(6, 4))
-    ax1.boxplot(filtered_df[price_col].dropna(), vert=False, patch_artist=True,
-                boxprops=dict(facecolor='lightblue'))
-    ax1.axvline(predicted_price, color='red', linestyle='--', label='Predicted')
-    ax1.set_title("Historical Price Distribution (Boxplot)")
-    ax1.set_xlabel("Price")
-    ax1.legend()
-    plots["boxplot_png"] = fig_to_base64(fig1)
-    plt.close(fig1)
+    if wanted is None or "boxplot_png" in wanted:
+        with stage("render.boxplot_png"):
+            fig1 = Figure(figsize=(6, 4))
+            ax1 = fig1.subplots()
+            if aggregates is None:
+                ax1.boxplot(filtered_df[price_col].dropna(), vert=False, patch_artist=True,
+                            boxprops=dict(facecolor='lightblue'))
+            elif aggregates.box is not None:
+                ax1.bxp([aggregates.box], vert=False, patch_artist=True,
+                        boxprops=dict(facecolor='lightblue'))
+            ax1.axvline(predicted_price, color='red', linestyle='--', label='Predicted')
+            ax1.set_title("Historical Price Distribution (Boxplot)")
+            ax1.set_xlabel("Price")
+            ax1.legend()
+            plots["boxplot_png"] = fig_to_base64(fig1)
 
     # Histogram
-    fig2, ax2 = plt.subplots(figsize=(6, 4))
-    ax2.hist(filtered_df[price_col].dropna(), bins=20, edgecolor='black', alpha=0.7)
-    ax2.axvline(predicted_price, color='red', linestyle='--', label='Predicted')
-    ax2.set_title("Historical Price Distribution (Histogram)")
-    ax2.set_xlabel("Price")
-    ax2.set_ylabel("Frequency")
-    ax2.legend()
-    plots["histogram_png"] = fig_to_base64(fig2)
-    plt.close(fig2)
+    if wanted is None or "histogram_png" in wanted:
+        with stage("render.histogram_png"):
+            fig2 = Figure(figsize=(6, 4))
+            ax2 = fig2.subplots()
+            if aggregates is None:
+                ax2.hist(filtered_df[price_col].dropna(), bins=20, edgecolor='black', alpha=0.7)
+            elif aggregates.hist is not None:
+                counts, edges = aggregates.hist
+                ax2.hist(edges[:-1], bins=edges, weights=counts, edgecolor='black', alpha=0.7)
+            ax2.axvline(predicted_price, color='red', linestyle='--', label='Predicted')
+            ax2.set_title("Historical Price Distribution (Histogram)")
+            ax2.set_xlabel("Price")
+            ax2.set_ylabel("Frequency")
+            ax2.legend()
+            plots["histogram_png"] = fig_to_base64(fig2)
 
     # Months vs Price
-    if "Months" in filtered_df.columns:
-        fig3, ax3 = plt.subplots(figsize=(6,4))
-        ax3.scatter(filtered_df["Months"], filtered_df[price_col], alpha=0.6, label="Historical")
-        if month_value is not None:
-            ax3.scatter([month_value], [predicted_price], color="red", s=100, label="Predicted", zorder=5)
-        ax3.set_xlabel("Months")
-        ax3.set_ylabel("Price")
-        ax3.set_title("Price vs Months")
-        ax3.legend()
-        plots["month_vs_price_png"] = fig_to_base64(fig3)
-        plt.close(fig3)
-    
+    if "Months" in columns and (wanted is None or "month_vs_price_png" in wanted):
+        with stage("render.month_vs_price_png"):
+            fig3 = Figure(figsize=(6, 4))
+            ax3 = fig3.subplots()
+            if aggregates is None:
+                ax3.scatter(filtered_df["Months"], filtered_df[price_col], alpha=0.6, label="Historical")
+            else:
+                draw_density(ax3, aggregates.grids["Months"])
+            if month_value is not None:
+                ax3.scatter([month_value], [predicted_price], color="red", s=100, label="Predicted", zorder=5)
+            ax3.set_xlabel("Months")
+            ax3.set_ylabel("Price")
+            ax3.set_title("Price vs Months")
+            ax3.legend()
+            plots["month_vs_price_png"] = fig_to_base64(fig3)
+
     # Distance vs Price
-    if "Distance" in filtered_df.columns:
-        fig4, ax4 = plt.subplots(figsize=(6,4))
-        ax4.scatter(filtered_df["Distance"], filtered_df[price_col], alpha=0.6, label="Historical")
-        if distance_value is not None:
-            ax4.scatter([distance_value], [predicted_price], color="red", s=100, label="Predicted", zorder=5)
-        ax4.set_xlabel("Distance")
-        ax4.set_ylabel("Price")
-        ax4.set_title("Price vs Distance")
-        ax4.legend()
-        plots["distance_vs_price_png"] = fig_to_base64(fig4)
-        plt.close(fig4)
+    if "Distance" in columns and (wanted is None or "distance_vs_price_png" in wanted):
+        with stage("render.distance_vs_price_png"):
+            fig4 = Figure(figsize=(6, 4))
+            ax4 = fig4.subplots()
+            if aggregates is None:
+                ax4.scatter(filtered_df["Distance"], filtered_df[price_col], alpha=0.6, label="Historical")
+            else:
+                draw_density(ax4, aggregates.grids["Distance"])
+            if distance_value is not None:
+                ax4.scatter([distance_value], [predicted_price], color="red", s=100, label="Predicted", zorder=5)
+            ax4.set_xlabel("Distance")
+            ax4.set_ylabel("Price")
+            ax4.set_title("Price vs Distance")
+            ax4.legend()
+            plots["distance_vs_price_png"] = fig_to_base64(fig4)
 
     return plots
+
+
+def warm_up_rendering(shap_plots: bool = True) -> float:
+    """
+    Renders throwaway plots so the imports, matplotlib's font cache and the
+    first-draw setup are paid before traffic arrives; returns the time taken
+    in ms. shap_plots=False skips the SHAP waterfall (and the shap import).
+    """
+    import time
+    import pandas as pd
+
+    start = time.perf_counter()
+    df = pd.DataFrame({"AdjustedPrice": [100.0, 150.0, 200.0], "Months": [6.0, 12.0, 24.0]})
+    get_all_price_plots(df, 150.0, 12.0, plots=["boxplot_png", "month_vs_price_png"])
+    if shap_plots:
+        render_shap_waterfall(np.array([1.0, -1.0]), 150.0, np.array(["TOYOTA", 2015], dtype=object), ["Make", "Year"])
+    return (time.perf_counter() - start) * 1000
+
@@ -0,0 +1,238 @@
+import asyncio
+import cProfile
+import hmac
+import json
+import logging
+import profile
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import parse_qs
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("off", "admin", "debug")
+PROFILE_NAME = re.compile(r"\d{8}T\d{6}-[0-9a-f]{8}")
+
+_active = ContextVar("profiling", default=None)
+
+# cProfile follows only the thread that enabled it up to 3.11; from 3.12 it is
+# built on sys.monitoring, sees every thread and allows one profiler at a time.
+# There the pure-Python profiler (a per-thread sys.setprofile hook; slower) keeps
+# a stage job's profile to its own thread. Render processes run one job at a
+# time, so they always use cProfile.
+THREAD_PROFILER = cProfile.Profile if sys.version_info < (3, 12) else profile.Profile
+
+
+class _Snapshot:
+    """pstats.Stats input made from an already collected stats dict."""
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class RequestProfile:
+    """
+    The profiles of one request's stage and render jobs, each taken in the
+    thread or process that ran it (run_profiled), so jobs of other requests
+    running meanwhile never show up here.
+    """
+
+    def __init__(self):
+        self._snapshots = []
+        self._lock = threading.Lock()
+
+    @property
+    def jobs(self) -> int:
+        return len(self._snapshots)
+
+    def record(self, stats: dict):
+        with self._lock:
+            self._snapshots.append(_Snapshot(stats))
+
+    def unwrap(self, outcome):
+        """Records a run_profiled outcome and returns its result (or raises its error)."""
+        error, result, stats = outcome
+        self.record(stats)
+        if error is not None:
+            raise error
+        return result
+
+    def call(self, fn, *args, **kwargs):
+        """fn run here under its own profiler, recorded into this profile."""
+        return self.unwrap(run_profiled(fn, *args, **kwargs))
+
+    def stats(self) -> pstats.Stats:
+        with self._lock:
+            return pstats.Stats(*self._snapshots) if self._snapshots else pstats.Stats()
+
+
+def _invoke(fn, args, kwargs):
+    return fn(*args, **kwargs)
+
+
+def _profiled(profiler_class, fn, args, kwargs):
+    profiler = profiler_class()
+    error = result = None
+    try:
+        result = profiler.runcall(_invoke, fn, args, kwargs)
+    except Exception as e:
+        error = e
+    profiler.create_stats()
+    return error, result, profiler.stats
+
+
+def run_profiled(fn, *args, **kwargs):
+    """Runs fn under a profiler of the current thread; returns (error, result, stats) for RequestProfile.unwrap."""
+    return _profiled(THREAD_PROFILER, fn, args, kwargs)
+
+
+def run_profiled_process(fn, *args, **kwargs):
+    """run_profiled for a single-job worker process (picklable, always cProfile)."""
+    return _profiled(cProfile.Profile, fn, args, kwargs)
+
+
+def current_profile():
+    """The RequestProfile of the profiled request being served, else None."""
+    return _active.get()
+
+
+def _flag(value) -> bool:
+    return value.lower() in ("1", "true", "yes")
+
+
+def profile_requested(scope) -> bool:
+    for name, value in scope.get("headers", []):
+        if name == b"x-profile":
+            return _flag(value.decode("latin-1"))
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    return bool(query.get("profile")) and _flag(query["profile"][-1])
+
+
+def admin_token_valid(scope, token: str) -> bool:
+    if not token:
+        return False
+    for name, value in scope.get("headers", []):
+        if name == b"x-admin-token":
+            return hmac.compare_digest(value.decode("latin-1"), token)
+    return False
+
+
+def profile_path(directory, name: str):
+    """The .prof file for a listed profile name, or None (also for names that aren't ours)."""
+    if not PROFILE_NAME.fullmatch(name):
+        return None
+    path = Path(directory) / f"{name}.prof"
+    return path if path.is_file() else None
+
+
+def top_functions(stats: pstats.Stats, n: int = 10) -> list:
+    """The n functions with the most self time: where the request actually spent it."""
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:n]
+    return [
+        {"function": f"{file}:{line}({func})", "calls": calls, "self_ms": tottime * 1000, "cumulative_ms": cumtime * 1000}
+        for (file, line, func), (_, calls, tottime, cumtime, _) in rows
+    ]
+
+
+def list_profiles(directory, limit: int = 50) -> list:
+    """Metadata of the newest profiles in directory, newest first."""
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    entries = []
+    for meta in sorted(directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)[:limit]:
+        try:
+            entries.append(json.loads(meta.read_text()))
+        except (OSError, ValueError):
+            continue
+    return entries
+
+
+def prune_profiles(directory: Path, keep: int):
+    metas = sorted(Path(directory).glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for meta in metas[keep:]:
+        meta.with_suffix(".prof").unlink(missing_ok=True)
+        meta.unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests that ask for it (X-Profile: 1 or ?profile=1) and writes
+    <name>.prof (pstats; open with snakeviz or `python -m pstats`, or convert
+    with flameprof for a flamegraph) plus <name>.json metadata to directory.
+    The profile name comes back in an X-Profile header.
+
+    The profile holds the request's stage and render jobs (run_stage,
+    submit_render), each profiled where it runs: the event loop is never
+    profiled, so other requests it serves meanwhile don't leak in, and the
+    jobs still run on their executors instead of blocking the loop.
+    duration_ms is the whole request.
+
+    mode "admin" only honours the flag from clients sending a valid
+    X-Admin-Token, "debug" from anyone. With mode "off" the server doesn't
+    install this middleware at all.
+    """
+
+    def __init__(self, app, mode: str, directory, keep: int = 50, admin_token: str = ""):
+        self.app = app
+        self.mode = mode
+        self.directory = Path(directory)
+        self.keep = keep
+        self.admin_token = admin_token
+
+    def _allowed(self, scope) -> bool:
+        return self.mode == "debug" or (self.mode == "admin" and admin_token_valid(scope, self.admin_token))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not profile_requested(scope) or not self._allowed(scope):
+            return await self.app(scope, receive, send)
+
+        name = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        meta = {
+            "name": name,
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "method": scope["method"],
+            "path": scope["path"],
+            "query": scope.get("query_string", b"").decode("latin-1"),
+            "status": None,
+        }
+        request_profile = RequestProfile()
+        token = _active.set(request_profile)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, self._with_header(send, name.encode(), meta))
+        finally:
+            meta["duration_ms"] = (time.perf_counter() - start) * 1000
+            _active.reset(token)
+            await asyncio.to_thread(self._save, request_profile, meta)
+
+    @staticmethod
+    def _with_header(send, value: bytes, meta: dict):
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start":
+                meta["status"] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile", value)]
+            await send(message)
+        return send_with_profile
+
+    def _save(self, request_profile: RequestProfile, meta):
+        try:
+            stats = request_profile.stats()
+            meta["jobs"] = request_profile.jobs
+            meta["top"] = top_functions(stats)
+            self.directory.mkdir(parents=True, exist_ok=True)
+            stats.dump_stats(str(self.directory / f"{meta['name']}.prof"))
+            (self.directory / f"{meta['name']}.json").write_text(json.dumps(meta))
+            prune_profiles(self.directory, self.keep)
+        except OSError as e:
+            logger.warning("Could not save profile", extra={"profile": meta["name"], "error": str(e)})
@@ -0,0 +1,164 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REGISTRATION_FIELDS = ["Make", "Model", "Year", "FuelType", "EngineSize", "Transmission", "DriveType"]
+
+
+def normalize_registration(registration) -> str:
+    """Upper-cases and removes all whitespace, e.g. ' abc 123 ' -> 'ABC123'."""
+    return "".join(str(registration).split()).upper()
+
+
+class RegistrationIndex:
+    """
+    Hash index over the rego table keyed by normalized registration.
+    Columns are kept as categorical codes / numeric arrays rather than one
+    Python dict per row, so memory stays close to the raw data as the table
+    grows; records are assembled in RegistrationResponse shape on lookup.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.columns = {}
+
+        if df.empty or "Registration" not in df.columns:
+            self.keys = pd.Index([], dtype=object)
+            return
+
+        present = df["Registration"].notna()
+        keys = df["Registration"].astype(str).str.replace(r"\s+", "", regex=True).str.upper()
+        # Keep the first row per registration, matching the old DataFrame scan
+        keep = (present & ~keys.duplicated(keep="first")).to_numpy()
+
+        self.keys = pd.Index(keys.to_numpy()[keep], dtype=object)
+        for field in REGISTRATION_FIELDS:
+            if field not in df.columns:
+                continue
+            col = df[field].iloc[keep]
+            if pd.api.types.is_numeric_dtype(col.dtype):
+                self.columns[field] = col.to_numpy()
+            else:
+                cat = pd.Categorical(col)
+                self.columns[field] = (cat.codes, np.asarray(cat.categories, dtype=object))
+
+        # Build the hash table now rather than on the first request
+        if len(self.keys):
+            self.keys.get_loc(self.keys[0])
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _record(self, pos: int) -> dict:
+        record = {"Registration": str(self.keys[pos])}
+        for field in REGISTRATION_FIELDS:
+            column = self.columns.get(field)
+            if column is None:
+                record[field] = None
+            elif isinstance(column, tuple):
+                codes, categories = column
+                code = codes[pos]
+                record[field] = str(categories[code]) if code >= 0 else None
+            else:
+                value = column[pos]
+                record[field] = None if pd.isna(value) else value.item()
+        return record
+
+    def get(self, registration):
+        """Record for one registration, or None if unknown."""
+        try:
+            pos = self.keys.get_loc(normalize_registration(registration))
+        except KeyError:
+            return None
+        return self._record(pos)
+
+    def get_many(self, registrations):
+        """Records for many registrations in one vectorised lookup (None where unknown)."""
+        positions = self.keys.get_indexer([normalize_registration(r) for r in registrations])
+        return [self._record(pos) if pos >= 0 else None for pos in positions]
+
+
+class SharedRegistrationIndex(RegistrationIndex):
+    """
+    Read-only index attached from files written by save_registration_index.
+    Keys are a sorted fixed-width array and every column is memory-mapped,
+    so all server workers share one copy through the page cache; lookups
+    are a binary search instead of a per-process hash table.
+    """
+
+    def __init__(self, directory):
+        directory = Path(directory)
+        manifest = json.loads((directory / "manifest.json").read_text())
+
+        self.keys = np.load(directory / "keys.npy", mmap_mode="r")
+        self.columns = {}
+        for field, kind in manifest["columns"].items():
+            if kind == "category":
+                self.columns[field] = (
+                    np.load(directory / f"{field}.codes.npy", mmap_mode="r"),
+                    np.load(directory / f"{field}.categories.npy"),
+                )
+            else:
+                self.columns[field] = np.load(directory / f"{field}.npy", mmap_mode="r")
+
+    def _positions(self, keys):
+        keys = np.asarray(keys, dtype=str)
+        if len(self.keys) == 0:
+            return np.full(len(keys), -1)
+        pos = np.searchsorted(self.keys, keys)
+        clipped = np.minimum(pos, len(self.keys) - 1)
+        return np.where(self.keys[clipped] == keys, clipped, -1)
+
+    def get(self, registration):
+        pos = self._positions([normalize_registration(registration)])[0]
+        return self._record(pos) if pos >= 0 else None
+
+    def get_many(self, registrations):
+        positions = self._positions([normalize_registration(r) for r in registrations])
+        return [self._record(pos) if pos >= 0 else None for pos in positions]
+
+
+def save_registration_index(index: RegistrationIndex, directory, fingerprint: dict = None):
+    """
+    Writes index as sorted keys plus one .npy per column for
+    SharedRegistrationIndex. Built in a temp dir and renamed into place.
+    """
+    directory = Path(directory)
+    tmp_dir = directory.with_name(directory.name + f".tmp{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    keys = np.asarray(index.keys, dtype=str)
+    order = np.argsort(keys, kind="stable")
+    np.save(tmp_dir / "keys.npy", keys[order])
+
+    columns = {}
+    for field, column in index.columns.items():
+        if isinstance(column, tuple):
+            codes, categories = column
+            np.save(tmp_dir / f"{field}.codes.npy", np.asarray(codes)[order])
+            np.save(tmp_dir / f"{field}.categories.npy", np.asarray(categories, dtype=str))
+            columns[field] = "category"
+        else:
+            np.save(tmp_dir / f"{field}.npy", np.asarray(column)[order])
+            columns[field] = "array"
+
+    manifest = {"fingerprint": fingerprint, "rows": len(keys), "columns": columns}
+    (tmp_dir / "manifest.json").write_text(json.dumps(manifest))
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_dir, directory)
+
+
+def read_index_manifest(directory):
+    try:
+        return json.loads((Path(directory) / "manifest.json").read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def build_registration_index(df: pd.DataFrame) -> RegistrationIndex:
+    return RegistrationIndex(df)
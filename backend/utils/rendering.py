@@ -0,0 +1,128 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from utils.profiling import current_profile, run_profiled_process
+
+
+class RenderQueueFull(Exception):
+    """Raised when more plot jobs are pending than the renderer allows."""
+
+
+def _init_worker():
+    # Workers only ever rasterise to PNG; never pick up an interactive backend
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+class PlotRenderer:
+    """
+    Runs plot rendering in a pool of worker processes so PNG encoding never
+    holds the GIL of the request process. submit() returns a
+    concurrent.futures.Future, run() an awaitable; both refuse new work once
+    max_pending jobs are queued or running.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 32):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise RenderQueueFull(f"{self._pending} plot jobs already pending")
+            self._pending += 1
+        try:
+            future = self._pool.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def submit_render(renderer, fn, *args, **kwargs) -> Future:
+    """
+    Submits fn to the renderer, or runs it inline when no renderer is
+    configured. Either way the caller gets a Future; errors (including a full
+    queue) are delivered through it. Inside a profiled request the job is
+    profiled in the worker process (or inline, in this thread).
+    """
+    profile = current_profile()
+    if renderer is not None:
+        try:
+            if profile is None:
+                return renderer.submit(fn, *args, **kwargs)
+            return _recorded(renderer.submit(run_profiled_process, fn, *args, **kwargs), profile)
+        except RenderQueueFull as e:
+            return failed_render(e)
+
+    future = Future()
+    try:
+        future.set_result(fn(*args, **kwargs) if profile is None else profile.call(fn, *args, **kwargs))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def _recorded(job: Future, profile) -> Future:
+    """The result of a run_profiled_process job, its stats recorded into profile."""
+    future = Future()
+
+    def done(job):
+        if job.cancelled():
+            future.cancel()
+            return
+        if future.cancelled():
+            return
+        try:
+            future.set_result(profile.unwrap(job.result()))
+        except Exception as e:
+            future.set_exception(e)
+
+    job.add_done_callback(done)
+    return future
+
+
+def failed_render(exc: Exception) -> Future:
+    future = Future()
+    future.set_exception(exc)
+    return future
+
+
+def render_result(future: Future, default=None, timeout: float = None):
+    """Waits for a render job; any failure or timeout yields default."""
+    try:
+        return future.result(timeout=timeout)
+    except Exception:
+        return default
+
+
+async def render_result_async(future: Future, default=None, timeout: float = None):
+    """render_result for async callers: awaits the job without holding a thread."""
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+    except Exception:
+        return default
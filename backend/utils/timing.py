@@ -0,0 +1,140 @@
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from fastapi.routing import APIRoute
+
+
+class RequestTimings:
+    """Milliseconds per stage for one request, plus the route and model it was for."""
+
+    __slots__ = ("start", "route", "model", "stages", "endpoint")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.route = None
+        self.model = ""
+        self.stages = {}
+        self.endpoint = None
+
+    def add(self, name: str, ms: float):
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+
+
+_current = ContextVar("request_timings", default=None)
+
+
+def current_timings():
+    return _current.get()
+
+
+def start_timings():
+    """Starts timings for the current context; returns (timings, token for reset_timings)."""
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def reset_timings(token):
+    _current.reset(token)
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Adds the time spent in the block to the current request's stage name.
+    Outside a request (scripts, tests calling services directly) it does
+    nothing. Thread-pool stages see the request through run_stage, which
+    runs them in a copy of the caller's context.
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, (time.perf_counter() - start) * 1000)
+
+
+def timed_render(fn, *args, **kwargs):
+    """
+    Runs fn with timings of its own and returns (result, stages). Used for
+    render jobs, whose stages are recorded in a worker process; the request
+    picks them up with record_rendered.
+    """
+    timings, token = start_timings()
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        reset_timings(token)
+    return result, timings.stages
+
+
+def record_rendered(rendered):
+    """Unwraps a timed_render result (None if the render failed), adding its stages to the request."""
+    if rendered is None:
+        return None
+    result, stages = rendered
+    timings = _current.get()
+    if timings is not None:
+        for name, ms in stages.items():
+            timings.add(name, ms)
+    return result
+
+
+def _timed_endpoint(endpoint):
+    if not inspect.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def timed(*args, **kwargs):
+        timings = _current.get()
+        if timings is None:
+            return await endpoint(*args, **kwargs)
+        model = getattr(kwargs.get("req"), "model_name", None)
+        if model:
+            timings.model = model
+        start = time.perf_counter()
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            timings.endpoint = (start, time.perf_counter())
+
+    return timed
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that names the route (and the request body's model_name) in the
+    request's timings and splits FastAPI's own work into "validation" (body
+    parsing, dependencies) before the endpoint and "serialization" after it.
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        route = self.path
+
+        async def timed_handler(request):
+            timings = _current.get()
+            if timings is None:
+                return await handler(request)
+            timings.route = route
+            start = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                end = time.perf_counter()
+                if timings.endpoint is None:
+                    timings.add("validation", (end - start) * 1000)
+                else:
+                    endpoint_start, endpoint_end = timings.endpoint
+                    timings.add("validation", (endpoint_start - start) * 1000)
+                    timings.add("serialization", (end - endpoint_end) * 1000)
+
+        return timed_handler
@@ -32,16 +32,40 @@ const useApi = () => {
 export const usePredict = () => {
   const { data, error, callApi } = useApi();
 
-  const predict = (taskType, features) =>
+  // explain: "values" returns raw SHAP contributions to chart client-side,
+  // "png" a server-rendered waterfall, "none" skips SHAP
+  const predict = (taskType, features, explain = "values") =>
     callApi({
       method: "post",
       url: "http://127.0.0.1:8000/predict",
       payload: { model_name: taskType, features },
+      params: { explain },
     });
 
   return { data, error, predict };
 };
 
+// Prediction + historical comparison in one round trip. filters defaults to
+// Make / Model only, matching the initial filter selection on the results page
+export const useQuote = () => {
+  const { data, error, callApi } = useApi();
+
+  const quote = (taskType, features, explain = "values", filters = null, plots = null) =>
+    callApi({
+      method: "post",
+      url: "http://127.0.0.1:8000/quote",
+      payload: {
+        model_name: taskType,
+        features,
+        filters: filters ?? { ...Object.fromEntries(Object.keys(features).map(k => [k, null])), Make: features.Make, Model: features.Model },
+        plots,
+      },
+      params: { explain },
+    });
+
+  return { data, error, quote };
+};
+
 export const useHistoricalSummary = () => {
   const { data, error, callApi } = useApi();
 
@@ -1,6 +1,6 @@
 import { useState } from "react";
 import { useNavigate } from "react-router-dom";
-import { usePredict } from "../api";
+import { useQuote } from "../api";
 import { usePrefilter } from "../api";
 import { getRegistration } from "../api";
 import { taskFeatures } from "../../config/features";
@@ -25,7 +25,7 @@ export default function DataEntry() {
     DriveType: "",
   });
 
-  const { predict } = usePredict();
+  const { quote } = useQuote();
   const { data: filteredData, prefilter } = usePrefilter();
   const [dynamicOptions, setDynamicOptions] = useState({});
 
@@ -115,10 +115,10 @@ export default function DataEntry() {
       payloadFeatures[key] = value;
     });
 
-    const result = await predict(taskType, payloadFeatures);
+    const result = await quote(taskType, payloadFeatures);
 
     if (result) {
-      navigate("/Results", { state: { data: result } });
+      navigate("/Results", { state: { data: result.prediction, historical: result.historical } });
     } else {
       navigate("/Results", { state: { error: "Prediction failed" } });
     }
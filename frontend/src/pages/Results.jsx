@@ -6,7 +6,7 @@ export default function ResultsPage() {
     const location = useLocation();
     const navigate = useNavigate();
 
-    const { fetchHistorical, data: historicalData, error: historicalError } = useHistoricalSummary();
+    const { fetchHistorical, data: filteredData, error: historicalError } = useHistoricalSummary();
     
     const [loading, setLoading] = useState(false);
 
@@ -19,7 +19,10 @@ export default function ResultsPage() {
         );
     }
 
-    const { data, error } = location.state;
+    const { data, error, historical } = location.state;
+
+    // The quote already carries the Make / Model comparison; refetch only when filters are applied
+    const historicalData = filteredData ?? historical;
 
     // Initialize selectedFeatures dynamically based on data.features
     const initialSelectedFeatures = Object.fromEntries(
@@ -147,6 +150,39 @@ export default function ResultsPage() {
                         </div>
                     )}
 
+                    {/* SHAP Contributions */}
+                    {data.explanation && (() => {
+                        const { expected_value, features, values } = data.explanation;
+                        const maxAbs = Math.max(...values.map(v => Math.abs(v)), 1e-9);
+                        const rows = features
+                            .map((name, i) => ({ name, value: values[i] }))
+                            .sort((a, b) => Math.abs(b.value) - Math.abs(a.value));
+                        return (
+                            <div className="card">
+                                <h3 className="sectionTitle">Feature Importance (SHAP)</h3>
+                                <p>Base value: ${expected_value.toFixed(2)}</p>
+                                <div className="shapChart">
+                                    {rows.map(({ name, value }) => {
+                                        // Bars grow out from the centre line: right for positive, left for negative
+                                        const width = (Math.abs(value) / maxAbs) * 50;
+                                        return (
+                                            <div key={name} className="shapRow">
+                                                <span className="shapLabel">{name}</span>
+                                                <div className="shapTrack">
+                                                    <div
+                                                        className={value >= 0 ? "shapBar shapPositive" : "shapBar shapNegative"}
+                                                        style={{ width: `${width}%`, marginLeft: `${value >= 0 ? 50 : 50 - width}%` }}
+                                                    />
+                                                </div>
+                                                <span className="shapValue">{value >= 0 ? "+" : "-"}${Math.abs(value).toFixed(2)}</span>
+                                            </div>
+                                        );
+                                    })}
+                                </div>
+                            </div>
+                        );
+                    })()}
+
                     {/* SHAP Plot */}
                     {data.plots?.shap_png && (
                         <div className="card">
@@ -0,0 +1,4 @@
+"""Builds the backend's preprocessed_*_data.csv files from the ticket export (python -m preprocessing)."""
+from preprocessing.pipeline import run_pipeline, update_pipeline, output_paths
+
+__all__ = ["run_pipeline", "update_pipeline", "output_paths"]
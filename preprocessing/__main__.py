@@ -0,0 +1,38 @@
+"""
+python -m preprocessing [--tickets CSV] [--cpi CSV] [--out DIR] [--chunk-rows N] [--workers N]
+python -m preprocessing --append NEW_TICKETS_CSV [--out DIR]
+
+Same outputs as preprocessing_pipeline.ipynb, streamed in chunks over
+--workers processes (default: all cores). A full build keeps its state in
+--state (default OUT/.preprocess-state); --append merges a batch of new
+tickets into the outputs from there without reprocessing the history.
+"""
+import argparse
+import logging
+
+from preprocessing.pipeline import CHUNK_ROWS, DEFAULT_CPI, DEFAULT_OUTPUT_DIR, DEFAULT_TICKETS, run_pipeline, update_pipeline
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m preprocessing", description="Builds the preprocessed_*_data.csv files from the ticket export")
+    parser.add_argument("--tickets", default=DEFAULT_TICKETS, help="Ticket export CSV (windows-1252)")
+    parser.add_argument("--cpi", default=DEFAULT_CPI, help="Quarterly CPI CSV (Quarter, CPI)")
+    parser.add_argument("--out", default=DEFAULT_OUTPUT_DIR, help="Directory for preprocessed_*_data.csv")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="Rows read per chunk")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (1 = no pool)")
+    parser.add_argument("--state", default=None, help="State directory kept for --append (default OUT/.preprocess-state)")
+    parser.add_argument("--append", default=None, metavar="CSV", help="Merge these new tickets into an earlier build")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    options = dict(chunk_rows=args.chunk_rows, workers=args.workers, state_dir=args.state)
+    if args.append:
+        rows = update_pipeline(args.append, args.cpi, args.out, **options)
+    else:
+        rows = run_pipeline(args.tickets, args.cpi, args.out, **options)
+    for ticket, count in rows.items():
+        print(f"{ticket}: {count} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,587 @@
+"""
+preprocessing_pipeline.ipynb as a streaming job:
+ticket_data.csv -> preprocessed_{repair,log,capped,prescribed}_data.csv
+
+Pass 1 reads the ticket export in chunks with fixed dtypes. Worker processes
+clean each chunk (row filters, TaskName splitting, CPI adjustment) and hash
+its rows; the parent drops duplicates across chunks by hash, in file order,
+and spills the rows per ticket type. The per-TaskName price quartiles for
+outlier removal come from one vectorized sort over the (TaskName, price)
+pairs collected on the way. Pass 2 finishes each ticket type in its own
+worker: outlier bounds, rare categories, the notebook's row order, CSV.
+
+Memory stays at a few chunks plus the largest output file, instead of the
+whole export and its intermediate copies.
+
+The cleaned rows, dedup hashes, prices and rare-value counts are kept in a
+state directory, so update_pipeline can append a new batch of tickets
+without reprocessing the history.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_TICKETS = HERE / "data" / "ticket_data.csv"
+DEFAULT_CPI = HERE / "data" / "cpi_data.csv"
+DEFAULT_OUTPUT_DIR = HERE.parent / "backend" / "data"
+
+CHUNK_ROWS = 200_000
+
+# Columns read from the export (the rest are dropped by the notebook unused)
+RAW_DTYPES = {
+    "BookingID": "Int64",
+    "BCreatedDateAEST": "str",
+    "BStatusAfterSubmitted": "str",
+    "BTicketID": "Int64",
+    "BTicketType": "str",
+    "TaskName": "str",
+    "PriceIncGSTRaw": "float64",
+    "BOdoNum": "float64",
+    "cVMake": "str",
+    "cVMakeModel": "str",
+    "cVYear": "Int64",
+    "idFuel": "str",
+    "idLitres": "float64",
+    "idTransmission": "str",
+    "idDrive": "str",
+    "idIsHybrid": "float64",
+    "BShopState": "str",
+    "BShopRegionClass": "float64",
+    "IsCustomService": "float64",
+    "IsCustomRepair": "float64",
+}
+
+RENAME = {
+    "cVMake": "Make",
+    "cVMakeModel": "Model",
+    "cVYear": "Year",
+    "idFuel": "FuelType",
+    "idLitres": "EngineSize",
+    "idTransmission": "Transmission",
+    "idDrive": "DriveType",
+    "idIsHybrid": "IsHybrid",
+    "BOdoNum": "Odometer",
+}
+
+# Custom work, products and tyres (unpredictable without quantities), and rare ticket types
+EXCLUDED_TASKS = ["Custom Repair", "((Products))", "((Tyres))", "Tyre Replacement"]
+EXCLUDED_TICKET_TYPES = ["OtherTicket", "Custom", "Basic"]
+APPROVED = "33. Approved"
+
+# Columns of a cleaned row, in the notebook's column order; also its sort order
+ROW_COLUMNS = [
+    "BookingID", "BTicketID", "BTicketType", "TaskName", "Odometer", "Make", "Model", "Year",
+    "FuelType", "EngineSize", "Transmission", "DriveType", "IsHybrid", "BShopState",
+    "BShopRegionClass", "IsCustomService", "IsCustomRepair", "Distance", "Months", "AdjustedPrice",
+]
+# Rows equal on everything but the IDs are duplicates
+DEDUP_COLUMNS = [c for c in ROW_COLUMNS if c not in ("BookingID", "BTicketID")]
+OUTPUT_COLUMNS = [
+    "BTicketID", "TaskName", "Make", "Model", "Year", "FuelType", "EngineSize",
+    "Transmission", "DriveType", "Distance", "Months", "AdjustedPrice",
+]
+
+# Ticket type -> (output name, column whose rare values are dropped, minimum count)
+OUTPUTS = {
+    "Repair": ("repair", "TaskName", 100),
+    "Log": ("log", "Model", 20),
+    "Capped": ("capped", "Model", 20),
+    "Prescribed": ("prescribed", "Model", 20),
+}
+
+NON_ROAD_VEHICLES = [
+    "MAXICUBE 24 PALLET", "SCHMITZ CARGOBULL REFRIGERATED TRAILER", "MAXICUBE 12 PALLET",
+    "EQUIPMENT FRIDGE", "MAXITRANS MAXICUBE", "TOMMYGATE TAILGATE LOADER", "UNDEFINED TRAILE",
+    "CATERPILLAR 3.5T COUNTER BALANCE", "CATERPILLAR 5T COUNTER BALANCE",
+    "CATERPILLAR 5.5T COUNTER BALANCE", "CARRIER VECTOR", "ACMC PO6 CO2", "MAXICUBE 22 PALLET",
+    "MAXICUBE 16 PALLET", "EQUIPMENT TAILGATE 12M", "CROWN 2.5T COUNTER BALANCE",
+    "THERMO KING V-600 MAX", "FREIGHTER 24 PALLET TRI AXLE", "TRAILER AUST 8 X 5 BOX",
+    "EQUIPMENT CRANE", "EQUIPMENT VAWTRA", "HYSTER 2T COUNTER BALANCE",
+    "TOYOTA 3T COUNTER BALANCE", "DHOLLANDIA DH-LMA.20",
+]
+# Non-road equipment is only removed from the Prescribed output
+DROPPED_MODELS = {"Prescribed": NON_ROAD_VEHICLES}
+
+
+def output_paths(output_dir) -> dict:
+    output_dir = Path(output_dir)
+    return {ticket: output_dir / f"preprocessed_{name}_data.csv" for ticket, (name, _, _) in OUTPUTS.items()}
+
+
+def read_cpi(path):
+    """Quarter ("2025Q1") -> CPI, and the latest CPI that prices are adjusted to."""
+    cpi = pd.read_csv(path, dtype={"Quarter": "str", "CPI": "float64"})
+    return dict(zip(cpi["Quarter"], cpi["CPI"])), float(cpi["CPI"].iloc[-1])
+
+
+def read_tickets(path, chunk_rows: int = CHUNK_ROWS):
+    return pd.read_csv(
+        path, encoding="windows-1252", usecols=list(RAW_DTYPES), dtype=RAW_DTYPES, chunksize=chunk_rows,
+    )
+
+
+# --- Pass 1: cleaning one chunk ---
+
+def _leading_number(text: pd.Series) -> pd.Series:
+    return pd.to_numeric(text.str.extract(r"(\d+)", expand=False), errors="coerce").astype("float64")
+
+
+def split_task_names(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Service tickets carry the interval in the task name:
+    "Logbook Service - 135,000 km / 108 months", "Capped - 60,000 km".
+    Splits them into TaskName, Distance and (Log only) Months. There are few
+    distinct service task names, so each is parsed once. TaskName must be set.
+    """
+    df["Distance"] = df["Months"] = np.nan
+    service = df["BTicketType"].isin(["Log", "Capped", "Prescribed"]).to_numpy()
+    if not service.any():
+        return df
+    codes, names = pd.factorize(df.loc[service, "TaskName"])
+    parts = pd.Series(names, dtype="str").str.partition(" - ")
+    rest = parts[2]
+    log_parts = rest.str.partition(" / ")
+
+    log = (df.loc[service, "BTicketType"] == "Log").to_numpy()
+    log_distance = _leading_number(log_parts[0].str.replace(",", "", regex=False)).to_numpy()
+    distance = _leading_number(rest.str.replace(",", "", regex=False)).to_numpy()
+    months = _leading_number(log_parts[2]).to_numpy()
+
+    df.loc[service, "TaskName"] = parts[0].to_numpy()[codes]
+    df.loc[service, "Distance"] = np.where(log, log_distance[codes], distance[codes])
+    df.loc[service, "Months"] = np.where(log, months[codes], np.nan)
+    return df
+
+
+def adjust_prices(df: pd.DataFrame, cpi: dict, base_cpi: float) -> pd.DataFrame:
+    """
+    AdjustedPrice: the price in the latest CPI quarter's dollars, rounded as
+    the notebook does; the raw price where the quarter has no CPI yet. Dates
+    repeat heavily, so each distinct string is parsed once.
+    """
+    dates = df["BCreatedDateAEST"]
+    distinct = dates.dropna().unique()
+    parsed = pd.to_datetime(pd.Series(distinct), format="mixed", dayfirst=True)
+    quarters = pd.Series(parsed.dt.to_period("Q").astype(str).to_numpy(), index=distinct)
+
+    price = df["PriceIncGSTRaw"]
+    rate = dates.map(quarters).map(cpi).astype("float64")
+    df["AdjustedPrice"] = (price * (base_cpi / rate)).round(2).fillna(price).round()
+    return df
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    return pd.util.hash_pandas_object(df[DEDUP_COLUMNS], index=False).to_numpy()
+
+
+def clean_chunk(chunk: pd.DataFrame, cpi: dict, base_cpi: float):
+    """
+    Row-level steps of the notebook for one chunk; returns the cleaned rows
+    (ROW_COLUMNS) and their dedup hashes.
+
+    Only approved tickets are kept. The notebook keeps the approved copy of a
+    ticket whose status differs between duplicates and then drops everything
+    not approved, which leaves exactly the approved rows, so its sort over
+    every column isn't needed. Rows without a TaskName are dropped here too;
+    its per-TaskName outlier step dropped them.
+    """
+    df = chunk.rename(columns=RENAME)
+    # The notebook compares IsCustomService / IsCustomRepair with the string '1', which never
+    # matches the numeric columns, so custom work is only removed by task name; kept that way
+    # so the outputs (and the models trained on them) don't change
+    keep = (
+        ~df["TaskName"].isin(EXCLUDED_TASKS)
+        & df["TaskName"].notna()
+        & ~df["BTicketType"].isin(EXCLUDED_TICKET_TYPES)
+        & (df["PriceIncGSTRaw"] > 0)
+        & (df["BStatusAfterSubmitted"] == APPROVED)
+    )
+    df = df[keep].copy()
+
+    df = split_task_names(df)
+    df = adjust_prices(df, cpi, base_cpi)
+    df = df[ROW_COLUMNS].reset_index(drop=True)
+    return df, row_hashes(df)
+
+
+# --- Pass 1: across chunks ---
+
+class SeenRows:
+    """Sorted 64-bit hashes of the rows kept so far, to drop duplicates across chunks in file order."""
+
+    def __init__(self, hashes=None):
+        self.hashes = np.unique(hashes) if hashes is not None else np.empty(0, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def first_seen(self, hashes: np.ndarray) -> np.ndarray:
+        """Mask of rows whose hash hasn't been seen before (earlier chunks or earlier in this one); records them."""
+        new = ~pd.Series(hashes).duplicated().to_numpy()
+        if len(self.hashes):
+            pos = np.minimum(np.searchsorted(self.hashes, hashes), len(self.hashes) - 1)
+            new &= self.hashes[pos] != hashes
+        self.hashes = np.union1d(self.hashes, hashes[new])
+        return new
+
+
+class TaskPrices:
+    """AdjustedPrice per TaskName (as integer codes) for the outlier quartiles."""
+
+    def __init__(self):
+        self.names = []
+        self._codes = {}
+        self.codes = []
+        self.prices = []
+
+    def add(self, task_names: pd.Series, prices: pd.Series):
+        codes, uniques = pd.factorize(task_names)
+        for name in uniques:
+            if name not in self._codes:
+                self._codes[name] = len(self.names)
+                self.names.append(name)
+        mapping = np.array([self._codes[name] for name in uniques], dtype=np.int32)
+        self.codes.append(mapping[codes])
+        self.prices.append(prices.to_numpy(dtype=np.float64))
+
+    def compact(self):
+        """Joins the per-chunk arrays into one (before saving)."""
+        self.codes = [np.concatenate(self.codes)] if self.codes else []
+        self.prices = [np.concatenate(self.prices)] if self.prices else []
+
+    def bounds(self, tasks=None, previous: pd.DataFrame = None) -> pd.DataFrame:
+        """
+        IQR bounds of every TaskName, or only of tasks, the rest taken from
+        previous (the bounds before tasks got new prices).
+        """
+        self.compact()
+        codes = self.codes[0] if self.codes else np.empty(0, dtype=np.int32)
+        prices = self.prices[0] if self.prices else np.empty(0)
+        if tasks is None:
+            return iqr_bounds(codes, prices, self.names)
+
+        wanted = np.isin(codes, [self._codes[name] for name in tasks if name in self._codes])
+        updated = iqr_bounds(codes[wanted], prices[wanted], self.names)
+        return pd.concat([previous.drop(updated.index, errors="ignore"), updated])
+
+
+def _quantile(sorted_values, starts, counts, q):
+    """np.quantile's linear interpolation for each run starts[i]:starts[i]+counts[i] of sorted_values."""
+    position = q * (counts - 1)
+    below = np.floor(position).astype(np.int64)
+    above = np.minimum(below + 1, counts - 1)
+    lo, hi = sorted_values[starts + below], sorted_values[starts + above]
+    t = position - below
+    diff = hi - lo
+    return np.where(t >= 0.5, hi - diff * (1 - t), lo + diff * t)
+
+
+def iqr_bounds(codes: np.ndarray, prices: np.ndarray, names) -> pd.DataFrame:
+    """
+    Q1 - 1.5 IQR and Q3 + 1.5 IQR of prices per code, from one sort rather
+    than a callback per group; indexed by names[code]. Prices must be NaN-free.
+    """
+    order = np.lexsort((prices, codes))
+    codes, prices = codes[order], prices[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.empty(0, dtype=np.int64)
+    counts = np.diff(np.r_[starts, len(codes)])
+
+    q1 = _quantile(prices, starts, counts, 0.25)
+    q3 = _quantile(prices, starts, counts, 0.75)
+    iqr = q3 - q1
+    index = pd.Index(np.asarray(names, dtype=object)[codes[starts]], name="TaskName")
+    return pd.DataFrame({"lower": q1 - 1.5 * iqr, "upper": q3 + 1.5 * iqr}, index=index)
+
+
+def _ordered_map(pool, fn, items, window):
+    """map over items on pool (inline without one), results in order, at most window in flight."""
+    if pool is None:
+        yield from map(fn, items)
+        return
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+# --- Pass 2: one output ---
+
+def load_rows(parts) -> pd.DataFrame:
+    frames = [pd.read_pickle(p) for p in parts]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=ROW_COLUMNS)
+
+
+def within_bounds(df: pd.DataFrame, bounds: pd.DataFrame) -> pd.Series:
+    price = df["AdjustedPrice"]
+    return (price >= df["TaskName"].map(bounds["lower"])) & (price <= df["TaskName"].map(bounds["upper"]))
+
+
+def write_output(ticket_type: str, df: pd.DataFrame, counts: pd.Series, path) -> int:
+    """
+    Drops rare values (counts: rows per value among df, the outlier-free
+    rows), then writes df in the notebook's row order (TaskName, then every
+    column in order). Returns the row count.
+    """
+    name, column, threshold = OUTPUTS[ticket_type]
+    kept = df[~df[column].isin(counts.index[counts < threshold])]
+    logger.info("%s: %ss with fewer than %d rows dropped, %d -> %d", name, column, threshold,
+                df[column].nunique(), kept[column].nunique())
+    if ticket_type in DROPPED_MODELS:
+        kept = kept[~kept["Model"].isin(DROPPED_MODELS[ticket_type])]
+    kept = kept.sort_values(["TaskName"] + [c for c in ROW_COLUMNS if c != "TaskName"], kind="stable")
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + f".tmp{os.getpid()}")
+    kept[OUTPUT_COLUMNS].to_csv(tmp, index=False)
+    os.replace(tmp, path)
+    return len(kept)
+
+
+def finish_output(ticket_type: str, parts, bounds: pd.DataFrame, path):
+    """Outliers, rare values and the CSV for one ticket type; returns (rows written, rare-value counts)."""
+    df = load_rows(parts)
+    df = df[within_bounds(df, bounds)]
+    counts = df[OUTPUTS[ticket_type][1]].value_counts()
+    return write_output(ticket_type, df, counts, path), counts
+
+
+def refresh_output(ticket_type: str, old_parts, new_parts, old_bounds, bounds, counts, tasks, path):
+    """
+    finish_output after new rows were appended: the rare-value counts are
+    corrected for the rows of tasks (the TaskNames whose bounds moved) only.
+    """
+    column = OUTPUTS[ticket_type][1]
+    old = load_rows(old_parts)
+    df = pd.concat([old, load_rows(new_parts)], ignore_index=True)
+
+    before = old[old["TaskName"].isin(tasks)]
+    after = df[df["TaskName"].isin(tasks)]
+    counts = (
+        counts.sub(before[within_bounds(before, old_bounds)][column].value_counts(), fill_value=0)
+        .add(after[within_bounds(after, bounds)][column].value_counts(), fill_value=0)
+    )
+    counts = counts[counts > 0].astype("int64")
+    return write_output(ticket_type, df[within_bounds(df, bounds)], counts, path), counts
+
+
+# --- State kept between runs ---
+
+STATE_VERSION = 1
+STATE_DIR_NAME = ".preprocess-state"
+
+
+def default_state_dir(output_dir) -> Path:
+    return Path(output_dir) / STATE_DIR_NAME
+
+
+def file_digest(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PipelineState:
+    """
+    What --append needs from earlier runs, in a directory: the dedup hashes,
+    every (TaskName, price) pair with the IQR bounds derived from them, the
+    rare-value counts and TaskNames per output, and the cleaned rows per
+    ticket type (before outlier removal) as pickles under rows/. state.pkl
+    is replaced atomically and lists the row files, so an interrupted run
+    leaves the previous state intact.
+    """
+
+    def __init__(self, directory, cpi_digest: str):
+        self.directory = Path(directory)
+        self.cpi_digest = cpi_digest
+        self.seen = SeenRows()
+        self.prices = TaskPrices()
+        self.bounds = None
+        self.counts = {ticket: pd.Series(dtype="int64") for ticket in OUTPUTS}
+        self.tasks = {ticket: set() for ticket in OUTPUTS}
+        self.parts = {ticket: [] for ticket in OUTPUTS}
+        self.batches = []
+
+    @property
+    def rows_dir(self) -> Path:
+        return self.directory / "rows"
+
+    def part_paths(self, ticket: str) -> list:
+        return [self.rows_dir / name for name in self.parts[ticket]]
+
+    def save(self):
+        self.prices.compact()
+        fields = {k: v for k, v in vars(self).items() if k != "directory"}
+        tmp = self.directory / "state.pkl.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump({"version": STATE_VERSION, **fields}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.directory / "state.pkl")
+
+    @classmethod
+    def load(cls, directory):
+        path = Path(directory) / "state.pkl"
+        if not path.exists():
+            raise FileNotFoundError(f"No preprocessing state in {directory}; run a full build first")
+        with open(path, "rb") as f:
+            fields = pickle.load(f)
+        if fields.pop("version") != STATE_VERSION:
+            raise ValueError(f"Preprocessing state in {directory} is from another version; run a full build")
+        state = cls.__new__(cls)
+        vars(state).update(fields)
+        state.directory = Path(directory)
+        return state
+
+
+# --- Driver ---
+
+@contextmanager
+def _worker_pool(workers: int):
+    if workers <= 1:
+        yield None
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield pool
+
+
+def _run_all(pool, fn, calls) -> list:
+    if pool is None:
+        return [fn(*args) for args in calls]
+    return list(pool.map(fn, *zip(*calls)))
+
+
+def clean_batch(state: PipelineState, tickets, cpi, pool, workers: int, chunk_rows: int):
+    """
+    Pass 1 for one ticket file: cleaned, deduplicated (against everything in
+    state) rows are spilled per ticket type and their prices recorded.
+    Returns the new row files per ticket type and the TaskNames they touch.
+    """
+    rates, base_cpi = read_cpi(cpi)
+    batch = len(state.batches)
+    state.rows_dir.mkdir(parents=True, exist_ok=True)
+    new_parts = {ticket: [] for ticket in OUTPUTS}
+    tasks, kept = set(), 0
+
+    clean = partial(clean_chunk, cpi=rates, base_cpi=base_cpi)
+    cleaned = _ordered_map(pool, clean, read_tickets(tickets, chunk_rows), window=2 * workers)
+    for i, (df, hashes) in enumerate(cleaned):
+        df = df[state.seen.first_seen(hashes)]
+        df["Distance"] = df["Distance"].fillna(df["Odometer"])
+        state.prices.add(df["TaskName"], df["AdjustedPrice"])
+        tasks.update(df["TaskName"].unique())
+        kept += len(df)
+        for ticket in OUTPUTS:
+            part = df[df["BTicketType"] == ticket]
+            if len(part):
+                name = f"{ticket}.{batch:04d}.{i:05d}.pkl"
+                part.to_pickle(state.rows_dir / name)
+                new_parts[ticket].append(name)
+                state.tasks[ticket].update(part["TaskName"].unique())
+
+    state.batches.append({"tickets": str(tickets), "rows": kept})
+    return new_parts, tasks
+
+
+def run_pipeline(
+    tickets=DEFAULT_TICKETS,
+    cpi=DEFAULT_CPI,
+    output_dir=DEFAULT_OUTPUT_DIR,
+    chunk_rows: int = CHUNK_ROWS,
+    workers: int = None,
+    state_dir=None,
+) -> dict:
+    """
+    Writes the four preprocessed CSVs into output_dir and returns rows per
+    ticket type. The state update_pipeline appends to is kept in state_dir
+    (default output_dir/.preprocess-state), replacing any earlier one.
+    workers=1 runs everything in this process.
+    """
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    state_dir = Path(state_dir) if state_dir else default_state_dir(output_dir)
+    building = state_dir.with_name(state_dir.name + ".building")
+    shutil.rmtree(building, ignore_errors=True)
+    state = PipelineState(building, file_digest(cpi))
+
+    with _worker_pool(workers) as pool:
+        state.parts, _ = clean_batch(state, tickets, cpi, pool, workers, chunk_rows)
+        logger.info("Cleaned %d rows after dedup (%.1fs)", state.batches[-1]["rows"], time.perf_counter() - start)
+        state.bounds = state.prices.bounds()
+        paths = output_paths(output_dir)
+        finished = _run_all(pool, finish_output, [
+            (ticket, state.part_paths(ticket), state.bounds, paths[ticket]) for ticket in OUTPUTS
+        ])
+
+    result = {}
+    for ticket, (rows, counts) in zip(OUTPUTS, finished):
+        result[ticket], state.counts[ticket] = rows, counts
+    state.save()
+    shutil.rmtree(state_dir, ignore_errors=True)
+    os.replace(building, state_dir)
+    logger.info("Wrote %s to %s (%.1fs)", result, output_dir, time.perf_counter() - start)
+    return result
+
+
+def update_pipeline(
+    tickets,
+    cpi=DEFAULT_CPI,
+    output_dir=DEFAULT_OUTPUT_DIR,
+    chunk_rows: int = CHUNK_ROWS,
+    workers: int = None,
+    state_dir=None,
+) -> dict:
+    """
+    Appends a file of new tickets (export layout) to an earlier build, with
+    the result a full build over the old export followed by these rows
+    would give. Only the new rows are cleaned; bounds and rare-value counts
+    are recomputed for the TaskNames they touch, and only the outputs with
+    rows in those TaskNames are rewritten. Returns rows per rewritten output.
+
+    A changed CPI file moves every AdjustedPrice, so it needs a full build.
+    """
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    state = PipelineState.load(Path(state_dir) if state_dir else default_state_dir(output_dir))
+    if state.cpi_digest != file_digest(cpi):
+        raise ValueError("CPI data changed since the last full build; every AdjustedPrice moves, so run a full build")
+
+    old_parts = {ticket: state.part_paths(ticket) for ticket in OUTPUTS}
+    old_bounds = state.bounds
+    with _worker_pool(workers) as pool:
+        new_parts, tasks = clean_batch(state, tickets, cpi, pool, workers, chunk_rows)
+        state.bounds = state.prices.bounds(tasks, previous=old_bounds)
+        affected = [ticket for ticket in OUTPUTS if state.tasks[ticket] & tasks]
+        paths = output_paths(output_dir)
+        refreshed = _run_all(pool, refresh_output, [
+            (ticket, old_parts[ticket], [state.rows_dir / n for n in new_parts[ticket]], old_bounds, state.bounds,
+             state.counts[ticket], tasks, paths[ticket])
+            for ticket in affected
+        ])
+
+    result = {}
+    for ticket, (rows, counts) in zip(affected, refreshed):
+        result[ticket], state.counts[ticket] = rows, counts
+    for ticket in OUTPUTS:
+        state.parts[ticket] += new_parts[ticket]
+    state.save()
+    logger.info("Appended %d rows from %s, rewrote %s (%.1fs)",
+                state.batches[-1]["rows"], tickets, result, time.perf_counter() - start)
+    return result
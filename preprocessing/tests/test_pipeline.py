@@ -0,0 +1,211 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from preprocessing import pipeline
+
+
+def synthetic_tickets(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Ticket export shaped like ticket_data.csv, with duplicates, status variants, outliers and rare models"""
+    rng = np.random.default_rng(seed)
+    types = rng.choice(["Repair", "Log", "Capped", "Prescribed", "Basic", "Custom"], rows, p=[0.5, 0.2, 0.15, 0.12, 0.02, 0.01])
+    repairs = np.array([f"Repair job {i}" for i in range(12)] + ["Custom Repair", "((Tyres))", "Tyre Replacement"])
+    models = np.array([f"MAKE{i % 6} MODEL{i}" for i in range(60)] + ["MAXICUBE 24 PALLET", "EQUIPMENT CRANE"])
+    km = rng.choice([10, 15, 60, 120], rows) * 1000
+    months = rng.choice([6, 12, 24, 108], rows)
+    task = np.where(types == "Log", [f"Logbook Service - {k:,} km / {m} months" for k, m in zip(km, months)],
+           np.where(types == "Capped", [f"Capped Service - {k:,} km" for k in km],
+           np.where(types == "Prescribed", [f"Prescribed - {k:,} kilometres / {m} months" for k, m in zip(km, months)],
+                    repairs[rng.integers(0, len(repairs), rows)])))
+    model = models[np.minimum(rng.zipf(1.3, rows) - 1, len(models) - 1)]
+    day = rng.integers(1, 28, rows)
+    month = rng.integers(1, 13, rows)
+    year = rng.choice([2021, 2023, 2025, 2026], rows)
+    dates = [f"{d}/{m:02d}/{y}" if i % 3 else f"{y}-{m:02d}-{d:02d} 10:15:00" for i, (d, m, y) in enumerate(zip(day, month, year))]
+    price = np.round(rng.lognormal(5, 0.6, rows), 2)
+    price[rng.random(rows) < 0.02] *= 20
+    price[rng.random(rows) < 0.01] = 0
+
+    df = pd.DataFrame({
+        "FCID": rng.integers(1, 10, rows),
+        "BookingID": rng.integers(1_000_000, 1_000_000 + rows // 2, rows),
+        "BCreatedDateAEST": dates,
+        "BStatusAfterSubmitted": rng.choice(["33. Approved", "16. Requires Changes", "29. Rejected", "10. Draft"], rows, p=[0.8, 0.1, 0.05, 0.05]),
+        "BStatusFromDateTimeAEST": "4/04/2025 8:52",
+        "BStatusFinal": "64. Completed",
+        "BTicketID": np.arange(3_000_000, 3_000_000 + rows),
+        "BTicketType": types,
+        "TaskName": task,
+        "PriceIncGSTRaw": price,
+        "BOdoNum": np.where(rng.random(rows) < 0.1, np.nan, rng.integers(1000, 300000, rows)),
+        "BOdoText": "",
+        "cVMake": [m.split()[0] for m in model],
+        "cVMakeModel": model,
+        "cVYear": rng.integers(2005, 2025, rows),
+        "idFuel": rng.choice(["Petrol", "Diesel", None], rows, p=[0.6, 0.35, 0.05]),
+        "idLitres": np.where(rng.random(rows) < 0.1, np.nan, rng.choice([1.5, 2.0, 2.8], rows)),
+        "idTransmission": rng.choice(["Auto", "Manual"], rows),
+        "idDrive": rng.choice(["2WD", "4WD", None], rows),
+        "idIsHybrid": rng.choice([0.0, 1.0, np.nan], rows),
+        "VMid": "X1",
+        "BShopID": 1, "BShopPostcode": 2000, "BShopState": rng.choice(["NSW", "VIC"], rows),
+        "BShopRegionName": "Sydney", "BShopRegionClass": rng.choice([1, 2], rows),
+        "IsCustomService": rng.choice([0, 1], rows, p=[0.95, 0.05]),
+        "IsCustomRepair": 0, "IsDeleted": 0,
+    })
+    # Re-exported tickets (new IDs) and the same ticket under another status
+    copies = df.sample(frac=0.1, random_state=seed).assign(BookingID=lambda d: d["BookingID"] + 1, BTicketID=lambda d: d["BTicketID"] + rows)
+    restatus = df.sample(frac=0.1, random_state=seed + 1).assign(BStatusAfterSubmitted="16. Requires Changes")
+    return pd.concat([df, copies, restatus]).sample(frac=1, random_state=seed).rename(columns={"FCID": "﻿FCID"})
+
+
+def notebook_pipeline(tickets_path, cpi_path) -> dict:
+    """preprocessing_pipeline.ipynb, cell by cell (only the prints left out), as the reference"""
+    def remove_outliers(df, group_by="TaskName", value_col="price"):
+        def filter_group(group):
+            Q1 = group[value_col].quantile(0.25)
+            Q3 = group[value_col].quantile(0.75)
+            IQR = Q3 - Q1
+            return group[(group[value_col] >= Q1 - 1.5 * IQR) & (group[value_col] <= Q3 + 1.5 * IQR)]
+        return df.groupby(group_by, group_keys=False)[list(df.columns)].apply(filter_group)
+
+    def drop_rare(df, column, threshold):
+        counts = df[column].value_counts()
+        return df[~df[column].isin(counts[counts < threshold].index)].copy()
+
+    cpi_index = pd.read_csv(cpi_path)
+    df = pd.read_csv(tickets_path, encoding="windows-1252")
+    df = df.rename(columns={"cVMake": "Make", "cVMakeModel": "Model", "cVYear": "Year", "idFuel": "FuelType", "idLitres": "EngineSize",
+                            "idTransmission": "Transmission", "idDrive": "DriveType", "idIsHybrid": "IsHybrid", "BOdoNum": "Odometer"})
+    df.drop(columns=["ï»¿FCID", "BOdoText", "VMid"], inplace=True)
+    df = df[df["IsCustomService"] != "1"]
+    df = df[df["IsCustomRepair"] != "1"]
+    df = df[~df["TaskName"].isin(["Custom Repair", "((Products))", "((Tyres))", "Tyre Replacement"])]
+    df = df[~df["BTicketType"].isin(["OtherTicket", "Custom", "Basic"])]
+    df = df[df["PriceIncGSTRaw"] > 0]
+
+    df["Distance"] = None
+    df["Months"] = None
+    mask = df["BTicketType"] == "Log"
+    split_1 = df.loc[mask, "TaskName"].str.split(" - ", n=1, expand=True)
+    df.loc[mask, "TaskName"] = split_1[0]
+    df.loc[mask, "Rest"] = split_1[1].fillna("")
+    split_2 = df.loc[mask, "Rest"].str.split(" / ", n=1, expand=True)
+    df.loc[mask, "Distance"] = split_2[0]
+    df.loc[mask, "Months"] = split_2[1]
+    for ticket in ("Capped", "Prescribed"):
+        mask = df["BTicketType"] == ticket
+        split_1 = df.loc[mask, "TaskName"].str.split(" - ", n=1, expand=True)
+        df.loc[mask, "TaskName"] = split_1[0]
+        df.loc[mask, "Distance"] = split_1[1].fillna("")
+    df = df.drop(columns=["Rest"])
+    df["Months"] = pd.to_numeric(df["Months"].astype(str).str.extract(r"(\d+)")[0], errors="coerce")
+    df["Distance"] = df["Distance"].astype(str).str.replace(",", "", regex=False)
+    df["Distance"] = pd.to_numeric(df["Distance"].astype(str).str.extract(r"(\d+)")[0], errors="coerce")
+
+    df["BCreatedDateAEST"] = pd.to_datetime(df["BCreatedDateAEST"], format="mixed", dayfirst=True)
+    df["Date"] = pd.to_datetime(df["BCreatedDateAEST"].dt.date)
+    df["Quarter"] = df["Date"].dt.to_period("Q").astype(str)
+    df = df.merge(cpi_index, on="Quarter", how="left")
+    base_cpi = cpi_index["CPI"].iloc[-1]
+    df["AdjustedPrice"] = round(df["PriceIncGSTRaw"] * (base_cpi / df["CPI"]), 2)
+    df["AdjustedPrice"] = round(df["AdjustedPrice"].fillna(df["PriceIncGSTRaw"]))
+    df.drop(columns=["BCreatedDateAEST", "CPI", "Quarter", "PriceIncGSTRaw", "BShopID", "BShopRegionName", "BShopPostcode",
+                     "IsDeleted", "BStatusFromDateTimeAEST", "Date", "BStatusFinal"], inplace=True)
+
+    df = df.drop_duplicates(subset=[c for c in df.columns if c not in ["BookingID", "BTicketID"]])
+    df["StatusPriority"] = df["BStatusAfterSubmitted"].apply(lambda x: 0 if x == "33. Approved" else 1)
+    dedup_cols = [c for c in df.columns if c not in ["BStatusAfterSubmitted", "StatusPriority"]]
+    df = df.sort_values(by=dedup_cols + ["StatusPriority"]).drop_duplicates(subset=dedup_cols, keep="first").drop(columns="StatusPriority")
+    df["Label"] = df["BStatusAfterSubmitted"].map({"33. Approved": 1, "16. Requires Changes": 0, "29. Rejected": 0})
+    df = df.drop(columns=["BStatusAfterSubmitted"])
+    df = df[df["Label"] == 1]
+    df["Distance"] = df["Distance"].fillna(df["Odometer"])
+    df = remove_outliers(df, group_by="TaskName", value_col="AdjustedPrice")
+    df.drop(columns=["BookingID", "IsCustomService", "IsCustomRepair", "BShopRegionClass", "BShopState", "IsHybrid", "Label", "Odometer"], inplace=True)
+
+    out = {}
+    for ticket, (_, column, threshold) in pipeline.OUTPUTS.items():
+        part = drop_rare(df[df["BTicketType"] == ticket].drop(columns=["BTicketType"]), column, threshold)
+        if ticket == "Prescribed":
+            part = part[~part["Model"].isin(pipeline.NON_ROAD_VEHICLES)]
+        out[ticket] = part
+    return out
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    tickets = tmp_path / "ticket_data.csv"
+    synthetic_tickets(6000).to_csv(tickets, index=False, encoding="utf-8")
+    cpi = tmp_path / "cpi_data.csv"
+    pd.DataFrame({"Quarter": [f"{y}Q{q}" for y in range(2021, 2026) for q in range(1, 5)],
+                  "CPI": np.round(np.linspace(117.9, 142.0, 20), 1)}).to_csv(cpi, index=False)
+    return tickets, cpi
+
+
+# Test equivalence: ensures the streamed pipeline writes byte-identical CSVs to the notebook
+@pytest.mark.parametrize("workers", [1, 2])
+def test_matches_notebook(inputs, tmp_path, workers):
+    """Small chunks (duplicates span chunks) with and without worker processes -> same four files"""
+    tickets, cpi = inputs
+    expected = notebook_pipeline(tickets, cpi)
+    rows = pipeline.run_pipeline(tickets, cpi, tmp_path / "out", chunk_rows=700, workers=workers)
+
+    for ticket, path in pipeline.output_paths(tmp_path / "out").items():
+        assert rows[ticket] == len(expected[ticket]) > 0
+        assert path.read_text() == expected[ticket].to_csv(index=False)
+    assert not list((tmp_path / "out").glob("*.building"))
+
+
+# Test the quartile pass: ensures vectorized bounds equal pandas' per-group quantiles
+def test_iqr_bounds_match_groupby_quantile():
+    """Random groups of uneven size -> same Q1 - 1.5 IQR / Q3 + 1.5 IQR as Series.quantile"""
+    rng = np.random.default_rng(1)
+    codes = rng.integers(0, 50, 5000).astype(np.int32)
+    prices = np.round(rng.lognormal(5, 1, 5000), 2)
+    names = [f"task {i}" for i in range(50)]
+    bounds = pipeline.iqr_bounds(codes, prices, names)
+
+    grouped = pd.Series(prices).groupby(np.asarray(names)[codes])
+    q1, q3 = grouped.quantile(0.25), grouped.quantile(0.75)
+    assert np.array_equal(bounds["lower"].sort_index(), q1 - 1.5 * (q3 - q1))
+    assert np.array_equal(bounds["upper"].sort_index(), q3 + 1.5 * (q3 - q1))
+
+
+# Test cross-chunk dedup: ensures only the first occurrence of a row hash is kept, in order
+def test_seen_rows_keeps_first_occurrence():
+    """Repeats within and across chunks are dropped"""
+    seen = pipeline.SeenRows()
+    assert seen.first_seen(np.array([5, 3, 5], dtype=np.uint64)).tolist() == [True, True, False]
+    assert seen.first_seen(np.array([3, 9, 9, 1], dtype=np.uint64)).tolist() == [False, True, False, True]
+    assert len(seen) == 4
+
+
+# Test incremental mode: ensures appending a batch gives the outputs of a full build over both
+def test_append_matches_full_build(inputs, tmp_path):
+    """Build on 80% of the export, append the rest -> same files and rare-value counts as one build"""
+    tickets, cpi = inputs
+    export = pd.read_csv(tickets, dtype=str, keep_default_na=False)
+    split = int(len(export) * 0.8)
+    history, batch = tmp_path / "history.csv", tmp_path / "batch.csv"
+    export.iloc[:split].to_csv(history, index=False)
+    export.iloc[split:].to_csv(batch, index=False)
+
+    pipeline.run_pipeline(tickets, cpi, tmp_path / "full", chunk_rows=1000, workers=1)
+    pipeline.run_pipeline(history, cpi, tmp_path / "inc", chunk_rows=1000, workers=1)
+    rewritten = pipeline.update_pipeline(batch, cpi, tmp_path / "inc", workers=1)
+
+    assert set(rewritten) == set(pipeline.OUTPUTS)
+    for full, incremental in zip(pipeline.output_paths(tmp_path / "full").values(), pipeline.output_paths(tmp_path / "inc").values()):
+        assert incremental.read_text() == full.read_text()
+    full_state = pipeline.PipelineState.load(tmp_path / "full" / pipeline.STATE_DIR_NAME)
+    inc_state = pipeline.PipelineState.load(tmp_path / "inc" / pipeline.STATE_DIR_NAME)
+    for ticket in pipeline.OUTPUTS:
+        assert inc_state.counts[ticket].sort_index().equals(full_state.counts[ticket].sort_index())
+
+    # Re-appending the same batch adds nothing; a new CPI file needs a full build
+    pipeline.update_pipeline(batch, cpi, tmp_path / "inc", workers=1)
+    assert inc_state.seen.hashes.size == pipeline.PipelineState.load(tmp_path / "inc" / pipeline.STATE_DIR_NAME).seen.hashes.size
+    cpi.write_text(cpi.read_text() + "2026Q1,143.0\n")
+    with pytest.raises(ValueError, match="CPI"):
+        pipeline.update_pipeline(batch, cpi, tmp_path / "inc", workers=1)
@@ -0,0 +1,5 @@
+"""Searches, refits, saves and evaluates the backend's CatBoost models (python -m training)."""
+from training.driver import MODELS, run_training, read_manifest
+from training.evaluation import evaluate, error_tables, write_report
+
+__all__ = ["MODELS", "run_training", "read_manifest", "evaluate", "error_tables", "write_report"]
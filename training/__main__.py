@@ -0,0 +1,47 @@
+"""
+python -m training [--models NAME ...] [--data DIR] [--out DIR] [--workers N] [--threads N]
+python -m training evaluate MODEL [--model CBM] [--data CSV] [--out JSON]
+
+Same search and refit as training_notebooks/train_model_*.ipynb for every
+model at once: trials run on --workers processes with --threads CatBoost
+threads each (default: one single-threaded worker per core). Quantized pools
+and finished trials are kept in --state (default OUT/.training-state); rerun
+the same command after an interruption to resume. evaluate writes the error
+report for a saved model (see training.evaluation).
+"""
+import argparse
+import logging
+import sys
+
+from training import evaluation
+from training.driver import BORDER_COUNT, DEFAULT_DATA_DIR, DEFAULT_MODELS_DIR, MODELS, N_ITER, run_training
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["evaluate"]:
+        return evaluation.main(argv[1:])
+
+    parser = argparse.ArgumentParser(prog="python -m training", description="Trains the *_model.cbm files from the preprocessed data")
+    parser.add_argument("--models", nargs="+", choices=list(MODELS), default=None, help="Models to train (default: all)")
+    parser.add_argument("--data", default=DEFAULT_DATA_DIR, help="Directory of preprocessed_*_data.csv")
+    parser.add_argument("--out", default=DEFAULT_MODELS_DIR, help="Directory for *_model.cbm and manifest.json")
+    parser.add_argument("--state", default=None, help="Pool cache and trial checkpoint (default OUT/.training-state)")
+    parser.add_argument("--workers", type=int, default=None, help="Trial processes (1 = no pool)")
+    parser.add_argument("--threads", type=int, default=None, help="CatBoost threads per trial")
+    parser.add_argument("--n-iter", type=int, default=N_ITER, help="Search candidates per model")
+    parser.add_argument("--border-count", type=int, default=BORDER_COUNT, help="Quantization borders per numeric feature")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    result = run_training(
+        args.models, args.data, args.out, args.state,
+        workers=args.workers, threads=args.threads, n_iter=args.n_iter, border_count=args.border_count,
+    )
+    for name, entry in result.items():
+        test = entry["test"]
+        print(f"{name}: MAE {test['mae']:.2f}, RMSE {test['rmse']:.2f}, MAPE {test['mape']:.2f}% ({entry['file']})")
+
+
+if __name__ == "__main__":
+    main()
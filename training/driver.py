@@ -0,0 +1,413 @@
+"""
+The four train_model_*.ipynb notebooks as one resumable job:
+backend/data/preprocessed_*_data.csv -> backend/models_files/*_model.cbm + manifest.json
+
+Each dataset is split 70/15/15 as in the notebooks, and its training rows are
+quantized once into a CatBoost Pool that is saved with its borders; trials and
+final fits load that instead of re-reading the CSV and re-quantizing it for
+every fit. The search (the candidates RandomizedSearchCV draws, each scored
+over 3 folds) of every model shares one process pool, and each trial gets an
+explicit thread budget so workers x threads stays within the cores instead of
+n_jobs=-1 searches of thread_count=4 models. Finished trials are appended to a
+checkpoint, so an interrupted search resumes where it stopped, and a model is
+refit on its best candidate as soon as its own trials are done.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from preprocessing.pipeline import file_digest, output_paths
+from training.evaluation import evaluate, mape, point_predictions, report_path, write_report
+
+logger = logging.getLogger(__name__)
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_DATA_DIR = HERE.parent / "backend" / "data"
+DEFAULT_MODELS_DIR = HERE.parent / "backend" / "models_files"
+STATE_DIR_NAME = ".training-state"
+MANIFEST_NAME = "manifest.json"
+
+# Model -> (ticket type of its preprocessed CSV, features in the notebook's
+# column order); the same features as MODEL_FEATURES in backend/config.py
+MODELS = {
+    "Capped": ("Capped", ["Make", "Model", "Year", "FuelType", "EngineSize", "Transmission", "DriveType", "Distance"]),
+    "Logbook": ("Log", ["Make", "Model", "Year", "FuelType", "EngineSize", "Transmission", "DriveType", "Distance", "Months"]),
+    "Prescribed": ("Prescribed", ["Make", "Model", "Year", "FuelType", "EngineSize", "Transmission", "DriveType", "Distance"]),
+    "Repair": ("Repair", ["TaskName", "Make", "Model", "Year", "FuelType", "EngineSize", "Transmission", "DriveType", "Distance"]),
+}
+CATEGORICAL = ["TaskName", "Make", "Model", "FuelType", "Transmission", "DriveType"]
+TARGET = "AdjustedPrice"
+
+# The notebooks' search: estimator settings, candidate grid, and the refit
+SEED = 42
+SEARCH_PARAMS = {
+    "loss_function": "RMSEWithUncertainty",
+    "eval_metric": "MAPE",
+    "od_type": "Iter",
+    "od_wait": 50,
+    "random_seed": SEED,
+}
+PARAM_GRID = {
+    "depth": [6, 8, 10],
+    "learning_rate": [0.01, 0.03, 0.05, 0.1],
+    "l2_leaf_reg": [1, 3, 5, 7],
+    "iterations": [1000, 1500],
+    "subsample": [0.8, 0.9, 1.0],
+    "colsample_bylevel": [0.8, 0.9, 1.0],
+    "min_child_samples": [5, 10, 20],
+}
+N_ITER = 25
+CV_FOLDS = 3
+EARLY_STOPPING_ROUNDS = 200
+BORDER_COUNT = 254
+
+
+def model_path(models_dir, name: str) -> Path:
+    return Path(models_dir) / f"{name.lower()}_model.cbm"
+
+
+def _key(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _write_json(path, data):
+    tmp = Path(f"{path}.tmp")
+    tmp.write_text(json.dumps(data, indent=2))
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    try:
+        return json.loads(Path(path).read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+# --- Datasets and cached pools ---
+
+def load_dataset(path, features):
+    """Features and target of a preprocessed CSV, missing categories filled with "missing" as in the notebooks."""
+    cats = [c for c in features if c in CATEGORICAL]
+    df = pd.read_csv(path, usecols=features + [TARGET], dtype={c: "str" for c in cats})
+    df[cats] = df[cats].fillna("missing")
+    return df[features], df[TARGET]
+
+
+def split_dataset(X, y, seed: int = SEED) -> dict:
+    """The notebooks' 70/15/15 train/validation/test split."""
+    from sklearn.model_selection import train_test_split
+
+    X_train, X_temp, y_train, y_temp = train_test_split(X, y, test_size=0.3, random_state=seed)
+    X_test, X_val, y_test, y_val = train_test_split(X_temp, y_temp, test_size=0.5, random_state=seed)
+    return {"train": (X_train, y_train), "val": (X_val, y_val), "test": (X_test, y_test)}
+
+
+def build_pool(name: str, data_dir, state_dir, border_count: int = BORDER_COUNT) -> dict:
+    """
+    Quantizes a model's training rows into <state>/pools/<name>: train.bin
+    (the quantized Pool), borders.tsv, frames.pkl (the raw splits, for
+    scoring) and meta.json. Reused while the CSV, features, split and border
+    count are unchanged; returns the metadata, whose key identifies the build.
+    """
+    from catboost import Pool
+
+    ticket, features = MODELS[name]
+    csv = output_paths(data_dir)[ticket]
+    directory = Path(state_dir) / "pools" / name
+    key = _key(file_digest(csv), features, SEED, border_count)
+    meta = _read_json(directory / "meta.json")
+    if meta and meta["key"] == key:
+        return {**meta, "directory": str(directory)}
+
+    start = time.perf_counter()
+    splits = split_dataset(*load_dataset(csv, features))
+    building = directory.with_name(f"{name}.building")
+    shutil.rmtree(building, ignore_errors=True)
+    building.mkdir(parents=True)
+
+    X_train, y_train = splits["train"]
+    pool = Pool(X_train, y_train, cat_features=[c for c in features if c in CATEGORICAL])
+    pool.quantize(border_count=border_count)
+    pool.save(str(building / "train.bin"))
+    pool.save_quantization_borders(str(building / "borders.tsv"))
+    pd.to_pickle(splits, building / "frames.pkl")
+
+    meta = {
+        "key": key,
+        "model": name,
+        "directory": str(directory),
+        "features": features,
+        "rows": {split: len(y) for split, (_, y) in splits.items()},
+        "border_count": border_count,
+    }
+    _write_json(building / "meta.json", meta)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(building, directory)
+    logger.info("Quantized %s: %d training rows (%.1fs)", name, meta["rows"]["train"], time.perf_counter() - start)
+    return meta
+
+
+# Per worker process: the pools and frames it has loaded, by build key and directory
+_LOADED = {}
+
+
+def _load(meta: dict):
+    from catboost import Pool
+
+    directory = Path(meta["directory"])
+    if (meta["key"], directory) not in _LOADED:
+        _LOADED[meta["key"], directory] = (
+            Pool(f"quantized://{directory / 'train.bin'}"),
+            pd.read_pickle(directory / "frames.pkl"),
+        )
+    return _LOADED[meta["key"], directory]
+
+
+# --- Work run in the pool ---
+
+def run_trial(meta: dict, params: dict, folds: int, threads: int) -> dict:
+    """
+    One search candidate: CV_FOLDS fits on slices of the quantized pool (as
+    RandomizedSearchCV's unshuffled KFold), each scored by MAPE on the raw
+    held-out rows.
+    """
+    from catboost import CatBoostRegressor
+    from sklearn.model_selection import KFold
+
+    start = time.perf_counter()
+    pool, frames = _load(meta)
+    X_train, y_train = frames["train"]
+    scores = []
+    for fit_rows, held_out in KFold(n_splits=folds).split(X_train):
+        model = CatBoostRegressor(**SEARCH_PARAMS, **params, thread_count=threads, verbose=0, allow_writing_files=False)
+        model.fit(pool.slice(fit_rows))
+        scores.append(mape(y_train.iloc[held_out], point_predictions(model, X_train.iloc[held_out])))
+    return {"scores": scores, "score": float(np.mean(scores)), "seconds": round(time.perf_counter() - start, 3)}
+
+
+def fit_final(meta: dict, params: dict, threads: int, path) -> dict:
+    """
+    Refits the best candidate with the validation split for early stopping,
+    saves the .cbm and writes the test split's evaluation report next to it.
+    """
+    from catboost import CatBoostRegressor, Pool
+
+    start = time.perf_counter()
+    pool, frames = _load(meta)
+    (X_val, y_val), (X_test, y_test) = frames["val"], frames["test"]
+    cats = [c for c in meta["features"] if c in CATEGORICAL]
+
+    model = CatBoostRegressor(**params, eval_metric="MAPE", random_seed=SEED, thread_count=threads, verbose=0, allow_writing_files=False)
+    model.fit(pool, eval_set=Pool(X_val, y_val, cat_features=cats), use_best_model=True, early_stopping_rounds=EARLY_STOPPING_ROUNDS)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.tmp")
+    model.save_model(str(tmp))
+    os.replace(tmp, path)
+
+    report = evaluate(model, X_test, y_test, thread_count=threads)
+    write_report(report, report_path(path.parent, meta["model"]))
+    return {
+        "test": {k: report["overall"][k] for k in ("mae", "rmse", "mape")},
+        "report": report_path(path.parent, meta["model"]).name,
+        "tree_count": int(model.tree_count_),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+# --- Checkpoint and manifest ---
+
+class TrialLog:
+    """
+    Finished trials, one JSON line each under their key (build key,
+    candidate and folds), appended and flushed as they complete. A line cut
+    short by an interruption is dropped when the log is read back, and the
+    file rewritten so later appends start on a line of their own.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.records = {}
+        if not self.path.exists():
+            return
+        text = self.path.read_text()
+        damaged = bool(text) and not text.endswith("\n")
+        for line in text.splitlines():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                damaged = True
+                continue
+            self.records[record["key"]] = record
+        if damaged:
+            tmp = Path(f"{self.path}.tmp")
+            tmp.write_text("".join(json.dumps(record) + "\n" for record in self.records.values()))
+            os.replace(tmp, self.path)
+
+    def __contains__(self, key) -> bool:
+        return key in self.records
+
+    def add(self, record: dict):
+        self.records[record["key"]] = record
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def read_manifest(models_dir) -> dict:
+    return _read_json(Path(models_dir) / MANIFEST_NAME) or {"models": {}}
+
+
+def candidates(param_grid: dict, n_iter: int) -> list:
+    """The parameter sets RandomizedSearchCV(random_state=SEED) samples from param_grid."""
+    from sklearn.model_selection import ParameterSampler
+
+    return [
+        {name: value.item() if isinstance(value, np.generic) else value for name, value in params.items()}
+        for params in ParameterSampler(param_grid, n_iter=n_iter, random_state=SEED)
+    ]
+
+
+# --- Driver ---
+
+class _Inline:
+    """Runs submissions in this process, with the executor interface (workers=1)."""
+
+    def submit(self, fn, *args) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+
+@contextmanager
+def _executor(workers: int):
+    if workers <= 1:
+        yield _Inline()
+        return
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        yield pool
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def thread_budget(workers=None, threads=None):
+    """(workers, threads per trial): by default one worker per core, one thread each."""
+    cores = os.cpu_count() or 1
+    workers = workers or max(1, cores // (threads or 1))
+    threads = threads or max(1, cores // workers)
+    if workers * threads > cores:
+        logger.warning("%d workers x %d threads oversubscribes %d cores", workers, threads, cores)
+    return workers, threads
+
+
+def run_training(
+    models=None,
+    data_dir=DEFAULT_DATA_DIR,
+    models_dir=DEFAULT_MODELS_DIR,
+    state_dir=None,
+    workers: int = None,
+    threads: int = None,
+    param_grid: dict = PARAM_GRID,
+    n_iter: int = N_ITER,
+    folds: int = CV_FOLDS,
+    border_count: int = BORDER_COUNT,
+) -> dict:
+    """
+    Searches and refits the given models (default: all four) and returns
+    their manifest entries. Trials already in <state>/trials.jsonl are not
+    rerun, and a model whose manifest entry came from the same search and
+    whose .cbm exists is not refit.
+    """
+    start = time.perf_counter()
+    names = list(models or MODELS)
+    unknown = set(names) - set(MODELS)
+    if unknown:
+        raise ValueError(f"Unknown models: {sorted(unknown)}")
+    state_dir = Path(state_dir or Path(models_dir) / STATE_DIR_NAME)
+    workers, threads = thread_budget(workers, threads)
+
+    metas = {name: build_pool(name, data_dir, state_dir, border_count) for name in names}
+    log = TrialLog(state_dir / "trials.jsonl")
+    manifest = read_manifest(models_dir)
+    trials = {
+        name: [(_key(metas[name]["key"], params, folds), params) for params in candidates(param_grid, n_iter)]
+        for name in names
+    }
+    resumed = sum(key in log for keys in trials.values() for key, _ in keys)
+    logger.info("Training %s: %d trials (%d from the checkpoint) on %d workers x %d threads",
+                names, sum(map(len, trials.values())), resumed, workers, threads)
+
+    def search_key(name):
+        return _key(metas[name]["key"], [key for key, _ in trials[name]])
+
+    def best(name):
+        return min((log.records[key] for key, _ in trials[name]), key=lambda record: record["score"])
+
+    def refit_needed(name):
+        entry = manifest["models"].get(name)
+        return not (entry and entry["search"] == search_key(name) and model_path(models_dir, name).exists())
+
+    result = {}
+    with _executor(workers) as pool:
+        running = {}
+
+        def finish_search(name):
+            if refit_needed(name):
+                future = pool.submit(fit_final, metas[name], best(name)["params"], threads, model_path(models_dir, name))
+                running[future] = ("fit", name, None)
+            else:
+                result[name] = manifest["models"][name]
+
+        for name in names:
+            pending = [(key, params) for key, params in trials[name] if key not in log]
+            for key, params in pending:
+                running[pool.submit(run_trial, metas[name], params, folds, threads)] = ("trial", name, (key, params))
+            if not pending:
+                finish_search(name)
+
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, name, trial = running.pop(future)
+                if kind == "trial":
+                    key, params = trial
+                    log.add({"key": key, "model": name, "params": params, **future.result()})
+                    if all(key in log for key, _ in trials[name]):
+                        finish_search(name)
+                    continue
+
+                chosen = best(name)
+                entry = {
+                    "file": model_path(models_dir, name).name,
+                    "search": search_key(name),
+                    "data": metas[name]["key"],
+                    "params": chosen["params"],
+                    "cv_mape": chosen["score"],
+                    "trials": len(trials[name]),
+                    "rows": metas[name]["rows"],
+                    "trained_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    **future.result(),
+                }
+                manifest["models"][name] = result[name] = entry
+                _write_json(Path(models_dir) / MANIFEST_NAME, manifest)
+                logger.info("%s: test MAPE %.2f%%, saved %s", name, entry["test"]["mape"], entry["file"])
+
+    logger.info("Training finished (%.1fs)", time.perf_counter() - start)
+    return result
@@ -0,0 +1,292 @@
+"""
+Holdout evaluation and error analysis: the func.ipynb helpers
+(top_n_categories, top_n_accuracy_by_category, categorical_error,
+plot_residuals) as one batch job that writes a report instead of printing.
+
+The holdout is scored once, in batches. The per-row error terms (error,
+absolute and squared error, percentage error and its band) are computed once,
+then every grouping (each categorical feature, and each pair of them) is
+factorized into integer codes and aggregated with np.bincount: no DataFrame is
+built and nothing is grouped one feature at a time, so millions of rows take
+seconds.
+
+python -m training evaluate MODEL [--model CBM] [--data CSV] [--out JSON]
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+BATCH_ROWS = 100_000
+# Absolute percentage error bands (upper edges, %) of the error distributions
+APE_BANDS = [5, 10, 20, 30, 50, 100]
+RESIDUAL_PERCENTILES = [1, 5, 10, 25, 50, 75, 90, 95, 99]
+HISTOGRAM_BINS = 50
+CALIBRATION_BINS = 10
+# Groups listed per grouping in the report, and the rows a group needs to be listed
+TOP_N = 10
+MIN_COUNT = 20
+
+
+# --- Metrics ---
+
+def mape(y_true, y_pred) -> float:
+    """MAPE in percent over the non-zero targets, as the notebooks compute it."""
+    y_true, y_pred = np.asarray(y_true, dtype=float), np.asarray(y_pred, dtype=float)
+    nonzero = y_true != 0
+    return float(np.mean(np.abs((y_true[nonzero] - y_pred[nonzero]) / y_true[nonzero])) * 100)
+
+
+def regression_metrics(y_true, y_pred) -> dict:
+    errors = np.asarray(y_pred, dtype=float) - np.asarray(y_true, dtype=float)
+    return {
+        "mae": float(np.mean(np.abs(errors))),
+        "rmse": float(np.sqrt(np.mean(errors ** 2))),
+        "mape": mape(y_true, y_pred),
+    }
+
+
+def point_predictions(model, X, **kwargs) -> np.ndarray:
+    """RMSEWithUncertainty models predict (mean, variance) pairs; the price is the mean."""
+    predictions = np.asarray(model.predict(X, **kwargs))
+    return predictions[:, 0] if predictions.ndim == 2 else predictions
+
+
+def predict_batched(model, X: pd.DataFrame, batch_rows: int = BATCH_ROWS, thread_count: int = -1) -> np.ndarray:
+    """Point predictions for every row of X, batch_rows at a time, so CatBoost never copies the whole holdout at once."""
+    predictions = np.empty(len(X), dtype=np.float64)
+    for start in range(0, len(X), batch_rows):
+        batch = X.iloc[start:start + batch_rows]
+        predictions[start:start + len(batch)] = point_predictions(model, batch, thread_count=thread_count)
+    return predictions
+
+
+# --- Error terms and groupings ---
+
+def band_labels() -> list:
+    edges = [0] + APE_BANDS
+    return [f"ape_{lo}_{hi}" for lo, hi in zip(edges, edges[1:])] + [f"ape_ge_{APE_BANDS[-1]}"]
+
+
+class ErrorTerms:
+    """
+    Per-row error terms, computed once and shared by every grouping.
+    Errors are y_true - y_pred (positive = under-predicted), as in the
+    notebooks; percentage errors only count rows with a non-zero target.
+    """
+
+    def __init__(self, y_true, y_pred):
+        self.y_true = np.asarray(y_true, dtype=np.float64)
+        self.y_pred = np.asarray(y_pred, dtype=np.float64)
+        self.error = self.y_true - self.y_pred
+        self.abs_error = np.abs(self.error)
+        self.sq_error = self.error ** 2
+        nonzero = self.y_true != 0
+        self.nonzero = nonzero.astype(np.float64)
+        self.ape = np.zeros_like(self.error)
+        np.divide(self.abs_error, np.abs(self.y_true), out=self.ape, where=nonzero)
+        self.ape *= 100
+        # Band per row; zero targets go to an extra slot that is not reported
+        self.band = np.where(nonzero, np.searchsorted(APE_BANDS, self.ape, side="right"), len(APE_BANDS) + 1)
+
+    def __len__(self) -> int:
+        return len(self.error)
+
+    def aggregate(self, codes: np.ndarray, groups: int) -> pd.DataFrame:
+        """count / mae / rmse / mape / bias and APE band counts per group code (0..groups-1)."""
+        def total(weights=None):
+            return np.bincount(codes, weights=weights, minlength=groups)
+
+        count = total()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            nonzero = total(self.nonzero)
+            table = pd.DataFrame({
+                "count": count,
+                "mae": total(self.abs_error) / count,
+                "rmse": np.sqrt(total(self.sq_error) / count),
+                "mape": total(self.ape) / nonzero,
+                "bias": total(self.error) / count,
+            })
+        slots = len(APE_BANDS) + 2
+        bands = np.bincount(codes * slots + self.band, minlength=groups * slots).reshape(groups, slots)
+        table[band_labels()] = bands[:, :-1]
+        return table
+
+
+def _factorize(values: pd.Series):
+    codes, labels = pd.factorize(values, use_na_sentinel=False)
+    return codes.astype(np.int64), np.asarray(labels, dtype=object)
+
+
+def error_tables(y_true, y_pred, features: pd.DataFrame, columns=None, pairs: bool = True, terms: ErrorTerms = None) -> dict:
+    """
+    Error statistics per value of each column (default: every column of
+    features) and, with pairs, per combination of each two columns. Returns
+    {"Make": table, ("Make", "FuelType"): table, ...}, each indexed by the
+    group values with empty combinations left out.
+    """
+    terms = terms or ErrorTerms(y_true, y_pred)
+    columns = list(features.columns if columns is None else columns)
+    factorized = {c: _factorize(features[c]) for c in columns}
+
+    tables = {}
+    for column, (codes, labels) in factorized.items():
+        table = terms.aggregate(codes, len(labels))
+        table.index = pd.Index(labels, name=column)
+        tables[column] = table
+
+    for a, b in combinations(columns, 2) if pairs else ():
+        (codes_a, labels_a), (codes_b, labels_b) = factorized[a], factorized[b]
+        codes = codes_a * len(labels_b) + codes_b
+        if len(labels_a) * len(labels_b) > 2 * len(codes):
+            # Too many combinations to count densely: renumber the ones present
+            present, codes = np.unique(codes, return_inverse=True)
+        else:
+            present = np.arange(len(labels_a) * len(labels_b))
+        table = terms.aggregate(codes, len(present))
+        table.index = pd.MultiIndex.from_arrays([labels_a[present // len(labels_b)], labels_b[present % len(labels_b)]], names=[a, b])
+        tables[a, b] = table[table["count"] > 0]
+    return tables
+
+
+def top_n(table: pd.DataFrame, n: int = TOP_N, by: str = "mae", min_count: int = 1):
+    """(best, worst) n groups of an error table by the given statistic, among groups with at least min_count rows."""
+    ranked = table[table["count"] >= min_count].sort_values(by)
+    return ranked.head(n), ranked.tail(n)[::-1]
+
+
+# --- Overall distribution ---
+
+def residual_summary(terms: ErrorTerms) -> dict:
+    """What plot_residuals showed: residual spread and histogram, and predicted vs true by predicted-price decile."""
+    residuals = terms.error
+    low, high = np.percentile(residuals, [0.5, 99.5])
+    counts, edges = np.histogram(residuals, bins=HISTOGRAM_BINS, range=(low, high))
+
+    deciles = np.unique(np.percentile(terms.y_pred, np.linspace(0, 100, CALIBRATION_BINS + 1)))
+    buckets = max(len(deciles) - 1, 1)
+    bucket = np.clip(np.searchsorted(deciles, terms.y_pred, side="right") - 1, 0, buckets - 1)
+    per_bucket = np.bincount(bucket, minlength=buckets)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        calibration = {
+            "edges": deciles,
+            "count": per_bucket,
+            "mean_pred": np.bincount(bucket, terms.y_pred, buckets) / per_bucket,
+            "mean_true": np.bincount(bucket, terms.y_true, buckets) / per_bucket,
+            "mae": np.bincount(bucket, terms.abs_error, buckets) / per_bucket,
+        }
+    return {
+        "mean": float(residuals.mean()),
+        "std": float(residuals.std()),
+        "percentiles": dict(zip(RESIDUAL_PERCENTILES, np.percentile(residuals, RESIDUAL_PERCENTILES))),
+        "histogram": {"edges": edges, "counts": counts, "below": int((residuals < low).sum()), "above": int((residuals > high).sum())},
+        "calibration": calibration,
+    }
+
+
+# --- Report ---
+
+def _records(table: pd.DataFrame) -> list:
+    return table.reset_index().to_dict(orient="records")
+
+
+def evaluate(model, X: pd.DataFrame, y, columns=None, pairs: bool = True, top: int = TOP_N,
+             min_count: int = MIN_COUNT, batch_rows: int = BATCH_ROWS, thread_count: int = -1) -> dict:
+    """
+    Scores X once and returns the report: overall metrics and APE bands, the
+    residual distribution, and per grouping (the categorical columns of X by
+    default, and their pairs) its group count with the top best and worst
+    groups by MAE among those with min_count rows.
+    """
+    from training.driver import CATEGORICAL
+
+    start = time.perf_counter()
+    predictions = predict_batched(model, X, batch_rows, thread_count)
+    scored = time.perf_counter()
+    terms = ErrorTerms(y, predictions)
+    columns = [c for c in X.columns if c in CATEGORICAL] if columns is None else list(columns)
+
+    overall = terms.aggregate(np.zeros(len(terms), dtype=np.int64), 1).iloc[0]
+    report = {
+        "rows": len(terms),
+        "overall": {k: float(overall[k]) for k in ("mae", "rmse", "mape", "bias")},
+        "ape_bands": {label: int(overall[label]) for label in band_labels()},
+        "residuals": residual_summary(terms),
+        "min_count": min_count,
+        "groups": {},
+    }
+    for key, table in error_tables(y, predictions, X, columns, pairs, terms).items():
+        best, worst = top_n(table, top, min_count=min_count)
+        report["groups"][" x ".join(key) if isinstance(key, tuple) else key] = {
+            "groups": len(table),
+            "listed": int((table["count"] >= min_count).sum()),
+            "best": _records(best),
+            "worst": _records(worst),
+        }
+    report["seconds"] = {"scoring": round(scored - start, 3), "analysis": round(time.perf_counter() - scored, 3)}
+    return report
+
+
+def _plain(value):
+    if isinstance(value, dict):
+        return {str(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_plain(v) for v in value]
+    if isinstance(value, (float, np.floating)):
+        return None if np.isnan(value) else round(float(value), 4)
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+def write_report(report: dict, path):
+    """Writes the report as compact JSON (floats rounded to 4 places, NaN as null), atomically."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.tmp")
+    tmp.write_text(json.dumps(_plain(report), separators=(",", ":")))
+    os.replace(tmp, path)
+
+
+def report_path(models_dir, name: str) -> Path:
+    return Path(models_dir) / f"{name.lower()}_evaluation.json"
+
+
+def main(argv=None):
+    from catboost import CatBoostRegressor
+
+    from preprocessing.pipeline import output_paths
+    from training.driver import DEFAULT_DATA_DIR, DEFAULT_MODELS_DIR, MODELS, load_dataset, model_path, split_dataset
+
+    parser = argparse.ArgumentParser(prog="python -m training evaluate", description="Writes an error-analysis report for a trained model")
+    parser.add_argument("name", choices=list(MODELS), help="Model whose features and data to use")
+    parser.add_argument("--model", default=None, help="Model file (default: the backend's <name>_model.cbm)")
+    parser.add_argument("--data", default=None, help="Holdout CSV with the features and AdjustedPrice (default: the test split of the preprocessed data)")
+    parser.add_argument("--out", default=None, help="Report file (default: next to the model, <name>_evaluation.json)")
+    parser.add_argument("--no-pairs", action="store_true", help="Only group by one feature at a time")
+    parser.add_argument("--min-count", type=int, default=MIN_COUNT, help="Rows a group needs to be listed")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    ticket, features = MODELS[args.name]
+    model_file = Path(args.model or model_path(DEFAULT_MODELS_DIR, args.name))
+    if args.data:
+        X, y = load_dataset(args.data, features)
+    else:
+        X, y = split_dataset(*load_dataset(output_paths(DEFAULT_DATA_DIR)[ticket], features))["test"]
+
+    model = CatBoostRegressor().load_model(str(model_file))
+    report = evaluate(model, X, y, pairs=not args.no_pairs, min_count=args.min_count)
+    out = args.out or report_path(model_file.parent, args.name)
+    write_report(report, out)
+    overall = report["overall"]
+    print(f"{args.name}: {report['rows']} rows, MAE {overall['mae']:.2f}, RMSE {overall['rmse']:.2f}, "
+          f"MAPE {overall['mape']:.2f}% ({report['seconds']['scoring'] + report['seconds']['analysis']:.1f}s) -> {out}")
@@ -0,0 +1,103 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from catboost import CatBoostRegressor
+
+from preprocessing.pipeline import OUTPUT_COLUMNS, output_paths
+from training import driver, evaluation
+
+# Small enough that a whole search runs in seconds
+GRID = {"depth": [2, 3], "iterations": [20, 40], "learning_rate": [0.1, 0.3]}
+
+
+def synthetic_data(rows: int, seed: int = 0) -> pd.DataFrame:
+    """preprocessed_*_data.csv rows with a price that depends on Make, Year and Distance"""
+    rng = np.random.default_rng(seed)
+    make = rng.choice(["TOYOTA", "MAZDA", "FORD"], rows)
+    year = rng.integers(2005, 2025, rows)
+    distance = rng.uniform(0, 2e5, rows)
+    return pd.DataFrame({
+        "BTicketID": np.arange(rows),
+        "TaskName": rng.choice(["Brake Pads", "Battery"], rows),
+        "Make": make,
+        "Model": [f"{m} MODEL{i}" for m, i in zip(make, rng.integers(0, 3, rows))],
+        "Year": year,
+        "FuelType": rng.choice(["Petrol", "Diesel", None], rows),
+        "EngineSize": rng.choice([1.5, 2.0, np.nan], rows),
+        "Transmission": rng.choice(["Auto", "Manual"], rows),
+        "DriveType": rng.choice(["2WD", "4WD", None], rows),
+        "Distance": distance,
+        "Months": rng.choice([6.0, 12.0], rows),
+        "AdjustedPrice": 200 + (make == "FORD") * 80 + (year - 2005) * 5 + distance / 2000 + rng.normal(0, 10, rows),
+    })[OUTPUT_COLUMNS]
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    directory = tmp_path / "data"
+    directory.mkdir()
+    for seed, path in enumerate(output_paths(directory).values()):
+        synthetic_data(300, seed).to_csv(path, index=False)
+    return directory
+
+
+# Test the search: ensures every model gets a .cbm that predicts raw rows, and a manifest entry
+def test_trains_models_and_manifest(data_dir, tmp_path):
+    """Two models on two workers -> both .cbm files load and score like the manifest says"""
+    out = tmp_path / "models"
+    result = driver.run_training(["Capped", "Repair"], data_dir, out, workers=2, threads=1, param_grid=GRID, n_iter=3, folds=2)
+
+    manifest = json.loads((out / driver.MANIFEST_NAME).read_text())
+    assert set(result) == set(manifest["models"]) == {"Capped", "Repair"}
+    for name, entry in result.items():
+        trials = [r for r in driver.TrialLog(out / driver.STATE_DIR_NAME / "trials.jsonl").records.values() if r["model"] == name]
+        assert len(trials) == entry["trials"] == 3
+        assert entry["cv_mape"] == min(r["score"] for r in trials)
+
+        X, y = driver.load_dataset(output_paths(data_dir)[driver.MODELS[name][0]], driver.MODELS[name][1])
+        X_test, y_test = driver.split_dataset(X, y)["test"]
+        model = CatBoostRegressor().load_model(str(out / entry["file"]))
+        assert np.isclose(evaluation.regression_metrics(y_test, model.predict(X_test))["mape"], entry["test"]["mape"])
+        assert json.loads((out / entry["report"]).read_text())["rows"] == len(y_test)
+        assert entry["test"]["mape"] < 15
+
+
+# Test resuming: ensures an interrupted search reruns only the trials missing from the checkpoint
+def test_resume_runs_only_missing_trials(data_dir, tmp_path, monkeypatch):
+    """Checkpoint cut to one trial -> two trials rerun (same search, no refit); a lost .cbm -> only the refit"""
+    out = tmp_path / "models"
+    driver.run_training(["Capped"], data_dir, out, workers=1, param_grid=GRID, n_iter=3, folds=2)
+    log = out / driver.STATE_DIR_NAME / "trials.jsonl"
+    first, *rest = log.read_text().splitlines()
+    log.write_text(first + "\n" + rest[0][:20])
+
+    calls = []
+    run_trial, fit_final = driver.run_trial, driver.fit_final
+    monkeypatch.setattr(driver, "run_trial", lambda *args: calls.append("trial") or run_trial(*args))
+    monkeypatch.setattr(driver, "fit_final", lambda *args: calls.append("fit") or fit_final(*args))
+    monkeypatch.setattr(driver, "build_pool", lambda *args, build=driver.build_pool: calls.append("pool") or build(*args))
+
+    driver.run_training(["Capped"], data_dir, out, workers=1, param_grid=GRID, n_iter=3, folds=2)
+    assert calls == ["pool", "trial", "trial"]
+
+    calls.clear()
+    (out / "capped_model.cbm").unlink()
+    driver.run_training(["Capped"], data_dir, out, workers=1, param_grid=GRID, n_iter=3, folds=2)
+    assert calls == ["pool", "fit"] and (out / "capped_model.cbm").exists()
+
+
+# Test the pool cache: ensures a quantized pool is reused until its CSV changes
+def test_pool_cache_tracks_data(data_dir, tmp_path):
+    """Same CSV -> same build; new rows -> rebuilt with the new row counts"""
+    state = tmp_path / "state"
+    meta = driver.build_pool("Logbook", data_dir, state)
+    stamp = (state / "pools" / "Logbook" / "train.bin").stat().st_mtime_ns
+    assert driver.build_pool("Logbook", data_dir, state) == meta
+    assert (state / "pools" / "Logbook" / "train.bin").stat().st_mtime_ns == stamp
+    assert (state / "pools" / "Logbook" / "borders.tsv").exists()
+
+    synthetic_data(400, 9).to_csv(output_paths(data_dir)["Log"], index=False)
+    rebuilt = driver.build_pool("Logbook", data_dir, state)
+    assert rebuilt["key"] != meta["key"] and sum(rebuilt["rows"].values()) == 400
@@ -0,0 +1,92 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from training import evaluation
+
+
+class BatchModel:
+    """Predicts 90% of Distance and records the size of every predict call"""
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, X, thread_count=-1):
+        self.batches.append(len(X))
+        return X["Distance"].to_numpy() * 0.9
+
+
+def holdout(rows: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({
+        "Make": rng.choice(["TOYOTA", "MAZDA", "FORD", None], rows),
+        "FuelType": rng.choice(["Petrol", "Diesel"], rows),
+        "Model": rng.choice([f"MODEL{i}" for i in range(40)], rows),
+        "Distance": rng.uniform(50, 500, rows),
+    })
+    y = X["Distance"] * rng.uniform(0.5, 2.5, rows)
+    y[rng.random(rows) < 0.05] = 0.0
+    return X, y
+
+
+def reference_table(y_true, y_pred, features, keys):
+    """What top_n_categories / categorical_error computed, one groupby at a time"""
+    df = features[keys].copy()
+    df["error"] = y_true.to_numpy() - y_pred
+    df["abs"] = df["error"].abs()
+    df["sq"] = df["error"] ** 2
+    df["ape"] = (df["abs"] / y_true.to_numpy()).where(y_true.to_numpy() != 0) * 100
+    grouped = df.groupby(keys, dropna=False)
+    return pd.DataFrame({
+        "count": grouped["error"].size(),
+        "mae": grouped["abs"].mean(),
+        "rmse": np.sqrt(grouped["sq"].mean()),
+        "mape": grouped["ape"].mean(),
+        "bias": grouped["error"].mean(),
+        "scored": grouped["ape"].count(),
+        "ape_ge_100": grouped["ape"].apply(lambda s: (s >= 100).sum()),
+    })
+
+
+# Test the grouping engine: ensures the bincount tables equal pandas groupby per feature and per pair
+@pytest.mark.parametrize("rows", [5000, 50])
+@pytest.mark.parametrize("keys", [["Make"], ["Model"], ["Make", "FuelType"], ["Make", "Model"]])
+def test_error_tables_match_groupby(keys, rows):
+    """Missing labels and zero targets included; 50 rows count Make x Model sparsely"""
+    X, y = holdout(rows)
+    predictions = X["Distance"].to_numpy() * 0.9
+    tables = evaluation.error_tables(y, predictions, X, ["Make", "FuelType", "Model"])
+    ours = tables[keys[0] if len(keys) == 1 else tuple(keys)].sort_index()
+    reference = reference_table(y, predictions, X, keys).sort_index()
+
+    assert len(ours) == len(reference)
+    for column in ("count", "mae", "rmse", "mape", "bias", "ape_ge_100"):
+        assert np.allclose(ours[column].to_numpy(dtype=float), reference[column].to_numpy(dtype=float), equal_nan=True), column
+    assert (ours[evaluation.band_labels()].sum(axis=1).to_numpy() == reference["scored"].to_numpy()).all()
+
+
+# Test the report: ensures the holdout is scored once in batches and the report file holds the summary
+def test_evaluate_writes_report(tmp_path):
+    """2500 rows in batches of 1000 -> three predict calls; overall metrics and ranked groups in the JSON"""
+    X, y = holdout(2500)
+    model = BatchModel()
+    report = evaluation.evaluate(model, X, y, columns=["Make", "Model"], top=3, min_count=10, batch_rows=1000)
+    assert model.batches == [1000, 1000, 500]
+
+    expected = evaluation.regression_metrics(y, X["Distance"] * 0.9)
+    assert all(np.isclose(report["overall"][k], expected[k]) for k in expected)
+    assert sum(report["ape_bands"].values()) == (y != 0).sum()
+
+    residuals = report["residuals"]
+    assert residuals["histogram"]["counts"].sum() + residuals["histogram"]["below"] + residuals["histogram"]["above"] == 2500
+    assert residuals["calibration"]["count"].sum() == 2500
+
+    path = tmp_path / "capped_evaluation.json"
+    evaluation.write_report(report, path)
+    saved = json.loads(path.read_text())
+    assert set(saved["groups"]) == {"Make", "Model", "Make x Model"}
+    worst = saved["groups"]["Make x Model"]["worst"]
+    assert len(worst) == 3 and all(group["count"] >= 10 for group in worst)
+    assert [g["mae"] for g in worst] == sorted((g["mae"] for g in worst), reverse=True)
+    assert saved["groups"]["Make"]["groups"] == 4